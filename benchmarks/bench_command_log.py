@@ -0,0 +1,80 @@
+"""
+benchmarks/bench_command_log.py
+
+Custo de registrar comandos: JsonWriter (um arquivo JSON indentado por
+comando) vs. CommandLog (JSON lines em lote, thread escritora) com cada
+política de fsync.
+
+Mede, na thread que chama save_command (a do reconhecimento), comandos/s e a
+latência p50/p99/máx por chamada; e o tempo total até tudo estar em disco
+(close). Use --dir para medir no cartão SD em vez do diretório temporário.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_command_log --commands 5000
+    python -m benchmarks.bench_command_log --commands 2000 --dir /media/sd/bench
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from src.model.jsonwriter import CommandLog, JsonWriter
+
+CMD = {
+    "intent": "controlar_dispositivo",
+    "entities": {"acao": "ligar", "dispositivo": "luz_sala"},
+    "confidence": 0.95,
+}
+
+
+def percentile(samples, q: float) -> float:
+    return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+def run(name: str, make, commands: int, base_dir: str) -> None:
+    out = tempfile.mkdtemp(dir=base_dir)
+    try:
+        # o JsonWriter imprime uma linha por comando
+        with contextlib.redirect_stdout(io.StringIO()):
+            writer = make(out)
+            latencies = []
+            t0 = time.perf_counter()
+            for i in range(commands):
+                t1 = time.perf_counter()
+                writer.save_command({**CMD, "n": i})
+                latencies.append(time.perf_counter() - t1)
+            calls = time.perf_counter() - t0
+            if hasattr(writer, "close"):
+                writer.close()
+            total = time.perf_counter() - t0
+        latencies.sort()
+        files = len(os.listdir(out))
+        print(f"{name:<26} {commands / calls:>10.0f} {1e6 * percentile(latencies, 0.5):>9.1f} "
+              f"{1e6 * percentile(latencies, 0.99):>9.1f} {1e6 * latencies[-1]:>10.1f} "
+              f"{total:>9.2f} {files:>8}")
+    finally:
+        shutil.rmtree(out, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--commands", type=int, default=5000)
+    parser.add_argument("--dir", default=None, help="diretório onde gravar (padrão: temporário)")
+    args = parser.parse_args()
+
+    base_dir = args.dir or tempfile.gettempdir()
+    os.makedirs(base_dir, exist_ok=True)
+    print(f"{args.commands} comandos em {base_dir}")
+    print(f"{'escritor':<26} {'cmd/s':>10} {'p50 µs':>9} {'p99 µs':>9} {'máx µs':>10} {'total s':>9} {'arquivos':>8}")
+    run("JsonWriter (1 arquivo/cmd)", lambda out: JsonWriter(out), args.commands, base_dir)
+    for fsync in ("never", "batch", "always"):
+        run(f"CommandLog fsync={fsync}", lambda out, fsync=fsync: CommandLog(out, fsync=fsync),
+            args.commands, base_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+benchmarks/bench_fuzzy.py
+
+Casamento aproximado (src/nlp/fuzzy.py): quantos comandos com erros típicos do
+ASR (troca de letras de mesmo som, letra apagada) o parser recupera com e sem o
+fallback, quantas frases fora do domínio viram comando por engano, e o custo de
+FuzzyIndex.correct e de parse_command quando o fallback roda.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_fuzzy --repeat 200
+"""
+
+import argparse
+import time
+
+from src.core.config import CONFIG
+from src.nlp import nlp
+from src.nlp.fuzzy import FuzzyIndex
+
+# (ouvido, frase correta): recuperar = mesmas entidades que o parse da correta
+NEAR_MISSES = [
+    ("ligue a lus da sala", "ligue a luz da sala"),
+    ("asende a luz da cosinha", "acende a luz da cozinha"),
+    ("ligui a luz do escritorio", "ligue a luz do escritorio"),
+    ("abre a janella", "abre a janela"),
+    ("liga o ventilado da sala", "liga o ventilador da sala"),
+    ("apaga a lus da cozinha", "apaga a luz da cozinha"),
+    # limite conhecido: "televisao" sozinha já casa tv_sala, então o fallback não roda
+    ("desliga a televisao do cuarto", "desliga a televisao do quarto"),
+    ("liga a cafeteira da cosinha", "liga a cafeteira da cozinha"),
+]
+
+OUT_OF_DOMAIN = ["quero pizza", "que horas sao", "toca alguma coisa", "bom dia",
+                 "como esta o tempo", "conta uma piada", "obrigado sistema"]
+
+
+def recovered(fuzzy: bool) -> int:
+    CONFIG["nlp"]["fuzzy"]["enabled"] = fuzzy
+    nlp._PARSE_CACHE.clear()
+    hits = 0
+    for heard, clean in NEAR_MISSES:
+        expected = nlp.parse_command(clean)["entities"]
+        hits += expected["dispositivo"] is not None and nlp.parse_command(heard)["entities"] == expected
+    return hits
+
+
+def false_positives() -> int:
+    nlp._PARSE_CACHE.clear()
+    return sum(nlp.parse_command(t)["entities"].get("dispositivo") is not None for t in OUT_OF_DOMAIN)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    enabled = CONFIG["nlp"]["fuzzy"]["enabled"]
+    try:
+        exact = recovered(False)
+        fuzzy = recovered(True)
+        print(f"comandos com erro de ASR recuperados: {exact}/{len(NEAR_MISSES)} exato, "
+              f"{fuzzy}/{len(NEAR_MISSES)} com fuzzy")
+        print(f"frases fora do domínio com dispositivo: {false_positives()}/{len(OUT_OF_DOMAIN)}")
+
+        vocabulary = nlp.current_vocabulary()
+        t0 = time.perf_counter()
+        index = FuzzyIndex({name: getattr(vocabulary, name) for name in ("actions", "devices", "generic_devices", "rooms")},
+                           nlp._normalize)
+        print(f"índice: {len(index.words)} palavras, {len(index._deletes)} variantes por deleção, "
+              f"montado em {1000 * (time.perf_counter() - t0):.1f} ms")
+
+        words = [w for heard, _ in NEAR_MISSES for w in heard.split(" ") if len(w) > 3]
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            index._corrections.clear()
+            for w in words:
+                index.correct(w)
+        per_word = 1e6 * (time.perf_counter() - t0) / (args.repeat * len(words))
+        print(f"FuzzyIndex.correct sem cache: {per_word:.1f} us/palavra")
+
+        for label, texts in (("exato", ["liga a luz da sala"]), ("fallback", [heard for heard, _ in NEAR_MISSES])):
+            t0 = time.perf_counter()
+            for _ in range(args.repeat):
+                nlp._PARSE_CACHE.clear()
+                vocabulary.fuzzy()._corrections.clear()
+                for text in texts:
+                    nlp.parse_command(text)
+            per_call = 1e6 * (time.perf_counter() - t0) / (args.repeat * len(texts))
+            print(f"parse_command ({label}): {per_call:.1f} us/chamada")
+    finally:
+        CONFIG["nlp"]["fuzzy"]["enabled"] = enabled
+        nlp._PARSE_CACHE.clear()
+
+
+if __name__ == "__main__":
+    main()
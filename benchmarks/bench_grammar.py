@@ -0,0 +1,67 @@
+"""
+benchmarks/bench_grammar.py
+
+Fator de tempo real (RTF = tempo de CPU / duração do áudio) do Vosk com
+vocabulário aberto vs. gramática de comandos gerada de keys.py, sobre um
+diretório de WAVs gravados (PCM16 mono na taxa do modelo).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_grammar --model models/vosk-model-small-pt-0.3 --wavs gravacoes/
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+import wave
+
+from vosk import KaldiRecognizer, Model, SetLogLevel
+
+from src.nlp.grammar import command_grammar
+
+
+def decode(model, path: str, grammar):
+    """Decodifica o WAV em blocos de 4000 bytes; retorna (texto, cpu_s, duração_s)."""
+    with wave.open(path, "rb") as wf:
+        sr = wf.getframerate()
+        data = wf.readframes(wf.getnframes())
+    rec = KaldiRecognizer(model, sr) if grammar is None else KaldiRecognizer(model, sr, grammar)
+    texts = []
+    t0 = time.process_time()
+    for i in range(0, len(data), 4000):
+        if rec.AcceptWaveform(data[i:i + 4000]):
+            texts.append(json.loads(rec.Result()).get("text", ""))
+    texts.append(json.loads(rec.FinalResult()).get("text", ""))
+    cpu = time.process_time() - t0
+    return " ".join(t for t in texts if t), cpu, len(data) / 2 / sr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--wavs", required=True, help="diretório com arquivos .wav")
+    parser.add_argument("--show", action="store_true", help="imprime as transcrições de cada modo")
+    args = parser.parse_args()
+
+    SetLogLevel(-1)
+    model = Model(args.model)
+    paths = sorted(glob.glob(os.path.join(args.wavs, "*.wav")))
+    if not paths:
+        raise SystemExit(f"Nenhum WAV em {args.wavs}")
+
+    modes = {"vocabulário aberto": None, "gramática de comandos": command_grammar(model)}
+    print(f"{len(paths)} arquivos; gramática com {len(json.loads(modes['gramática de comandos']))} frases")
+    for name, grammar in modes.items():
+        total_cpu = total_audio = 0.0
+        for path in paths:
+            text, cpu, duration = decode(model, path, grammar)
+            total_cpu += cpu
+            total_audio += duration
+            if args.show:
+                print(f"  [{name}] {os.path.basename(path)}: {text!r}")
+        print(f"{name:<24} RTF {total_cpu / total_audio:.3f}  ({total_cpu:.2f} s CPU / {total_audio:.1f} s de áudio)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+benchmarks/bench_history.py
+
+Histórico de comandos: gera um ano sintético de comandos (JSON lines, como o
+CommandLog grava), importa no SQLite (src/model/history.py) e compara o tempo
+das consultas típicas com a varredura do log (read_log) que seria necessária
+sem o índice.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_history --days 365 --per-day 300
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from src.model.history import CommandHistory
+from src.model.jsonwriter import read_log
+from src.nlp.keys import ACTIONS, DEVICES
+
+
+def generate(logs: str, days: int, per_day: int, seed: int = 0) -> int:
+    """Escreve um arquivo commands_AAAAMMDD.jsonl por dia; retorna o total de comandos."""
+    rng = random.Random(seed)
+    devices = list(DEVICES)
+    actions = list(ACTIONS)
+    start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) - timedelta(days=days)
+    total = 0
+    for d in range(days):
+        day = start + timedelta(days=d)
+        seconds = sorted(rng.uniform(0, 86400) for _ in range(per_day))
+        with open(os.path.join(logs, f"commands_{day:%Y%m%d}.jsonl"), "w", encoding="utf-8") as f:
+            for s in seconds:
+                record = {"intent": "controlar_dispositivo",
+                          "entities": {"acao": rng.choice(actions), "dispositivo": rng.choice(devices)},
+                          "confidence": round(rng.uniform(0.5, 1.0), 3),
+                          "timestamp": (day + timedelta(seconds=s)).isoformat()}
+                f.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+                total += 1
+    return total
+
+
+def timed_ms(fn, repeat: int = 20):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--per-day", type=int, default=300)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        logs = os.path.join(tmp, "logs")
+        os.makedirs(logs)
+        total = generate(logs, args.days, args.per_day)
+        history = CommandHistory(os.path.join(tmp, "history.sqlite3"))
+        t0 = time.perf_counter()
+        history.import_log(logs)
+        elapsed = time.perf_counter() - t0
+        print(f"{total} comandos ({args.days} dias) importados em {elapsed:.2f} s "
+              f"({total / elapsed:.0f} cmd/s); banco com {os.path.getsize(history.path) / 1e6:.1f} MB")
+
+        week = time.time() - 7 * 86400
+        week_iso = datetime.fromtimestamp(week).isoformat()
+        device = next(iter(DEVICES))
+        queries = [
+            (f"{device} ligado, 7 dias",
+             lambda: history.count(since=week, dispositivo=device, acao="ligar"),
+             lambda: sum(1 for r in read_log(logs) if r["timestamp"] >= week_iso
+                         and r["entities"]["dispositivo"] == device and r["entities"]["acao"] == "ligar")),
+            ("top dispositivos, tudo",
+             lambda: history.aggregate(by=("dispositivo",))[:3],
+             lambda: Counter(r["entities"]["dispositivo"] for r in read_log(logs)).most_common(3)),
+            (f"{device} por dia, 30 dias",
+             lambda: len(history.aggregate(by=(), bucket="day", since="30d", dispositivo=device)),
+             None),
+            ("últimos 20 comandos",
+             lambda: len(history.query(limit=20)),
+             None),
+        ]
+        print(f"{'consulta':<32} {'SQLite (ms)':>12} {'varrer log (ms)':>16}")
+        for name, indexed, scan in queries:
+            ms, _ = timed_ms(indexed)
+            scan_ms = f"{timed_ms(scan, repeat=1)[0]:>16.1f}" if scan else f"{'-':>16}"
+            print(f"{name:<32} {ms:>12.3f} {scan_ms}")
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
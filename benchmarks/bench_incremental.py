@@ -0,0 +1,73 @@
+"""
+benchmarks/bench_incremental.py
+
+Parciais palavra a palavra: custo de rodar parse_command do zero em cada
+parcial vs. IncrementalParser (src/nlp/incremental.py), que só processa as
+palavras novas. Com --revise, uma fração dos parciais troca a última palavra
+(como o Vosk faz ao revisar a hipótese), forçando o rollback.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_incremental --utterances 2000 --repeat 1 4
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+from benchmarks.bench_nlp import synthetic_corpus
+from src.nlp.incremental import IncrementalParser
+from src.nlp.nlp import parse_command
+
+
+def partial_sequences(corpus: List[str], repeat: int, revise: float, seed: int = 0) -> List[List[str]]:
+    """Uma lista de parciais por frase; `repeat` concatena a frase consigo mesma (frases longas)."""
+    rng = random.Random(seed)
+    sequences = []
+    for text in corpus:
+        words = " ".join([text] * repeat).split()
+        partials = []
+        for k in range(1, len(words) + 1):
+            if k > 1 and rng.random() < revise:
+                partials.append(" ".join(words[:k - 1] + ["hum"]))
+            partials.append(" ".join(words[:k]))
+        sequences.append(partials)
+    return sequences
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utterances", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, nargs="+", default=[1, 4],
+                        help="tamanhos de frase (frase base repetida n vezes)")
+    parser.add_argument("--revise", type=float, default=0.1,
+                        help="fração dos parciais que revisa a última palavra")
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.utterances)
+    print(f"{'frase':>6} {'parciais':>9} {'parse_command (us)':>19} {'incremental (us)':>17} {'ganho':>6}")
+    for repeat in args.repeat:
+        sequences = partial_sequences(corpus, repeat, args.revise)
+        total = sum(len(s) for s in sequences)
+
+        t0 = time.perf_counter()
+        for partials in sequences:
+            for text in partials:
+                parse_command(text)
+        full = time.perf_counter() - t0
+
+        incremental = IncrementalParser()
+        t0 = time.perf_counter()
+        for partials in sequences:
+            incremental.reset()
+            for text in partials:
+                incremental.update(text)
+        inc = time.perf_counter() - t0
+
+        print(f"{'x' + str(repeat):>6} {total:>9} {1e6 * full / total:>19.1f} "
+              f"{1e6 * inc / total:>17.1f} {full / inc:>5.1f}x")
+    print("IncrementalParser:", incremental.stats())
+
+
+if __name__ == "__main__":
+    main()
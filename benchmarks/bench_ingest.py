@@ -0,0 +1,107 @@
+"""
+benchmarks/bench_ingest.py
+
+Carga da ingestão pela rede (src/core/ingest.py) numa só máquina: N clientes
+de loopback enviam áudio como nós ESP32 (pacotes com CRC por padrão) e uma
+thread por sessão drena a fonte decodificada, como a captura do runtime. Não
+há reconhecimento: mede só rede + sessão + decodificação de pacotes.
+
+Para cada número de conexões informa vazão (MB/s e múltiplos de tempo real),
+bytes descartados e pausas do TCP. Com --speed 1 os nós enviam em tempo real e
+o que importa é não haver descartes nem atraso.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_ingest --connections 1 8 32 --seconds 30
+    python -m benchmarks.bench_ingest --connections 16 --udp --raw
+    python -m benchmarks.bench_ingest --wav comando.wav --speed 1 --connections 64
+"""
+
+import argparse
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from src.audio.ring_buffer import BLOCK, DROP_OLDEST
+from src.audio.sources import ESP32_SAMPLE_RATE, read_wav_pcm16
+from src.core.ingest import IngestServer, push_audio
+
+
+def drain(source, stop: threading.Event) -> None:
+    while not stop.is_set():
+        source.read(4000)
+
+
+async def run(connections: int, pcm: bytes, args) -> dict:
+    stop = threading.Event()
+    threads = []
+
+    def on_session(node, source):
+        thread = threading.Thread(target=drain, args=(source, stop), daemon=True)
+        thread.start()
+        threads.append(thread)
+
+    ingest = IngestServer(host="127.0.0.1", tcp_port=None if args.udp else 0, udp_port=0 if args.udp else None,
+                          framed=not args.raw, buffer_seconds=args.buffer_seconds,
+                          overflow=DROP_OLDEST if args.udp or args.drop else BLOCK,
+                          session_timeout_s=None, on_session=on_session, verbose=False)
+    async with ingest:
+        port = ingest.udp_port if args.udp else ingest.tcp_port
+        t0 = time.perf_counter()
+        results = await asyncio.gather(*(
+            push_audio("127.0.0.1", port, f"no{i}", pcm, speed=args.speed, framed=not args.raw, udp=args.udp)
+            for i in range(connections)))
+        sent = sum(r["bytes"] for r in results)
+        # espera os consumidores alcançarem o que chegou
+        while sum(s.bytes_received for s in ingest.sessions.values()) < sent and time.perf_counter() - t0 < 60:
+            await asyncio.sleep(0.01)
+            if args.udp:
+                break
+        elapsed = time.perf_counter() - t0
+        stats = ingest.stats()
+    stop.set()
+    for thread in threads:
+        thread.join(timeout=2.0)
+    sessions = stats["sessions"].values()
+    received = sum(s["bytes_received"] for s in sessions)
+    return {
+        "connections": connections,
+        "sessions": len(stats["sessions"]),
+        "sent_mb": sent / 1e6,
+        "received_mb": received / 1e6,
+        "mb_per_s": received / 1e6 / elapsed,
+        "x_realtime": sum(r["audio_seconds"] for r in results) * received / max(sent, 1) / elapsed,
+        "dropped_bytes": sum(s["dropped_bytes"] for s in sessions),
+        "pauses": sum(s["pauses"] for s in sessions),
+        "max_backlog_s": max((s["max_backlog_seconds"] for s in sessions), default=0.0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--wav", nargs="*", help="áudio enviado por cada nó (padrão: ruído sintético)")
+    parser.add_argument("--seconds", type=float, default=30.0, help="duração do áudio sintético por nó")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = tempo real; 0 = o mais rápido possível")
+    parser.add_argument("--udp", action="store_true")
+    parser.add_argument("--raw", action="store_true", help="PCM sem pacotes")
+    parser.add_argument("--drop", action="store_true", help="descarta o mais antigo em vez de pausar o TCP")
+    parser.add_argument("--buffer-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    if args.wav:
+        pcm = b"".join(read_wav_pcm16(path, ESP32_SAMPLE_RATE).tobytes() for path in args.wav)
+    else:
+        rng = np.random.default_rng(0)
+        pcm = rng.normal(0, 2000, int(args.seconds * ESP32_SAMPLE_RATE)).astype(np.int16).tobytes()
+
+    print(f"{'conexões':>9} {'MB/s':>8} {'x tempo real':>13} {'descartes':>10} {'pausas':>7} {'backlog máx':>12}")
+    for n in args.connections:
+        r = asyncio.run(run(n, pcm, args))
+        print(f"{r['connections']:>9} {r['mb_per_s']:>8.1f} {r['x_realtime']:>13.0f} "
+              f"{r['dropped_bytes']:>10} {r['pauses']:>7} {r['max_backlog_s']:>11.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+benchmarks/bench_nlp.py
+
+Vazão do parser em lote (parse_commands) em função do número de workers,
+sobre um corpus sintético gerado a partir do vocabulário de src/nlp/keys.py.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_nlp --utterances 50000 --workers 0 2 4
+"""
+
+import argparse
+import random
+import time
+from typing import List
+
+from src.nlp.keys import ACTIONS, DEVICES, ROOMS, GENERIC_DEVICES, COMPOSABLE
+from src.nlp.nlp import parse_commands
+
+PREFIXES = ["", "por favor ", "pode ", "sistema ", "nao ", "quero "]
+SUFFIXES = ["", " por favor", " agora", " no 50%", " para 22 graus", " imediatamente"]
+ARTICLES = ["", "a ", "o "]
+NOISE = ["quero pizza", "que horas sao", "bom dia", "toca alguma coisa"]
+
+
+def synthetic_corpus(n: int, seed: int = 0) -> List[str]:
+    """Gera `n` frases combinando ações, dispositivos, genéricos e cômodos do keys.py."""
+    rng = random.Random(seed)
+    actions = [s for syns in ACTIONS.values() for s in syns]
+    devices = [s for syns in DEVICES.values() for s in syns]
+    generics = [s for key in COMPOSABLE for s in GENERIC_DEVICES[key]]
+    rooms = [s for syns in ROOMS.values() for s in syns]
+    corpus = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.45:
+            target = rng.choice(devices)
+        elif roll < 0.9:
+            target = f"{rng.choice(generics)} da {rng.choice(rooms)}"
+        else:
+            corpus.append(rng.choice(NOISE))
+            continue
+        corpus.append(
+            rng.choice(PREFIXES) + rng.choice(actions) + " " + rng.choice(ARTICLES)
+            + target + rng.choice(SUFFIXES)
+        )
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--utterances", type=int, default=20000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--chunksize", type=int, default=1024)
+    args = parser.parse_args()
+
+    corpus = synthetic_corpus(args.utterances)
+    print(f"Corpus sintético: {len(corpus)} frases")
+    print(f"{'workers':>8} {'tempo (s)':>10} {'frases/s':>12}")
+    for workers in args.workers:
+        t0 = time.perf_counter()
+        count = sum(1 for _ in parse_commands(iter(corpus), workers=workers, chunksize=args.chunksize))
+        elapsed = time.perf_counter() - t0
+        print(f"{workers:>8} {elapsed:>10.3f} {count / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
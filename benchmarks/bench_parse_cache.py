@@ -0,0 +1,45 @@
+"""
+benchmarks/bench_parse_cache.py
+
+Cache LRU de parse_command: um dia de comandos em casa repete poucas frases
+("liga a luz da sala" dezenas de vezes). Sorteia transcrições com distribuição
+Zipf sobre o corpus sintético de bench_nlp e mede o custo por chamada sem
+cache e com caches de vários tamanhos (CONFIG["nlp"]["cache_size"]).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_parse_cache --calls 100000 --distinct 500 --sizes 0 64 1024
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.bench_nlp import synthetic_corpus
+from src.nlp import nlp
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=100000)
+    parser.add_argument("--distinct", type=int, default=500, help="frases diferentes no corpus")
+    parser.add_argument("--zipf", type=float, default=1.1, help="expoente da distribuição das frases")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 64, 1024])
+    args = parser.parse_args()
+
+    phrases = synthetic_corpus(args.distinct)
+    weights = [1 / (rank + 1) ** args.zipf for rank in range(len(phrases))]
+    calls = random.Random(0).choices(phrases, weights, k=args.calls)
+
+    print(f"{'cache':>6} {'us/chamada':>11} {'acertos':>8} {'despejos':>9}")
+    for size in args.sizes:
+        nlp._PARSE_CACHE = nlp.ParseCache(size)
+        t0 = time.perf_counter()
+        for text in calls:
+            nlp.parse_command(text)
+        elapsed = time.perf_counter() - t0
+        stats = nlp._PARSE_CACHE.stats()
+        print(f"{size:>6} {1e6 * elapsed / len(calls):>11.2f} {stats['hit_rate']:>8.1%} {stats['evictions']:>9}")
+
+
+if __name__ == "__main__":
+    main()
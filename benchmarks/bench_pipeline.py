@@ -0,0 +1,210 @@
+"""
+benchmarks/bench_pipeline.py
+
+Benchmark offline do pipeline completo, dirigido por arquivos: cada WAV de um
+diretório é entregue em blocos de CONFIG["audio"]["blocksize"] amostras
+(como o microfone/ESP32) a AudioPreprocessor (streaming) -> PorcupineRecognizer
+(opcional) -> VoskRecognizer -> parse_command.
+
+Não usa microfone, serial nem sounddevice: roda em qualquer Linux sem áudio.
+
+Manifesto (JSON lines), uma linha por arquivo; campos além de "file" são opcionais:
+    {"file": "luz_sala_01.wav", "text": "ligar a luz da sala",
+     "intent": "controlar_dispositivo", "acao": "ligar", "dispositivo": "luz_sala"}
+Sem "intent"/"acao"/"dispositivo", o esperado é parse_command(text).
+
+Relata, por estágio, percentis de latência por bloco, além de RTF, tempo de
+CPU, pico de RSS, WER e acurácia de intent.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_pipeline --wavs corpus/ --manifest corpus/manifest.jsonl
+    python -m benchmarks.bench_pipeline --wavs corpus/ --kws --realtime --json resultado.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.audio.preprocessor import AudioPreprocessor
+from src.audio.sources import read_wav_pcm16
+from src.core.config import CONFIG
+from src.nlp.nlp import parse_command
+from src.recognition.model_manager import ModelManager
+from src.recognition.vosk_recognizer import VoskRecognizer
+
+STAGES = ("preprocess", "kws", "asr", "nlp")
+
+
+def load_manifest(path: Optional[str]) -> Dict[str, dict]:
+    if not path:
+        return {}
+    entries = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entry = json.loads(line)
+                entries[entry["file"]] = entry
+    return entries
+
+
+def word_errors(reference: str, hypothesis: str) -> tuple:
+    """(erros, palavras na referência) pela distância de edição entre palavras."""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    row = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        prev, row[0] = row[0], i
+        for j, h in enumerate(hyp, 1):
+            prev, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, prev + (r != h))
+    return row[-1], len(ref)
+
+
+def percentiles(samples: List[float]) -> dict:
+    if not samples:
+        return {}
+    arr = np.asarray(samples) * 1000.0
+    return {f"p{q}_ms": float(np.percentile(arr, q)) for q in (50, 90, 99)} | {"max_ms": float(arr.max())}
+
+
+def expected_intent(entry: dict) -> tuple:
+    if "intent" in entry or "acao" in entry or "dispositivo" in entry:
+        return entry.get("intent"), entry.get("acao"), entry.get("dispositivo")
+    parsed = parse_command(entry.get("text", ""))
+    return parsed["intent"], parsed["entities"].get("acao"), parsed["entities"].get("dispositivo")
+
+
+class Timer:
+    """Acumula latências por estágio."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+
+    def run(self, stage: str, fn, *args):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        self.samples[stage].append(time.perf_counter() - t0)
+        return result
+
+
+def run_file(path: str, pre: AudioPreprocessor, kws, asr: VoskRecognizer, timer: Timer,
+             sample_rate: int, block: int, realtime: bool) -> dict:
+    audio = read_wav_pcm16(path, sample_rate)
+    pre.reset_stream()
+    asr.reset_session()
+    texts = []
+    detections = 0
+    block_s = block / sample_rate
+    start = time.perf_counter()
+    for i, pos in enumerate(range(0, audio.size, block)):
+        if realtime:
+            # ritmo da captura real: o bloco i só "chega" após (i+1) * block_s
+            delay = start + (i + 1) * block_s - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        chunk = timer.run("preprocess", pre.process_array, audio[pos:pos + block]).tobytes()
+        if kws is not None and timer.run("kws", kws.process_chunk, chunk) >= 0:
+            detections += 1
+        text = timer.run("asr", asr.accept_chunk, chunk)
+        if text:
+            texts.append(text)
+    final = timer.run("asr", asr.flush)
+    if final:
+        texts.append(final)
+    hypothesis = " ".join(texts)
+    parsed = timer.run("nlp", parse_command, hypothesis)
+    return {"hypothesis": hypothesis, "parsed": parsed, "detections": detections,
+            "audio_seconds": audio.size / sample_rate}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--wavs", required=True, help="diretório com arquivos .wav")
+    parser.add_argument("--manifest", help="JSON lines com transcrição/intent esperados")
+    parser.add_argument("--model", help="modelo Vosk (padrão: CONFIG['recognition']['model_path'])")
+    parser.add_argument("--block", type=int, default=CONFIG["audio"]["blocksize"], help="amostras por bloco")
+    parser.add_argument("--kws", action="store_true", help="inclui o Porcupine no pipeline")
+    parser.add_argument("--realtime", action="store_true", help="entrega os blocos no ritmo do áudio")
+    parser.add_argument("--json", help="grava o relatório completo neste arquivo")
+    args = parser.parse_args()
+
+    sample_rate = CONFIG["audio"]["samplerate"]
+    manifest = load_manifest(args.manifest)
+    files = sorted(f for f in os.listdir(args.wavs) if f.lower().endswith(".wav"))
+    if not files:
+        raise SystemExit(f"Nenhum WAV em {args.wavs}")
+
+    model = ModelManager(args.model).load_model()
+    asr = VoskRecognizer(model)
+    pre = AudioPreprocessor(sample_rate=sample_rate, streaming=True)
+    kws = None
+    if args.kws:
+        from src.recognition.porcupine_recognizer import PorcupineRecognizer
+        kws = PorcupineRecognizer()
+
+    timer = Timer()
+    errors = words = 0
+    correct = scored = 0
+    total_audio = 0.0
+    per_file = []
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    try:
+        for name in files:
+            result = run_file(os.path.join(args.wavs, name), pre, kws, asr, timer,
+                              sample_rate, args.block, args.realtime)
+            total_audio += result["audio_seconds"]
+            entry = manifest.get(name)
+            row = {"file": name, "hypothesis": result["hypothesis"], "detections": result["detections"]}
+            if entry and "text" in entry:
+                e, n = word_errors(entry["text"], result["hypothesis"])
+                errors, words = errors + e, words + n
+                row["wer"] = e / n if n else 0.0
+            if entry:
+                parsed = result["parsed"]
+                got = (parsed["intent"], parsed["entities"].get("acao"), parsed["entities"].get("dispositivo"))
+                row["intent_ok"] = got == expected_intent(entry)
+                correct += row["intent_ok"]
+                scored += 1
+            per_file.append(row)
+            print(f"{name}: {result['hypothesis']!r}" + (" [ok]" if row.get("intent_ok") else ""))
+    finally:
+        if kws is not None:
+            kws.delete()
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+
+    report = {
+        "files": len(files),
+        "audio_seconds": total_audio,
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        # em --realtime o tempo de parede inclui a espera; o RTF usa CPU
+        "rtf": cpu / total_audio if total_audio else None,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "wer": errors / words if words else None,
+        "intent_accuracy": correct / scored if scored else None,
+        "stages": {stage: percentiles(timer.samples[stage]) for stage in STAGES if timer.samples[stage]},
+        "per_file": per_file,
+    }
+
+    print(f"\n{len(files)} arquivos, {total_audio:.1f} s de áudio, blocos de {args.block} amostras")
+    for stage, stats in report["stages"].items():
+        print(f"  {stage:<10} p50 {stats['p50_ms']:7.3f} ms  p90 {stats['p90_ms']:7.3f} ms  "
+              f"p99 {stats['p99_ms']:7.3f} ms  max {stats['max_ms']:7.3f} ms")
+    print(f"RTF (CPU/áudio): {report['rtf']:.3f}   CPU: {cpu:.2f} s   pico de RSS: {report['peak_rss_mb']:.0f} MB")
+    if report["wer"] is not None:
+        print(f"WER: {report['wer']:.1%} ({errors}/{words} palavras)")
+    if report["intent_accuracy"] is not None:
+        print(f"Acurácia de intent: {report['intent_accuracy']:.1%} ({correct}/{scored})")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+benchmarks/bench_preprocessor.py
+
+Custo de CPU por chunk do AudioPreprocessor: modo original (butter() + lfilter
+reprojetados a cada chunk, RMS por bloco) vs. modo streaming (SOS projetado uma
+vez, estado zi entre chunks, AGC suavizado).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_preprocessor --seconds 60 --blocksize 512
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.audio.preprocessor import AudioPreprocessor
+
+
+def run(pre: AudioPreprocessor, chunks) -> float:
+    """Retorna o tempo de CPU médio por chunk, em microssegundos."""
+    t0 = time.process_time()
+    for chunk in chunks:
+        pre.process_array(chunk)
+    return (time.process_time() - t0) / len(chunks) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--blocksize", type=int, default=512)
+    parser.add_argument("--samplerate", type=int, default=16000)
+    parser.add_argument("--highcut", type=float, default=7000.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    n = int(args.seconds * args.samplerate)
+    signal = (rng.standard_normal(n) * 3000).astype(np.int16)
+    chunks = [signal[i:i + args.blocksize] for i in range(0, n - args.blocksize + 1, args.blocksize)]
+
+    common = dict(sample_rate=args.samplerate, highcut=args.highcut, do_noise_reduction=False)
+    legacy = run(AudioPreprocessor(**common), chunks)
+    streaming = run(AudioPreprocessor(streaming=True, **common), chunks)
+
+    budget = args.blocksize / args.samplerate * 1e6
+    print(f"{len(chunks)} chunks de {args.blocksize} amostras @ {args.samplerate} Hz "
+          f"(orçamento de tempo real: {budget:.0f} us/chunk)")
+    print(f"{'modo':>10} {'us/chunk':>10} {'% do tempo real':>16}")
+    for name, cost in (("original", legacy), ("streaming", streaming)):
+        print(f"{name:>10} {cost:>10.1f} {cost / budget * 100:>15.2f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+benchmarks/bench_recognizer_pool.py
+
+Custo de obter um reconhecedor pronto para a próxima frase do diálogo:
+novo KaldiRecognizer vs. Reset() vs. RecognizerPool.acquire(). Com --wav,
+mede também fim da fala -> resposta do diálogo (Result + interpretação),
+alimentando o WAV em blocos de 4000 bytes como a ESP32.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_recognizer_pool --model model --repeat 50
+    python -m benchmarks.bench_recognizer_pool --model model --wav resposta.wav
+"""
+
+import argparse
+import json
+import statistics
+import time
+import wave
+
+from vosk import KaldiRecognizer, Model, SetLogLevel
+
+from src.recognition.recognizer_pool import RecognizerPool
+
+
+def timed_ms(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def report(name: str, samples):
+    samples = sorted(samples)
+    p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+    print(f"{name:<28} mediana {statistics.median(samples):8.3f} ms   p95 {p95:8.3f} ms")
+
+
+def dialogue_latency(rec: KaldiRecognizer, path: str):
+    """Tempo entre o bloco que fecha a frase e o texto final disponível."""
+    with wave.open(path, "rb") as wf:
+        data = wf.readframes(wf.getnframes())
+    latencies = []
+    for i in range(0, len(data), 4000):
+        if rec.AcceptWaveform(data[i:i + 4000]):
+            t0 = time.perf_counter()
+            json.loads(rec.Result())
+            latencies.append((time.perf_counter() - t0) * 1000)
+    t0 = time.perf_counter()
+    json.loads(rec.FinalResult())
+    latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="model")
+    parser.add_argument("--samplerate", type=int, default=8000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--wav", help="WAV PCM16 mono com uma resposta falada")
+    args = parser.parse_args()
+
+    SetLogLevel(-1)
+    model = Model(args.model)
+    sr = args.samplerate
+
+    report("novo KaldiRecognizer", timed_ms(lambda: KaldiRecognizer(model, sr), args.repeat))
+
+    rec = KaldiRecognizer(model, sr)
+    report("Reset()", timed_ms(rec.Reset, args.repeat))
+
+    pool = RecognizerPool(model, sr, size=1)
+    report("pool.acquire() + release()", timed_ms(lambda: pool.release(pool.acquire()), args.repeat))
+    print("pool:", pool.stats())
+
+    if args.wav:
+        with pool.recognizer() as rec2:
+            report("fim da fala -> resposta", dialogue_latency(rec2, args.wav))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+benchmarks/bench_telemetry.py
+
+Custo da instrumentação (src/core/telemetry.py) por chamada: bloco vazio sem
+instrumentação, com TELEMETRY.span() ligado e desligado, e observe() ligado e
+desligado. Para comparação, um chunk de 250 ms no Vosk leva milissegundos.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_telemetry --calls 1000000
+"""
+
+import argparse
+import time
+
+from src.core.telemetry import Telemetry
+
+
+def per_call_ns(fn, calls: int) -> float:
+    t0 = time.perf_counter()
+    fn(calls)
+    return (time.perf_counter() - t0) / calls * 1e9
+
+
+def bare(calls):
+    for _ in range(calls):
+        pass
+
+
+def spans(telemetry):
+    def run(calls):
+        for _ in range(calls):
+            with telemetry.span("asr_chunk"):
+                pass
+    return run
+
+
+def observes(telemetry):
+    def run(calls):
+        for _ in range(calls):
+            telemetry.observe("asr_chunk", 0.003)
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    on, off = Telemetry(enabled=True), Telemetry(enabled=False)
+    base = per_call_ns(bare, args.calls)
+    print(f"{'caso':<24} {'ns/chamada':>11} {'acima do laço vazio':>20}")
+    print(f"{'laço vazio':<24} {base:>11.0f} {'-':>20}")
+    for name, fn in (("span() desligado", spans(off)), ("span() ligado", spans(on)),
+                     ("observe() desligado", observes(off)), ("observe() ligado", observes(on))):
+        ns = per_call_ns(fn, args.calls)
+        print(f"{name:<24} {ns:>11.0f} {ns - base:>20.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+benchmarks/bench_vad.py
+
+Trim de silêncio e máscara de fala sobre uma hora de áudio sintético:
+loop por frame em Python (implementação anterior) vs. versão vetorizada
+(frame_db / VAD.speech_mask / speech_segments).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_vad --minutes 60 --samplerate 8000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from src.audio.preprocessor import VAD, speech_segments, trim_silence
+
+
+def trim_silence_loop(arr: np.ndarray, sr: int, top_db: float = 20.0) -> np.ndarray:
+    """Implementação anterior de trim_silence (loop por frame), para comparação."""
+    arr_f = arr.astype(np.float32) / 32768.0
+    frame_len = int(0.02 * sr)
+    hop = frame_len
+    rms_frames = []
+    for i in range(0, len(arr_f), hop):
+        frame = arr_f[i:i+frame_len]
+        rms_frames.append(np.sqrt(np.mean(frame**2) + 1e-12) if frame.size else 0.0)
+    rms_db = 20 * np.log10(np.maximum(rms_frames, 1e-12))
+    mask = rms_db > -top_db
+    if not any(mask):
+        return np.array([], dtype=arr.dtype)
+    first = next(i for i, v in enumerate(mask) if v)
+    last = len(mask) - 1 - next(i for i, v in enumerate(reversed(mask)) if v)
+    return (arr_f[first * hop:min(len(arr_f), (last+1)*hop)] * 32767.0).astype(np.int16)
+
+
+def vad_loop(vad: VAD, arr: np.ndarray, frame_len: int) -> np.ndarray:
+    """Decisão de fala frame a frame (como o antigo process_chunk_bytes)."""
+    out = []
+    for start in range(0, len(arr), frame_len):
+        frame = arr[start:start+frame_len]
+        if len(frame) < frame_len:
+            frame = np.concatenate([frame, np.zeros(frame_len - len(frame), dtype=np.int16)])
+        out.append(vad.is_speech(frame))
+    return np.array(out)
+
+
+def synthetic_audio(minutes: float, sr: int) -> np.ndarray:
+    """Alterna 2 s de 'fala' (tom modulado + ruído) com 3 s de ruído de fundo."""
+    rng = np.random.default_rng(0)
+    n = int(minutes * 60 * sr)
+    t = np.arange(n) / sr
+    speech_on = (t % 5.0) < 2.0
+    audio = rng.standard_normal(n).astype(np.float32) * 50
+    audio += speech_on * 6000 * np.sin(2 * np.pi * 220 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t))
+    return audio.astype(np.int16)
+
+
+def timed(fn, *args):
+    t0 = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - t0, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=60.0)
+    parser.add_argument("--samplerate", type=int, default=8000)
+    args = parser.parse_args()
+
+    sr = args.samplerate
+    audio = synthetic_audio(args.minutes, sr)
+    print(f"{args.minutes:.0f} min de áudio sintético @ {sr} Hz ({audio.size} amostras)")
+
+    vad = VAD(sample_rate=sr)
+    vad.vad = None  # compara o caminho por energia, que é o vetorizado
+    frame_len = int(0.03 * sr)
+
+    rows = []
+    t_loop, trimmed_loop = timed(trim_silence_loop, audio, sr)
+    t_vec, trimmed_vec = timed(trim_silence, audio, sr)
+    assert np.array_equal(trimmed_loop, trimmed_vec)
+    rows.append(("trim_silence", t_loop, t_vec))
+
+    t_loop, mask_loop = timed(vad_loop, vad, audio, frame_len)
+    t_vec, mask_vec = timed(vad.speech_mask, audio, frame_len)
+    assert np.array_equal(mask_loop, mask_vec)
+    rows.append(("VAD (30 ms)", t_loop, t_vec))
+
+    t_seg, segments = timed(speech_segments, audio, sr)
+    print(f"speech_segments: {len(segments)} segmentos em {t_seg:.3f} s")
+
+    print(f"{'etapa':>14} {'loop (s)':>10} {'vetor (s)':>10} {'speedup':>8}")
+    for name, t_loop, t_vec in rows:
+        print(f"{name:>14} {t_loop:>10.3f} {t_vec:>10.3f} {t_loop / t_vec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
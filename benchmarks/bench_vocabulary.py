@@ -0,0 +1,95 @@
+"""
+benchmarks/bench_vocabulary.py
+
+Carga do vocabulário (src/nlp/store.py): compilar a fonte (normalizar todos os
+sinônimos e montar a trie) vs. ler o snapshot marshal, e a latência de
+parse_command numa thread enquanto o VocabularyStore recarrega em outra.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_vocabulary --scale 1 10 --reloads 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from src.nlp import nlp
+from src.nlp.store import VocabularyStore, compile_vocabulary
+
+
+def scaled(data: dict, scale: int) -> dict:
+    """Multiplica os dispositivos (cópias com sufixo) para simular casas maiores."""
+    data = json.loads(json.dumps(data))
+    originals = list(data["devices"].items())
+    for i in range(1, scale):
+        for key, syns in originals:
+            data["devices"][f"{key}_copia{i}"] = [f"{s} {i}" for s in syns]
+    return data
+
+
+def timed_ms(fn, repeat: int = 5) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(1000 * (time.perf_counter() - t0))
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--reloads", type=int, default=20)
+    args = parser.parse_args()
+
+    original = nlp.current_vocabulary()
+    base = original.as_dict()
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'escala':>6} {'sinônimos':>10} {'compilar (ms)':>14} {'snapshot (ms)':>14}")
+        for scale in args.scale:
+            path = os.path.join(tmp, f"vocab_{scale}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(scaled(base, scale), f, ensure_ascii=False)
+
+            def cold():
+                os.remove(f"{path}.snapshot")
+                compile_vocabulary(path)
+
+            compile_vocabulary(path)
+            size = compile_vocabulary(path).index.size
+            print(f"{scale:>6} {size:>10} {timed_ms(cold):>14.1f} {timed_ms(lambda: compile_vocabulary(path)):>14.1f}")
+
+        # latência do parser durante reloads forçados (compilação a partir da fonte)
+        path = os.path.join(tmp, f"vocab_{args.scale[-1]}.json")
+        store = VocabularyStore(path, watch_interval_s=None, verbose=False).load()
+        stop = threading.Event()
+        latencies = []
+
+        def parse_loop():
+            i = 0
+            while not stop.is_set():
+                i += 1
+                t0 = time.perf_counter()
+                nlp.parse_command(f"liga a luz da sala {i}")
+                latencies.append(1e6 * (time.perf_counter() - t0))
+
+        thread = threading.Thread(target=parse_loop)
+        thread.start()
+        for _ in range(args.reloads):
+            os.remove(f"{path}.snapshot")
+            store.reload(force=True)
+        stop.set()
+        thread.join()
+        nlp.install_vocabulary(original)
+        latencies.sort()
+        print(f"parse_command durante {args.reloads} reloads: {len(latencies)} chamadas, "
+              f"p50 {latencies[len(latencies) // 2]:.0f} us, p99 {latencies[int(len(latencies) * 0.99)]:.0f} us, "
+              f"máx {latencies[-1] / 1000:.1f} ms; último reload {store.last_reload_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,33 @@ const uint32_t SAMPLE_RATE = 8000; // 8 kHz
 const uint16_t SAMPLES_PER_PACKET = 160;
 const uint16_t BYTES_PER_PACKET   = SAMPLES_PER_PACKET * 2;
 
+// Pacote (little-endian), ver src/audio/serial_protocol.py:
+//   sync 0xA5 0x5A | seq u16 | length u16 | timestamp u32 (micros) | payload | crc u16
+// CRC-16/CCITT-FALSE (poly 0x1021, init 0xFFFF) sobre seq..payload.
+const uint16_t HEADER_BYTES = 10;
+const uint16_t CRC_BYTES    = 2;
+
+uint16_t crc16_update(uint16_t crc, const uint8_t *data, size_t len) {
+  while (len--) {
+    crc ^= (uint16_t)(*data++) << 8;
+    for (uint8_t b = 0; b < 8; b++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : (crc << 1);
+    }
+  }
+  return crc;
+}
+
 void setup() {
   Serial.begin(230400);
   pinMode(MIC_PIN, INPUT);
 }
 
 void loop() {
-  static uint8_t buffer[BYTES_PER_PACKET];
+  static uint8_t packet[HEADER_BYTES + BYTES_PER_PACKET + CRC_BYTES];
+  static uint16_t seq = 0;
+  uint8_t *buffer = packet + HEADER_BYTES;
   const uint32_t us_per_sample = 1000000UL / SAMPLE_RATE;
+  const uint32_t timestamp = micros();
 
   for (uint16_t i = 0; i < SAMPLES_PER_PACKET; i++) {
     uint32_t t0 = micros();
@@ -31,5 +50,21 @@ void loop() {
     }
   }
 
-  Serial.write(buffer, BYTES_PER_PACKET);
+  packet[0] = 0xA5;
+  packet[1] = 0x5A;
+  packet[2] = (uint8_t)(seq & 0xFF);
+  packet[3] = (uint8_t)(seq >> 8);
+  packet[4] = (uint8_t)(BYTES_PER_PACKET & 0xFF);
+  packet[5] = (uint8_t)(BYTES_PER_PACKET >> 8);
+  packet[6] = (uint8_t)(timestamp & 0xFF);
+  packet[7] = (uint8_t)((timestamp >> 8) & 0xFF);
+  packet[8] = (uint8_t)((timestamp >> 16) & 0xFF);
+  packet[9] = (uint8_t)((timestamp >> 24) & 0xFF);
+
+  uint16_t crc = crc16_update(0xFFFF, packet + 2, HEADER_BYTES - 2 + BYTES_PER_PACKET);
+  packet[HEADER_BYTES + BYTES_PER_PACKET]     = (uint8_t)(crc & 0xFF);
+  packet[HEADER_BYTES + BYTES_PER_PACKET + 1] = (uint8_t)(crc >> 8);
+
+  Serial.write(packet, sizeof(packet));
+  seq++;
 }
@@ -1,2 +1,46 @@
-# Por enquanto não trabalhado
-# Estava usando o módulo de teste para trabalhar 
\ No newline at end of file
+"""
+Orquestrador principal: microfone -> Porcupine (KWS) -> Vosk (ASR) -> NLP.
+
+O Vosk só decodifica depois da hotword "Sistema" (ver src/core/pipeline.py).
+Ao encerrar (Ctrl+C), imprime o ciclo de trabalho do ASR e o custo de CPU por
+hora de áudio.
+"""
+
+import json
+
+from src.audio.microphone import AudioInput
+from src.audio.recorder import AudioRecorder
+from src.core.pipeline import HotwordPipeline
+from src.nlp.nlp import parse_command
+from src.recognition.model_manager import ModelManager
+from src.recognition.porcupine_recognizer import PorcupineRecognizer
+from src.recognition.vosk_recognizer import VoskRecognizer
+
+
+def run_voice_assistant():
+    kws = PorcupineRecognizer()
+    model = ModelManager().load_model()
+    pipeline = HotwordPipeline(kws, VoskRecognizer(model))
+
+    audio_input = AudioInput()
+    recorder = AudioRecorder(audio_input)
+
+    print("Diga 'Sistema' seguido do comando (Ctrl+C para parar)")
+    try:
+        with audio_input.start_stream():
+            while True:
+                text = pipeline.feed(recorder.get_next_chunk())
+                if not text:
+                    continue
+                print("→", text)
+                print(json.dumps(parse_command(text), ensure_ascii=False, indent=2))
+    except KeyboardInterrupt:
+        print("\nAssistente encerrado pelo usuário")
+    finally:
+        kws.delete()
+        print("Métricas do pipeline:", json.dumps(pipeline.metrics.report(), indent=2))
+        print("Buffer de áudio:", audio_input.ring.stats())
+
+
+if __name__ == "__main__":
+    run_voice_assistant()
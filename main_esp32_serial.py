@@ -1,202 +1,157 @@
-import json
-import serial
-from vosk import Model, KaldiRecognizer
-
-from src.nlp.nlp import parse_command
-from src.nlp.keys import ACTIONS  # pra reutilizar as listas de palavras
+import argparse
+import asyncio
+
+from src.audio.sources import AudioSource, FramedSource, SerialSource, WavReplaySource
+from src.core.config import CONFIG
+from src.core.dialogue import CONF_MIN
+from src.core.runtime import AsyncRuntime
+from src.core.telemetry import TELEMETRY, MetricsExporter
+from src.model.history import CommandHistory
+from src.model.jsonwriter import CommandLog
+from src.nlp.nlp import cache_stats
+from src.nlp.store import VocabularyStore
+from src.recognition.model_manager import ModelManager
+from src.recognition.recognizer_pool import RecognizerPool
+from src.recognition.vosk_recognizer import VoskRecognizer
 
 # ========= CONFIGURAÇÕES =========
 
 SAMPLE_RATE = 8000
 SERIAL_PORT = "/dev/ttyACM0"   
 BAUD = 230400
+# o firmware envia pacotes com sync/seq/CRC (src/audio/serial_protocol.py);
+# False para o firmware antigo, que mandava PCM cru
+FRAMED = True
 
-# confiança mínima pra levar o comando a sério
-CONF_MIN = 0.4
-
-
-# ========= HELPERS DE NLP / DIÁLOGO =========
 
-def classificar_dispositivo(dispositivo: str) -> str:
-    """Decide o tipo do dispositivo:"""
-    dispositivo = dispositivo or ""
-    if any(p in dispositivo for p in ["porta", "janela", "cortina"]):
-        return "abrir_fechar"
-    return "ligar_desligar"
+# ========= SAÍDA =========
 
+def enviar_comando(nlp_final: dict) -> None:
+    intent = nlp_final.get("intent")
+    entities = nlp_final.get("entities", {})
+    acao = entities.get("acao")
+    dispositivo = entities.get("dispositivo")
 
-def detectar_acao_em_texto(texto: str) -> str | None:
-    if not texto:
-        return None
+    print(f"Intent final: {intent}")
+    print(f"Ação: {acao}")
+    print(f"Dispositivo: {dispositivo}")
+    print("================================================\n")
 
-    t = texto.lower()
+    # >>> Aqui vai o envio pra ESP32 (porta, janela, luz, relé, etc.)
+    # if intent == "controlar_dispositivo" and acao and dispositivo:
+    #     enviar_para_esp32(acao, dispositivo)
 
-    # checa nas listas do keys.py
-    for acao, palavras in ACTIONS.items():
-        for p in palavras:
-            if p in t:
-                return acao
-
-    # fallback pra sim/não (será tratado na função que chama)
-    return None
 
+# ========= PROGRAMA PRINCIPAL =========
 
-def perguntar_acao(dispositivo: str, model: Model, ser: serial.Serial) -> str | None:
+def main(ser: AudioSource | None = None, framed: bool = FRAMED, log: CommandLog | None = None,
+         early_commit: bool | None = None, vocabulary: str | None = None,
+         endpointer: bool | None = None, history: CommandHistory | None = None):
     """
-    Pergunta o que fazer com o dispositivo e espera resposta de voz.
+    `ser` é a fonte de áudio: por padrão a ESP32 em SERIAL_PORT; pode ser uma
+    WavReplaySource para rodar sem hardware (ver --replay). Com `framed`, os
+    pacotes são decodificados (ressincronia, perdas viram silêncio).
+
+    Leitura, Vosk, NLP/diálogo e saída rodam como etapas do AsyncRuntime
+    (src/core/runtime.py): a serial continua sendo lida durante o diálogo.
+    Com `log`, cada comando final também vai para o CommandLog (JSON lines);
+    `history` (ligado ao log) é fechado depois dele, com o último lote gravado.
+    `early_commit` (None = CONFIG) age sobre parciais estáveis do Vosk.
+    O vocabulário (`vocabulary`, padrão CONFIG/keys.py) é recarregado sem
+    reiniciar quando o arquivo muda ou com SIGHUP. Com `endpointer` (None =
+    CONFIG), o Vosk só decodifica as frases delimitadas pelo Endpointer.
     """
-    tipo = classificar_dispositivo(dispositivo)
-
-    if tipo == "abrir_fechar":
-        opcao1, opcao2 = "abrir", "fechar"
-    else:
-        opcao1, opcao2 = "ligar", "desligar"
-
-    print("------------------------------------------------")
-    print(f"O que você deseja fazer com {dispositivo}?")
-    print(f"Diga '{opcao1}' ou '{opcao2}'.")
-    print("Você também pode responder 'sim' para", opcao1, "ou 'não' para cancelar.\n")
-    print("------------------------------------------------")
-
-    while True:
-        rec2 = KaldiRecognizer(model, SAMPLE_RATE)
-
-        # Escuta até formar uma frase
-        while True:
-            data = ser.read(4000)
-            if len(data) == 0:
-                continue
-
-            if rec2.AcceptWaveform(data):
-                res2 = json.loads(rec2.Result())
-                text2 = (res2.get("text") or "").strip()
-                break
-            # se quiser ver parciais, poderia usar rec2.PartialResult()
-
-        print(f"Resposta reconhecida para ação: '{text2}'\n")
-
-        if not text2:
-            print("Não entendi nada, tente novamente...\n")
-            continue
-
-        lower = text2.lower()
-
-        # 1) tenta achar ação explícita (ligar, desligar, abrir, fechar)
-        acao_detectada = detectar_acao_em_texto(lower)
-        if acao_detectada in ["ligar", "desligar", "abrir", "fechar"]:
-            print("Ação escolhida:", acao_detectada)
-            return acao_detectada
-
-        # 2) trata 'sim' / 'não'
-        if "sim" in lower:
-            print("Entendido 'sim' ->", opcao1)
-            return opcao1
-
-        if "nao" in lower or "não" in lower:
-            print("Entendido 'não' -> cancelando comando para esse dispositivo.")
-            return None
-
-        # 3) se chegou aqui, não entendeu
-        print("Não entendi a ação. Por favor, diga claramente", opcao1, "ou", opcao2, "ou 'sim'/'não'.\n")
-
-
-# ========= PROGRAMA PRINCIPAL =========
-
-def main():
-    print("Carregando modelo Vosk...")
-    model = Model("models/vosk-model-small-pt-0.3")
-    rec = KaldiRecognizer(model, SAMPLE_RATE)
-
-    ser = serial.Serial(SERIAL_PORT, BAUD, timeout=1)
-    print(f"Serial aberta em {SERIAL_PORT}")
+    # o modelo carrega em segundo plano enquanto a serial é aberta
+    print("Carregando modelo Vosk em segundo plano...")
+    manager = ModelManager()
+    manager.preload()
+    vocab_store = VocabularyStore(vocabulary).load().start()
+    vocab_store.install_signal_handler()
+
+    if ser is None:
+        ser = SerialSource(SERIAL_PORT, BAUD, timeout=1)
+        print(f"Serial aberta em {SERIAL_PORT}")
+    if framed:
+        ser = FramedSource(ser)
+
+    model = manager.load_model()
+    stats = manager.stats()
+    if stats:
+        resident = stats["resident_bytes"]
+        resident_mb = f"{resident / 2**20:.0f} MB" if resident is not None else "?"
+        print(f"Modelo pronto em {stats['load_seconds']:.2f} s (RSS +{resident_mb})")
+
+    def on_command(nlp_final: dict) -> None:
+        if log is not None:
+            log.save_command(nlp_final)  # só enfileira; a escrita é em lote
+        enviar_comando(nlp_final)
+
+    runtime = AsyncRuntime(
+        ser,
+        VoskRecognizer(model),
+        # reconhecedor do diálogo (gramática mínima), reaproveitado entre perguntas
+        pool=RecognizerPool(model, SAMPLE_RATE, size=1),
+        conf_min=CONF_MIN,
+        on_command=on_command,
+        early_commit=early_commit,
+        endpointer=endpointer,
+    )
+    # latências por estágio e fim da fala -> ação (CONFIG["telemetry"])
+    exporter = MetricsExporter.from_config()
+    ser.reset_input_buffer()  # descarta o áudio acumulado durante o carregamento
     print("Fale perto do microfone...")
 
-    while True:
-        # ~0,25 s de áudio da ESP32
-        data = ser.read(4000)
-        if len(data) == 0:
-            continue
-
-        if rec.AcceptWaveform(data):
-            res = json.loads(rec.Result())
-            text = (res.get("text") or "").strip()
-            if not text:
-                continue
-
-            print("\n================ RECONHECIMENTO ================")
-            print("Texto reconhecido:", text)
-
-            # 1) NLP original do projeto
-            nlp_raw = parse_command(text)
-            print("Resultado NLP (bruto):", nlp_raw)
-
-            intent_raw = nlp_raw.get("intent")
-            entities_raw = nlp_raw.get("entities") or {}
-            acao_raw = entities_raw.get("acao")
-            disp_raw = entities_raw.get("dispositivo")
-            conf_raw = nlp_raw.get("confidence", 0.0)
-
-            # 2) Lógica de diálogo / interação
-
-            # Caso A: confiança muito baixa ou nada reconhecido -> ignora
-            if conf_raw < CONF_MIN and not acao_raw and not disp_raw:
-                print("Confiança muito baixa e sem ação/dispositivo -> ignorando comando.\n")
-                print("================================================\n")
-                continue
-
-            # Caso B: temos ação E dispositivo -> comando pronto
-            if acao_raw and disp_raw and conf_raw >= CONF_MIN:
-                nlp_final = nlp_raw
-
-            # Caso C: só dispositivo (tipo 'microondas', 'televisão', 'porta') -> perguntar ação
-            elif disp_raw and not acao_raw and conf_raw >= CONF_MIN:
-                print("Somente dispositivo reconhecido. Iniciando diálogo para definir ação...\n")
-                acao_escolhida = perguntar_acao(disp_raw, model, ser)
-                if acao_escolhida is None:
-                    nlp_final = {
-                        "intent": "desconhecido",
-                        "entities": {"acao": None, "dispositivo": disp_raw},
-                        "confidence": conf_raw,
-                    }
-                else:
-                    entities_final = dict(entities_raw)
-                    entities_final["acao"] = acao_escolhida
-                    nlp_final = {
-                        "intent": "controlar_dispositivo",
-                        "entities": entities_final,
-                        "confidence": conf_raw,
-                    }
-
-            # Caso D: só ação ou tudo muito confuso -> marca como desconhecido
-            else:
-                nlp_final = {
-                    "intent": "desconhecido",
-                    "entities": {"acao": acao_raw, "dispositivo": disp_raw},
-                    "confidence": conf_raw,
-                }
-
-            print("Resultado NLP (final):", nlp_final)
-
-            intent = nlp_final.get("intent")
-            entities = nlp_final.get("entities", {})
-            acao = entities.get("acao")
-            dispositivo = entities.get("dispositivo")
-
-            print(f"Intent final: {intent}")
-            print(f"Ação: {acao}")
-            print(f"Dispositivo: {dispositivo}")
-            print("================================================\n")
-
-            # >>> Aqui vai o envio pra ESP32 (porta, janela, luz, relé, etc.)
-            # if intent == "controlar_dispositivo" and acao and dispositivo:
-            #     enviar_para_esp32(acao, dispositivo)
-
-        else:
-            parc = json.loads(rec.PartialResult())
-            partial = (parc.get("partial") or "").strip()
-            if partial:
-                print("parcial:", partial)
+    try:
+        asyncio.run(runtime.run())
+    except KeyboardInterrupt:
+        print("\nEncerrado pelo usuário")
+    finally:
+        print("Runtime:", runtime.stats())
+        if TELEMETRY.enabled:
+            print("Latências:", TELEMETRY.snapshot())
+        print("Cache do NLP:", cache_stats()["parse"])
+        if exporter is not None:
+            exporter.close()
+        vocab_store.close()
+        ser.close()
+        if log is not None:
+            log.close()
+            print("Log de comandos:", log.stats())
+        if history is not None:
+            history.close()  # depois do log: o último lote já foi inserido
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Assistente de voz com áudio da ESP32 pela serial.")
+    parser.add_argument("--replay", nargs="+", metavar="WAV",
+                        help="simula a ESP32 reproduzindo estes WAVs (sem hardware)")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = tempo real; 0 = sem ritmo")
+    parser.add_argument("--byte-loss", type=float, default=0.0,
+                        help="(replay) probabilidade de perder um byte por pacote")
+    parser.add_argument("--raw", action="store_true", help="PCM sem pacotes (firmware antigo)")
+    parser.add_argument("--log", nargs="?", const=CONFIG["command_log"]["dir"], metavar="DIR",
+                        help="registra os comandos em JSON lines (padrão: command_logs/)")
+    parser.add_argument("--history", action="store_true",
+                        help="também indexa os comandos no histórico SQLite (implica --log)")
+    parser.add_argument("--early", action="store_true", default=None,
+                        help="executa o comando assim que o parcial do Vosk estabiliza")
+    parser.add_argument("--vocab", metavar="ARQUIVO",
+                        help="vocabulário externo (JSON ou .py como keys.py), recarregado ao mudar ou com SIGHUP")
+    parser.add_argument("--endpointer", action="store_true", default=None,
+                        help="só envia ao Vosk as frases detectadas pelo VAD (pré-roll + fala + silêncio final)")
+    args = parser.parse_args()
+
+    source = None
+    if args.replay:
+        source = WavReplaySource(args.replay, sample_rate=SAMPLE_RATE, baud=BAUD,
+                                 jitter_ms=args.jitter_ms, speed=args.speed,
+                                 framed=not args.raw, byte_loss=args.byte_loss)
+    log = history = None
+    if args.log or args.history:
+        log = CommandLog(args.log)
+        if args.history:
+            history = CommandHistory()
+            history.attach(log)
+    main(source, framed=not args.raw, log=log, early_commit=args.early, vocabulary=args.vocab,
+         endpointer=args.endpointer, history=history)
\ No newline at end of file
@@ -0,0 +1,166 @@
+"""
+src/audio/endpointer.py
+
+Endpointer com estado: transforma um stream de chunks em eventos de frase
+(início / continuação / fim) ou em buffers de frase completos, usando a VAD
+do preprocessor.
+
+Diferente de process_stream_generator (que decide chunk a chunk e descarta os
+"silenciosos"), o endpointer:
+- guarda `preroll_ms` de áudio antes do início da fala, para não cortar o onset;
+- só confirma o início após `min_speech_ms` de fala contínua (ignora estalos);
+- mantém o silêncio final até `trailing_silence_ms`, contexto que o Vosk usa
+  para finalizar a frase;
+- fecha a frase à força em `max_utterance_ms`.
+
+Com isso o reconhecedor só precisa ser alimentado entre START e END.
+Se um AudioPreprocessor for informado, cada chunk passa por process_array
+(use streaming=True) antes da VAD e o áudio dos eventos já sai processado.
+
+    endpointer = Endpointer(sample_rate=8000)
+    for utterance in endpointer.utterances(chunks):
+        text = recognizer.recognize_utterance(utterance)
+"""
+
+from collections import deque
+from typing import Iterable, Iterator, List, Optional
+
+from src.audio.preprocessor import VAD, AudioPreprocessor
+from src.audio.reframer import FrameAdapter
+
+START = "start"
+CONTINUE = "continue"
+END = "end"
+
+
+class SpeechEvent:
+    """Evento de frase: `audio` são os bytes PCM16 novos desde o evento anterior."""
+
+    __slots__ = ("kind", "audio", "start_sample", "end_sample")
+
+    def __init__(self, kind: str, audio: bytes, start_sample: int, end_sample: int):
+        self.kind = kind
+        self.audio = audio
+        self.start_sample = start_sample
+        self.end_sample = end_sample
+
+    def __repr__(self):
+        return (f"SpeechEvent({self.kind!r}, {len(self.audio)} bytes, "
+                f"{self.start_sample}..{self.end_sample})")
+
+
+class Endpointer:
+    def __init__(self,
+                 sample_rate: int = 16000,
+                 vad: Optional[VAD] = None,
+                 frame_ms: int = 30,
+                 preroll_ms: float = 300.0,
+                 min_speech_ms: float = 90.0,
+                 max_utterance_ms: float = 10000.0,
+                 trailing_silence_ms: float = 600.0,
+                 preprocessor: Optional[AudioPreprocessor] = None):
+        self.sample_rate = sample_rate
+        self.preprocessor = preprocessor
+        self.vad = vad or VAD(sample_rate=sample_rate)
+        self.frame_len = int(sample_rate * frame_ms / 1000.0)
+        self._frames = FrameAdapter(vad=self.frame_len)
+        self.preroll_frames = int(preroll_ms // frame_ms)
+        self.min_speech_frames = max(1, int(min_speech_ms // frame_ms))
+        self.max_utterance_frames = int(max_utterance_ms // frame_ms)
+        self.trailing_silence_frames = max(1, int(trailing_silence_ms // frame_ms))
+        self.reset()
+
+    def reset(self) -> None:
+        self._frames.reset()
+        # meia amostra de uma leitura de tamanho ímpar, antes do preprocessor
+        self._odd = b""
+        self._preroll = deque(maxlen=self.preroll_frames + self.min_speech_frames)
+        self._candidate = 0      # frames de fala consecutivos ainda não confirmados
+        self._in_speech = False
+        self._utterance_frames = 0
+        self._silence_run = 0
+        self._sample = 0         # posição absoluta (amostras) do próximo frame
+        self._utterance_start = 0
+        self._emitted_until = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return self._in_speech
+
+    def _frame(self, frame: bytes, speech: bool, events: List[SpeechEvent], pending: List[bytes]) -> None:
+        frame_start = self._sample
+        self._sample += self.frame_len
+
+        if not self._in_speech:
+            self._preroll.append(frame)
+            self._candidate = self._candidate + 1 if speech else 0
+            if self._candidate < self.min_speech_frames:
+                return
+            # início confirmado: pré-roll + frames de fala candidatos
+            audio = b"".join(self._preroll)
+            start = self._sample - len(self._preroll) * self.frame_len
+            self._preroll.clear()
+            self._candidate = 0
+            self._in_speech = True
+            self._utterance_frames = len(audio) // (2 * self.frame_len)
+            self._silence_run = 0
+            self._utterance_start = start
+            self._emitted_until = self._sample
+            events.append(SpeechEvent(START, audio, start, self._sample))
+            return
+
+        pending.append(frame)
+        self._utterance_frames += 1
+        self._silence_run = 0 if speech else self._silence_run + 1
+        if (self._silence_run >= self.trailing_silence_frames
+                or self._utterance_frames >= self.max_utterance_frames):
+            self._flush(pending, events)
+            events.append(SpeechEvent(END, b"", self._utterance_start, frame_start + self.frame_len))
+            self._in_speech = False
+            self._silence_run = 0
+
+    def _flush(self, pending: List[bytes], events: List[SpeechEvent]) -> None:
+        if pending:
+            events.append(SpeechEvent(CONTINUE, b"".join(pending), self._emitted_until, self._sample))
+            self._emitted_until = self._sample
+            pending.clear()
+
+    def push(self, chunk) -> List[SpeechEvent]:
+        """Processa um chunk PCM16 (qualquer tamanho) e retorna os eventos gerados."""
+        events: List[SpeechEvent] = []
+        pending: List[bytes] = []
+        if self.preprocessor is not None:
+            # sem preprocessor o FrameAdapter já guarda o byte ímpar
+            chunk = self._odd + bytes(chunk)
+            even = len(chunk) & ~1
+            self._odd = chunk[even:]
+            if not even:
+                return events
+            chunk = self.preprocessor.process_array(self.preprocessor.bytes_to_np(chunk[:even]))
+        for _, frame in self._frames.push(chunk):
+            self._frame(frame.tobytes(), self.vad.is_speech(frame), events, pending)
+        if self._in_speech:
+            self._flush(pending, events)
+        return events
+
+    def finish(self) -> List[SpeechEvent]:
+        """Fecha a frase em andamento (fim do stream)."""
+        if not self._in_speech:
+            return []
+        self._in_speech = False
+        return [SpeechEvent(END, b"", self._utterance_start, self._sample)]
+
+    def events(self, chunks: Iterable) -> Iterator[SpeechEvent]:
+        for chunk in chunks:
+            yield from self.push(chunk)
+        yield from self.finish()
+
+    def utterances(self, chunks: Iterable) -> Iterator[bytes]:
+        """Gera buffers PCM16 com frases completas (pré-roll + fala + silêncio final)."""
+        parts: List[bytes] = []
+        for event in self.events(chunks):
+            if event.kind == END:
+                yield b"".join(parts)
+                parts = []
+            else:
+                parts.append(event.audio)
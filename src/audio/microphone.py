@@ -1,17 +1,21 @@
 from ..core.config import CONFIG
+from .ring_buffer import RingBuffer
 import sounddevice as sd
-import queue
-import sys
 
 class AudioInput:
     def __init__(self):
-        self.q = queue.Queue()
         self.samplerate = CONFIG["audio"]["samplerate"]
         self.blocksize = CONFIG["audio"]["blocksize"]
         self.device = CONFIG["audio"]["device"]
+        # buffer circular pré-alocado: o callback só copia as amostras para o anel
+        self.ring = RingBuffer.from_seconds(
+            CONFIG["audio"]["buffer_seconds"],
+            self.samplerate,
+            policy=CONFIG["audio"]["overflow_policy"],
+        )
 
     def _callback(self, indata, frames, time, status):
-        self.q.put(bytes(indata))
+        self.ring.write(indata)
 
     def start_stream(self):
         return sd.RawInputStream(
@@ -11,8 +11,10 @@ Responsabilidades:
 - Redução de ruído (usa noisereduce se disponível)
 - Filtro passa-faixa (bandpass)
 - VAD (webrtcvad se disponível, caso contrário energy-based)
-- Trim de silêncio / segmentação
+- Trim de silêncio / segmentação (vetorizados: energias, dB e máscaras de fala
+  de todos os frames em uma única passada NumPy, com hangover/histerese)
 - AGC (ganho automático simples)
+- Modo streaming: filtro projetado uma vez (SOS) com estado entre chunks e AGC suavizado
 - Funções utilitárias para processamento de chunks/streams
 
 Integra com core.config.CONFIG (usa samplerate/defaults)
@@ -36,7 +38,7 @@ except Exception:
 
 try:
     # prefer scipy for filtering/resampling
-    from scipy.signal import butter, lfilter, resample
+    from scipy.signal import butter, lfilter, resample, sosfilt
     _HAS_SCIPY = True
 except Exception:
     _HAS_SCIPY = False
@@ -101,6 +103,43 @@ def apply_bandpass(data: np.ndarray, lowcut: float, highcut: float, fs: int, ord
     return lfilter(b, a, data)
 
 
+def butter_bandpass_sos(lowcut, highcut, fs, order=5):
+    """
+    Projeta o passa-faixa como seções de segunda ordem (numericamente estável).
+    Se highcut >= Nyquist (ex.: 8000 Hz com fs=8000), projeta apenas o passa-altas.
+    """
+    if not _HAS_SCIPY:
+        raise RuntimeError("scipy is required for bandpass filter")
+    nyq = 0.5 * fs
+    low = lowcut / nyq
+    high = highcut / nyq
+    if high >= 1.0:
+        return butter(order, low, btype='high', output='sos')
+    return butter(order, [low, high], btype='band', output='sos')
+
+
+class StreamingBandpass:
+    """
+    Passa-faixa para processamento em blocos: o filtro é projetado uma única vez
+    e o estado interno (zi) é carregado de um chunk para o próximo, então a saída
+    em blocos é igual à filtragem do sinal inteiro, sem transientes nas bordas.
+    Sem scipy o sinal passa sem filtro, como em apply_bandpass.
+    """
+    def __init__(self, lowcut: float, highcut: float, fs: int, order: int = 5):
+        self.sos = butter_bandpass_sos(lowcut, highcut, fs, order=order) if _HAS_SCIPY else None
+        self.reset()
+
+    def reset(self):
+        self.zi = np.zeros((self.sos.shape[0], 2)) if self.sos is not None else None
+
+    def process(self, data: np.ndarray) -> np.ndarray:
+        if self.sos is None:
+            # fallback: no filtering
+            return data
+        out, self.zi = sosfilt(self.sos, data, zi=self.zi)
+        return out
+
+
 def resample_array(data: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
     if orig_sr == target_sr:
         return data
@@ -144,6 +183,44 @@ def simple_agc(arr: np.ndarray, target_level=0.1):
     return normalize_rms(arr, target_rms=target_level)
 
 
+class SmoothedAGC:
+    """
+    AGC para streaming: o nível RMS é acompanhado por uma média exponencial com
+    constantes de ataque/liberação, e o ganho é interpolado linearmente ao longo
+    de cada chunk, evitando saltos de ganho entre blocos.
+    Opera em float (-1..1).
+    """
+    def __init__(self, sample_rate: int, target_rms: float = 0.1, attack_ms: float = 20.0,
+                 release_ms: float = 500.0, max_gain: float = 30.0, floor_rms: float = 1e-4):
+        self.sample_rate = sample_rate
+        self.target_rms = target_rms
+        self.attack_s = attack_ms / 1000.0
+        self.release_s = release_ms / 1000.0
+        self.max_gain = max_gain
+        self.floor_ms = floor_rms ** 2
+        self.reset()
+
+    def reset(self):
+        self.level_ms = None  # média quadrática suavizada
+        self.gain = None
+
+    def process(self, arr_f: np.ndarray) -> np.ndarray:
+        if arr_f.size == 0:
+            return arr_f
+        ms = float(np.mean(arr_f ** 2))
+        if self.level_ms is None:
+            self.level_ms = ms
+        else:
+            tau = self.attack_s if ms > self.level_ms else self.release_s
+            alpha = 1.0 - np.exp(-(arr_f.size / self.sample_rate) / tau)
+            self.level_ms += alpha * (ms - self.level_ms)
+        new_gain = min(self.max_gain, self.target_rms / np.sqrt(max(self.level_ms, self.floor_ms)))
+        start_gain = new_gain if self.gain is None else self.gain
+        self.gain = new_gain
+        ramp = np.linspace(start_gain, new_gain, arr_f.size, endpoint=False)
+        return np.clip(arr_f * ramp, -1.0, 1.0)
+
+
 # ---------- noise reduction ----------
 def reduce_noise_array(arr: np.ndarray, sr: int) -> np.ndarray:
     """Applies noise reduction. Uses noisereduce if available; otherwise returns arr."""
@@ -158,6 +235,106 @@ def reduce_noise_array(arr: np.ndarray, sr: int) -> np.ndarray:
         return arr
 
 
+# ---------- vectorized framing / energies ----------
+def frame_view(arr: np.ndarray, frame_len: int, hop: Optional[int] = None) -> np.ndarray:
+    """
+    View 2D (n_frames, frame_len) dos frames completos de `arr`, sem cópia
+    (stride tricks). Frames parciais no final não são incluídos.
+    """
+    hop = hop or frame_len
+    if arr.size < frame_len:
+        return arr[:0].reshape(0, frame_len)
+    return np.lib.stride_tricks.sliding_window_view(arr, frame_len)[::hop]
+
+
+def frame_mean_square(arr: np.ndarray, frame_len: int, hop: Optional[int] = None) -> np.ndarray:
+    """
+    Média quadrática de cada frame iniciado em 0, hop, 2*hop, ... < len(arr) (como um loop
+    `for i in range(0, len(arr), hop)`): frames parciais no final usam apenas
+    as amostras existentes. `arr` em float (-1..1) ou int.
+    """
+    hop = hop or frame_len
+    x = np.asarray(arr, dtype=np.float64)
+    n = x.size
+    if n == 0:
+        return np.zeros(0)
+    full = frame_view(x, frame_len, hop)
+    ms_full = np.einsum("ij,ij->i", full, full) / frame_len
+    # frames parciais do final: soma acumulada só da cauda
+    starts = np.arange(full.shape[0] * hop, n, hop)
+    if starts.size == 0:
+        return ms_full
+    tail = x[starts[0]:]
+    cs = np.concatenate(([0.0], np.cumsum(tail * tail)))
+    rel = starts - starts[0]
+    ms_tail = (cs[-1] - cs[rel]) / (n - starts)
+    return np.concatenate((ms_full, ms_tail))
+
+
+def frame_rms(arr: np.ndarray, frame_len: int, hop: Optional[int] = None) -> np.ndarray:
+    """RMS de cada frame (ver frame_mean_square)."""
+    return np.sqrt(frame_mean_square(arr, frame_len, hop))
+
+
+def frame_db(arr: np.ndarray, frame_len: int, hop: Optional[int] = None) -> np.ndarray:
+    """Nível de cada frame em dBFS (arr em float -1..1), com piso de -120 dB."""
+    return 10 * np.log10(frame_mean_square(arr, frame_len, hop) + 1e-12)
+
+
+def hangover_mask(mask: np.ndarray, hangover_frames: int) -> np.ndarray:
+    """Mantém a fala ativa por `hangover_frames` frames após cada frame de fala."""
+    if hangover_frames <= 0 or mask.size == 0:
+        return mask.astype(bool)
+    window = np.ones(hangover_frames + 1, dtype=np.int32)
+    return np.convolve(mask.astype(np.int32), window)[:mask.size] > 0
+
+
+def hysteresis_mask(values: np.ndarray, high: float, low: float) -> np.ndarray:
+    """
+    Limiar com histerese: um trecho contínuo acima de `low` é fala apenas se
+    contiver ao menos um frame acima de `high`.
+    """
+    above_low = values > low
+    if not above_low.any():
+        return above_low
+    above_high = values > high
+    prev = np.concatenate(([False], above_low[:-1]))
+    nxt = np.concatenate((above_low[1:], [False]))
+    starts = np.flatnonzero(above_low & ~prev)
+    ends = np.flatnonzero(above_low & ~nxt) + 1
+    keep = np.logical_or.reduceat(above_high, starts)
+    edges = np.zeros(values.size + 1, dtype=np.int32)
+    np.add.at(edges, starts[keep], 1)
+    np.add.at(edges, ends[keep], -1)
+    return np.cumsum(edges[:-1]) > 0
+
+
+def mask_to_segments(mask: np.ndarray, hop: int, frame_len: int, n_samples: int) -> np.ndarray:
+    """Converte uma máscara por frame em limites (início, fim) em amostras, shape (k, 2)."""
+    m = mask.astype(np.int8)
+    diff = np.diff(np.concatenate(([0], m, [0])))
+    first = np.flatnonzero(diff == 1)
+    last = np.flatnonzero(diff == -1) - 1
+    bounds = np.stack((first * hop, np.minimum(last * hop + frame_len, n_samples)), axis=1)
+    return bounds.astype(np.int64)
+
+
+def speech_segments(arr: np.ndarray, sr: int, frame_ms: float = 20.0,
+                    threshold_db: float = -35.0, hysteresis_db: float = 6.0,
+                    hangover_ms: float = 200.0) -> np.ndarray:
+    """
+    Segmentos de fala (início, fim) em amostras, calculados em uma passada:
+    energia por frame -> dBFS -> histerese (entra acima de threshold_db, sai
+    abaixo de threshold_db - hysteresis_db) -> hangover.
+    """
+    frame_len = int(frame_ms / 1000.0 * sr)
+    arr_f = arr.astype(np.float32) / 32768.0 if arr.dtype.kind == 'i' else arr
+    db = frame_db(arr_f, frame_len)
+    mask = hysteresis_mask(db, threshold_db, threshold_db - hysteresis_db)
+    mask = hangover_mask(mask, int(round(hangover_ms / frame_ms)))
+    return mask_to_segments(mask, frame_len, frame_len, arr.size)
+
+
 # ---------- VAD (webrtcvad or energy) ----------
 class VAD:
     """Wrapper VAD: prefer webrtcvad, fallback to energy-based VAD."""
@@ -187,30 +364,40 @@ class VAD:
         # fallback: energy-based
         return np.abs(chunk_int16).mean() > self.energy_threshold
 
+    def speech_mask(self, arr_int16: np.ndarray, frame_len: int) -> np.ndarray:
+        """
+        Decisão de fala para todos os frames de `frame_len` amostras (o último é
+        completado com zeros). Sem webrtcvad, a energia de todos os frames é
+        calculada de uma vez, sem loop em Python.
+        """
+        n_frames = -(-arr_int16.size // frame_len)
+        if n_frames == 0:
+            return np.zeros(0, dtype=bool)
+        padded = arr_int16
+        if arr_int16.size % frame_len:
+            padded = np.zeros(n_frames * frame_len, dtype=np.int16)
+            padded[:arr_int16.size] = arr_int16
+        frames = padded.reshape(n_frames, frame_len)
+        if self.vad is not None:
+            return np.array([self.is_speech(f) for f in frames], dtype=bool)
+        return np.abs(frames.astype(np.int32)).mean(axis=1) > self.energy_threshold
+
 
 # ---------- trimming / segmentation ----------
 def trim_silence(arr: np.ndarray, sr: int, top_db: float = 20.0) -> np.ndarray:
     """
     Very simple silence trimming: remove leading/trailing samples where RMS (in dB) below threshold.
     This is not as robust as librosa.effects.trim but avoids dependency.
+    Energias de todos os frames de 20 ms são calculadas de uma vez (frame_db).
     """
     arr_f = arr.astype(np.float32) / 32768.0
     frame_len = int(0.02 * sr)  # 20 ms frames
     hop = frame_len
-    rms_frames = []
-    for i in range(0, len(arr_f), hop):
-        frame = arr_f[i:i+frame_len]
-        if frame.size == 0:
-            rms_frames.append(0.0)
-        else:
-            rms_frames.append(np.sqrt(np.mean(frame**2) + 1e-12))
-    rms_db = 20 * np.log10(np.maximum(rms_frames, 1e-12))
-    # frames above -top_db
-    mask = rms_db > -top_db
-    if not any(mask):
+    mask = frame_db(arr_f, frame_len, hop) > -top_db
+    if not mask.any():
         return np.array([], dtype=arr.dtype)
-    first = next(i for i, v in enumerate(mask) if v)
-    last = len(mask) - 1 - next(i for i, v in enumerate(reversed(mask)) if v)
+    first = int(np.argmax(mask))
+    last = mask.size - 1 - int(np.argmax(mask[::-1]))
     start_sample = first * hop
     end_sample = min(len(arr_f), (last+1)*hop)
     return (arr_f[start_sample:end_sample] * 32767.0).astype(np.int16)
@@ -235,6 +422,11 @@ class AudioPreprocessor:
         pre = AudioPreprocessor()
         processed_bytes = pre.process_chunk_bytes(raw_bytes)
         # processed_bytes -> bytes PCM16 mono sample_rate (CONFIG["audio"]["samplerate"])
+
+    Com streaming=True o passa-faixa é projetado uma vez e mantém estado entre
+    chunks, a normalização/AGC usa um nível RMS suavizado (SmoothedAGC) e o trim
+    de silêncio por chunk é desativado para não quebrar a continuidade do sinal.
+    Chame reset_stream() ao trocar de fonte/stream.
     """
 
     def __init__(self,
@@ -247,7 +439,8 @@ class AudioPreprocessor:
                  vad_mode: int = 1,
                  vad_energy_threshold: float = 500.0,
                  normalize_mode: str = "rms",  # 'peak' or 'rms' or None
-                 agc: bool = True):
+                 agc: bool = True,
+                 streaming: bool = False):
         self.sample_rate = sample_rate or _CFG["audio"].get("samplerate", 16000)
         self.do_resample = do_resample
         self.do_noise_reduction = do_noise_reduction and _HAS_NOISEREDUCE
@@ -257,6 +450,21 @@ class AudioPreprocessor:
         self.vad = VAD(sample_rate=self.sample_rate, mode=vad_mode, energy_threshold=vad_energy_threshold)
         self.normalize_mode = normalize_mode
         self.agc = agc
+        self.streaming = streaming
+        self._bandpass = None
+        self._smoothed_agc = None
+        if streaming:
+            if self.do_bandpass:
+                self._bandpass = StreamingBandpass(self.lowcut, self.highcut, self.sample_rate)
+            if normalize_mode or agc:
+                self._smoothed_agc = SmoothedAGC(self.sample_rate)
+
+    def reset_stream(self):
+        """Zera o estado do filtro e do AGC do modo streaming."""
+        if self._bandpass is not None:
+            self._bandpass.reset()
+        if self._smoothed_agc is not None:
+            self._smoothed_agc.reset()
 
     def bytes_to_np(self, b: bytes, dtype=np.int16) -> np.ndarray:
         return np.frombuffer(b, dtype=dtype)
@@ -291,6 +499,9 @@ class AudioPreprocessor:
         if orig_sr != self.sample_rate and self.do_resample:
             arr_int16 = resample_array(arr_int16, orig_sr, self.sample_rate).astype(np.int16)
 
+        if self.streaming:
+            return self._process_streaming(arr_int16)
+
         # Bandpass filter
         if self.do_bandpass:
             try:
@@ -316,6 +527,21 @@ class AudioPreprocessor:
 
         return arr_int16.astype(np.int16)
 
+    def _process_streaming(self, arr_int16: np.ndarray) -> np.ndarray:
+        """Caminho com estado entre chunks (ver StreamingBandpass / SmoothedAGC)."""
+        arr_f = arr_int16.astype(np.float64)
+        if self._bandpass is not None:
+            arr_f = self._bandpass.process(arr_f)
+        if self.do_noise_reduction:
+            try:
+                arr_f = reduce_noise_array(np.clip(arr_f, -32768, 32767).astype(np.int16),
+                                           self.sample_rate).astype(np.float64)
+            except Exception:
+                pass
+        if self._smoothed_agc is not None:
+            arr_f = self._smoothed_agc.process(arr_f / 32768.0) * 32767.0
+        return np.clip(np.round(arr_f), -32768, 32767).astype(np.int16)
+
     def process_chunk_bytes(self, chunk_bytes: bytes, orig_sr: int = None) -> Optional[bytes]:
         """
         Recebe chunk em bytes (esperado PCM16 little-endian interleaved or mono),
@@ -340,21 +566,15 @@ class AudioPreprocessor:
         # VAD: split in small frames and check voice
         frame_ms = 30  # 10/20/30 ms frames recommended by webrtcvad
         frame_len = int(self.sample_rate * (frame_ms / 1000.0))
-        has_voice = False
-        for start in range(0, len(arr_proc), frame_len):
-            frame = arr_proc[start:start+frame_len]
-            if len(frame) < frame_len:
-                # pad
-                pad = np.zeros(frame_len - len(frame), dtype=np.int16)
-                frame = np.concatenate([frame, pad])
-            if self.vad.is_speech(frame):
-                has_voice = True
-                break
+        has_voice = bool(self.vad.speech_mask(arr_proc, frame_len).any())
 
         if not has_voice:
             # silence -> skip
             return None
 
+        if self.streaming:
+            return int16_array_to_bytes(arr_proc)
+
         # optional trim silence on edges (coarse)
         arr_trimmed = trim_silence(arr_proc, self.sample_rate, top_db=20.0)
         if arr_trimmed.size == 0:
@@ -364,10 +584,11 @@ class AudioPreprocessor:
 
     def process_stream_generator(self, chunk_bytes_iterable, orig_sr: int = None):
         """
-        Recebe um iterável de chunk_bytes (por exemplo a fila do AudioInput.q)
+        Recebe um iterável de chunk_bytes (por exemplo blocos lidos do AudioRecorder)
         e produz chunks processados (bytes) prontos para enviar ao recognizer.
         Use:
-            for processed in pre.process_stream_generator(audio_input.q):
+            chunks = iter(recorder.get_next_chunk, None)
+            for processed in pre.process_stream_generator(chunks):
                 if processed:
                     recognizer.AcceptWaveform(processed)
         """
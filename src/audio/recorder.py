@@ -1,8 +1,13 @@
+from typing import Optional
 from .microphone import AudioInput
 
 class AudioRecorder:
     def __init__(self, audio_input: AudioInput):
         self.audio_input = audio_input
 
-    def get_next_chunk(self):
-        return self.audio_input.q.get()
\ No newline at end of file
+    def get_next_chunk(self, frames: Optional[int] = None, timeout: Optional[float] = None) -> Optional[memoryview]:
+        """
+        Lê `frames` amostras (padrão: blocksize) do buffer circular do microfone.
+        Retorna uma memoryview PCM16 sem cópia, ou None se `timeout` expirar.
+        """
+        return self.audio_input.ring.read(frames or self.audio_input.blocksize, timeout=timeout)
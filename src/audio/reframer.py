@@ -0,0 +1,76 @@
+"""
+src/audio/reframer.py
+
+Adaptador de tamanho de frame: recebe PCM16 em blocos de qualquer tamanho
+(160 amostras da ESP32, 4000 bytes da serial, blocksize do microfone...) e
+emite frames de tamanho exato para cada destino configurado, na mesma passada:
+
+    adapter = FrameAdapter(kws=512, asr=2000)
+    for name, frame in adapter.push(raw_bytes):
+        if name == "kws":
+            porcupine.process(frame)
+        else:
+            vosk.AcceptWaveform(frame.tobytes())
+
+Cada destino tem um acumulador int16 pré-alocado; a entrada é copiada por
+fatias diretamente para os acumuladores, sem concatenações por chunk. Os frames
+são emitidos em ordem temporal. Entradas em bytes podem ter tamanho ímpar (leitura
+da serial interrompida por timeout): o byte que sobra fica guardado e completa a
+amostra no próximo push. O array emitido é uma view do acumulador e só
+é válido até a próxima iteração: copie-o (ex.: .tobytes()) se precisar guardá-lo.
+"""
+
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+
+class FrameAdapter:
+    def __init__(self, **frame_sizes: int):
+        if not frame_sizes:
+            raise ValueError("Informe ao menos um tamanho de frame (ex.: kws=512)")
+        for name, size in frame_sizes.items():
+            if size <= 0:
+                raise ValueError(f"Tamanho de frame inválido para '{name}': {size}")
+        self.frame_sizes: Dict[str, int] = dict(frame_sizes)
+        self._buffers = {name: np.empty(size, dtype=np.int16) for name, size in frame_sizes.items()}
+        self._fill = {name: 0 for name in frame_sizes}
+        # meia amostra do último push em bytes (b"" ou 1 byte)
+        self._odd = b""
+
+    def reset(self, name: str = None) -> None:
+        """Descarta as amostras acumuladas (de um destino ou de todos)."""
+        for key in ([name] if name else self._fill):
+            self._fill[key] = 0
+        if not name:
+            self._odd = b""
+
+    def pending(self, name: str) -> int:
+        """Amostras acumuladas ainda sem formar um frame completo."""
+        return self._fill[name]
+
+    def push(self, data) -> Iterator[Tuple[str, np.ndarray]]:
+        """Acrescenta amostras (bytes/memoryview/array int16) e gera os frames completos."""
+        if isinstance(data, np.ndarray):
+            samples = data
+        else:
+            data = memoryview(data).cast("B")
+            if self._odd:
+                data = memoryview(self._odd + data)
+            self._odd = bytes(data[-1:]) if len(data) % 2 else b""
+            samples = np.frombuffer(data[:len(data) - len(self._odd)], dtype=np.int16)
+        pos = 0
+        total = samples.size
+        while pos < total:
+            # avança até o próximo ponto em que algum destino completa um frame
+            step = min(total - pos, min(self.frame_sizes[n] - self._fill[n] for n in self.frame_sizes))
+            segment = samples[pos:pos + step]
+            pos += step
+            for name, buf in self._buffers.items():
+                fill = self._fill[name]
+                buf[fill:fill + step] = segment
+                self._fill[name] = fill + step
+            for name, buf in self._buffers.items():
+                if self._fill[name] == buf.size:
+                    self._fill[name] = 0
+                    yield name, buf
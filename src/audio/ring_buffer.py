@@ -0,0 +1,142 @@
+"""
+src/audio/ring_buffer.py
+
+Buffer circular pré-alocado (NumPy int16) entre o callback do sounddevice e os
+consumidores (AudioRecorder, reconhecedores).
+
+- Capacidade fixa (em amostras), definida a partir de segundos de áudio.
+- Armazenamento "espelhado": cada amostra é gravada em i e i + capacidade, de
+  modo que qualquer janela de até `capacity` amostras é contígua na memória e
+  pode ser entregue como memoryview, sem cópia, mesmo cruzando o fim do anel.
+- Política de estouro: "drop_oldest" descarta o áudio mais antigo (adequado ao
+  callback de áudio, que não pode bloquear); "block" faz o produtor esperar por
+  espaço até `write_timeout` e descarta o bloco novo se o tempo acabar.
+- Contadores explícitos de overrun (amostras descartadas) e underrun (leituras
+  que expiraram sem dados suficientes).
+
+Um produtor e um consumidor. A janela lida só é sobrescrita depois que o
+produtor escreve mais `capacity - frames - atraso` amostras, em que atraso é o
+que ainda ficou no anel após a leitura. Sem atraso, read() devolve uma
+memoryview sem cópia, válida por `capacity - frames` amostras (consuma-a antes
+de pedir o próximo bloco); com o consumidor atrasado essa margem pode ser
+quase nula, então read() devolve uma cópia.
+"""
+
+import threading
+from typing import Optional
+
+import numpy as np
+
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+
+
+class RingBuffer:
+    def __init__(self, capacity: int, policy: str = DROP_OLDEST, write_timeout: Optional[float] = None):
+        if capacity <= 0:
+            raise ValueError("capacity deve ser positiva")
+        if policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Política de estouro desconhecida: {policy}")
+        self.capacity = capacity
+        self.policy = policy
+        self.write_timeout = write_timeout
+        self._data = np.zeros(2 * capacity, dtype=np.int16)
+        # posições absolutas (monotônicas) de escrita e leitura, em amostras
+        self._write_pos = 0
+        self._read_pos = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self.overruns = 0   # amostras descartadas por falta de espaço
+        self.underruns = 0  # leituras que expiraram sem dados suficientes
+
+    @classmethod
+    def from_seconds(cls, seconds: float, samplerate: int, **kwargs) -> "RingBuffer":
+        return cls(int(seconds * samplerate), **kwargs)
+
+    @property
+    def available(self) -> int:
+        """Amostras prontas para leitura."""
+        return self._write_pos - self._read_pos
+
+    def _store(self, samples: np.ndarray) -> None:
+        cap = self.capacity
+        start = self._write_pos % cap
+        end = start + samples.size
+        self._data[start:end] = samples
+        # espelho: a parte em [start, cap) vai para +cap, a parte em [cap, end) vai para -cap
+        head = min(end, cap)
+        if head > start:
+            self._data[start + cap:head + cap] = samples[:head - start]
+        if end > cap:
+            self._data[0:end - cap] = samples[cap - start:]
+
+    def write(self, data) -> int:
+        """
+        Grava amostras PCM16 (bytes, buffer do sounddevice ou array int16).
+        Retorna o número de amostras efetivamente gravadas.
+        """
+        samples = np.frombuffer(data, dtype=np.int16) if not isinstance(data, np.ndarray) else data
+        with self._cond:
+            if samples.size > self.capacity:
+                # bloco maior que o anel: só as últimas `capacity` amostras cabem
+                self.overruns += samples.size - self.capacity
+                samples = samples[-self.capacity:]
+            free = self.capacity - self.available
+            if samples.size > free:
+                if self.policy == BLOCK:
+                    self._cond.wait_for(lambda: self.capacity - self.available >= samples.size or self._closed,
+                                        timeout=self.write_timeout)
+                    if self.capacity - self.available < samples.size:
+                        self.overruns += samples.size
+                        return 0
+                else:
+                    dropped = samples.size - free
+                    self._read_pos += dropped
+                    self.overruns += dropped
+            self._store(samples)
+            self._write_pos += samples.size
+            self._cond.notify_all()
+        return samples.size
+
+    def read(self, frames: int, timeout: Optional[float] = None) -> Optional[memoryview]:
+        """
+        Retorna uma memoryview (bytes PCM16) com exatamente `frames` amostras,
+        esperando até `timeout` segundos (None = indefinidamente).
+        Retorna None se o tempo acabar ou o buffer for fechado.
+        """
+        if frames > self.capacity:
+            raise ValueError(f"frames ({frames}) maior que a capacidade ({self.capacity})")
+        with self._cond:
+            if self.available < frames:
+                self._cond.wait_for(lambda: self.available >= frames or self._closed, timeout=timeout)
+                if self.available < frames:
+                    self.underruns += 1
+                    return None
+            start = self._read_pos % self.capacity
+            self._read_pos += frames
+            window = self._data[start:start + frames]
+            if self.available:
+                # consumidor atrasado: o produtor pode alcançar a janela logo
+                window = window.copy()
+            self._cond.notify_all()
+        return window.data.cast("B")
+
+    def clear(self) -> None:
+        """Descarta tudo o que ainda não foi lido."""
+        with self._cond:
+            self._read_pos = self._write_pos
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        """Acorda produtor/consumidor bloqueados; leituras pendentes retornam None."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "available": self.available,
+            "overruns": self.overruns,
+            "underruns": self.underruns,
+        }
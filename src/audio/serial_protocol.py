@@ -0,0 +1,216 @@
+"""
+src/audio/serial_protocol.py
+
+Protocolo de pacotes da serial ESP32 -> host (esp32_stream_ky037.ino).
+
+Formato (little-endian):
+
+    offset  tamanho  campo
+    0       2        sync      0xA5 0x5A
+    2       2        seq       contador de pacotes (u16, dá a volta em 65535)
+    4       2        length    bytes de payload (PCM16 mono)
+    6       4        timestamp micros() da ESP32 na primeira amostra (u32)
+    10      length   payload
+    10+len  2        crc       CRC-16/CCITT-FALSE (binascii.crc_hqx, init 0xFFFF)
+                               sobre seq..payload
+
+O PacketDecoder recebe bytes em blocos de qualquer tamanho, ressincroniza
+procurando o sync (bytearray.find, O(n)) quando o cabeçalho ou o CRC não
+conferem, e devolve a linha do tempo PCM:
+
+- pacotes perdidos (salto de seq) viram silêncio do mesmo tamanho, para que
+  o tempo visto pelo reconhecedor continue correto;
+- pacotes atrasados/duplicados (seq já passado) são descartados e contados
+  como reordenados;
+- reinício da ESP32 (seq volta a 0): detectado pelo timestamp voltando mais de
+  `restart_backwards_s` ou por `resync_after_late` pacotes "atrasados"
+  seguidos; a sequência é realinhada (resyncs) em vez de descartar todo o
+  áudio até o seq novo passar o antigo;
+- a latência é relativa: host - timestamp da ESP32, menos o menor valor já
+  visto (os relógios não são sincronizados, então mede o atraso acima do
+  melhor caso, isto é, o jitter acumulado no caminho).
+
+Os cabeçalhos e o CRC são lidos direto do buffer (struct.unpack_from e
+memoryview), sem fatiar; o buffer é compactado uma vez por chamada.
+"""
+
+import binascii
+import struct
+import time
+from typing import Optional
+
+SYNC = b"\xa5\x5a"
+HEADER = struct.Struct("<2sHHI")
+CRC = struct.Struct("<H")
+OVERHEAD = HEADER.size + CRC.size
+CRC_INIT = 0xFFFF
+
+
+def crc16(data) -> int:
+    return binascii.crc_hqx(data, CRC_INIT)
+
+
+def encode_packet(seq: int, payload: bytes, timestamp_us: int = 0) -> bytes:
+    """Codificador de referência (mesmo formato do firmware)."""
+    header = HEADER.pack(SYNC, seq & 0xFFFF, len(payload), timestamp_us & 0xFFFFFFFF)
+    return header + payload + CRC.pack(crc16(header[2:] + payload))
+
+
+class PacketDecoder:
+    def __init__(self, max_payload: int = 2048, max_gap_packets: int = 100, zero_fill: bool = True,
+                 resync_after_late: int = 8, restart_backwards_s: float = 1.0):
+        """
+        max_payload: maior payload aceito; cabeçalhos acima disso são sync falso.
+        max_gap_packets: saltos de seq maiores são tratados como reinício da
+            ESP32 (sem preenchimento), e não como perda.
+        resync_after_late: pacotes "atrasados" seguidos que indicam reinício
+            da ESP32 (seq recomeçou abaixo do esperado).
+        restart_backwards_s: um pacote atrasado com timestamp recuado mais que
+            isso é reinício (um atraso real é de poucos pacotes).
+        """
+        self.max_payload = max_payload
+        self.max_gap_packets = max_gap_packets
+        self.zero_fill = zero_fill
+        self.resync_after_late = resync_after_late
+        self.restart_backwards_us = int(restart_backwards_s * 1e6)
+        self._late_run = 0
+        self._buffer = bytearray()
+        self.reset_counters()
+        self._expected_seq: Optional[int] = None
+        self._last_length = 0
+        self._min_offset: Optional[float] = None
+        self._last_ts: Optional[int] = None
+        self._ts_wraps = 0
+
+    def reset_counters(self) -> None:
+        self.packets = 0
+        self.dropped_packets = 0
+        self.zero_filled_bytes = 0
+        self.reordered = 0
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+        self.restarts = 0
+        self.resyncs = 0
+        self.max_latency = 0.0
+        self._latency_sum = 0.0
+
+    def reset(self) -> None:
+        """Descarta bytes pendentes e o estado de sequência (ex.: ao reabrir a porta)."""
+        self._buffer.clear()
+        self._expected_seq = None
+        self._late_run = 0
+        self._new_clock()
+
+    def _new_clock(self) -> None:
+        """A ESP32 reiniciou: micros() recomeça, então a referência de latência também."""
+        self._last_ts = None
+        self._ts_wraps = 0
+        self._min_offset = None
+
+    def _restarted(self, timestamp_us: int) -> bool:
+        """Pacote com seq "no passado": reinício da ESP32 ou só um atraso?"""
+        self._late_run += 1
+        if self._late_run >= self.resync_after_late:
+            return True
+        if self._last_ts is None:
+            return False
+        # após a volta do u32 o recuo fica negativo: só o contador acima decide
+        backwards = self._last_ts - timestamp_us
+        return backwards > self.restart_backwards_us
+
+    def _latency(self, timestamp_us: int, now: float) -> None:
+        # desenrola o u32 de micros() (volta a cada ~71 min)
+        if self._last_ts is not None and timestamp_us < self._last_ts and self._last_ts - timestamp_us > 1 << 31:
+            self._ts_wraps += 1
+        self._last_ts = timestamp_us
+        offset = now - (timestamp_us + (self._ts_wraps << 32)) / 1e6
+        if self._min_offset is None or offset < self._min_offset:
+            self._min_offset = offset
+        latency = offset - self._min_offset
+        self._latency_sum += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    def _accept(self, seq: int, length: int, timestamp_us: int, out: bytearray) -> bool:
+        """Atualiza a sequência; retorna False se o pacote deve ser descartado."""
+        if self._expected_seq is not None:
+            delta = (seq - self._expected_seq) & 0xFFFF
+            if delta >= 0x8000:
+                if not self._restarted(timestamp_us):
+                    self.reordered += 1
+                    return False
+                self.resyncs += 1
+                self._new_clock()
+            elif delta > self.max_gap_packets:
+                self.restarts += 1
+                self._new_clock()
+            elif delta:
+                self.dropped_packets += delta
+                if self.zero_fill:
+                    fill = delta * (self._last_length or length)
+                    out += bytes(fill)
+                    self.zero_filled_bytes += fill
+        self._late_run = 0
+        self._expected_seq = (seq + 1) & 0xFFFF
+        self._last_length = length
+        return True
+
+    def feed(self, data, now: Optional[float] = None) -> bytes:
+        """Acrescenta bytes da serial e retorna o PCM decodificado (pode ser vazio)."""
+        now = time.monotonic() if now is None else now
+        buf = self._buffer
+        buf += data
+        out = bytearray()
+        view = memoryview(buf)
+        pos = 0
+        end = len(buf)
+        try:
+            while True:
+                sync = buf.find(SYNC, pos)
+                if sync < 0:
+                    # guarda um possível primeiro byte de sync no fim
+                    keep = end - 1 if end > pos and buf[end - 1] == SYNC[0] else end
+                    self.skipped_bytes += keep - pos
+                    pos = keep
+                    break
+                self.skipped_bytes += sync - pos
+                pos = sync
+                if end - pos < HEADER.size:
+                    break
+                _, seq, length, timestamp = HEADER.unpack_from(buf, pos)
+                if length > self.max_payload:
+                    self.skipped_bytes += 1
+                    pos += 1
+                    continue
+                total = HEADER.size + length + CRC.size
+                if end - pos < total:
+                    break
+                payload_end = pos + HEADER.size + length
+                (crc,) = CRC.unpack_from(buf, payload_end)
+                if crc16(view[pos + 2:payload_end]) != crc:
+                    self.crc_errors += 1
+                    self.skipped_bytes += 1
+                    pos += 1
+                    continue
+                if self._accept(seq, length, timestamp, out):
+                    out += view[pos + HEADER.size:payload_end]
+                    self.packets += 1
+                    self._latency(timestamp, now)
+                pos += total
+        finally:
+            view.release()
+        del buf[:pos]
+        return bytes(out)
+
+    def stats(self) -> dict:
+        return {
+            "packets": self.packets,
+            "dropped_packets": self.dropped_packets,
+            "zero_filled_bytes": self.zero_filled_bytes,
+            "reordered": self.reordered,
+            "crc_errors": self.crc_errors,
+            "skipped_bytes": self.skipped_bytes,
+            "restarts": self.restarts,
+            "resyncs": self.resyncs,
+            "mean_latency_ms": 1000 * self._latency_sum / self.packets if self.packets else 0.0,
+            "max_latency_ms": 1000 * self.max_latency,
+        }
@@ -0,0 +1,386 @@
+"""
+src/audio/sources.py
+
+Fontes de áudio PCM16 com a interface mínima de serial.Serial usada pelo
+main_esp32_serial.py (read(size), reset_input_buffer(), close()):
+
+- SerialSource: a ESP32 real, via pyserial.
+- WavReplaySource: substituto local que reproduz WAVs como o firmware
+  (esp32_stream_ky037.ino): pacotes de 160 amostras a 8 kHz, limitados pela
+  vazão da UART (10 bits por byte) e com jitter opcional de entrega. Mede o
+  quanto o consumidor fica atrasado em relação ao tempo real (backlog).
+- RecorderSource: o microfone local (AudioRecorder / buffer circular).
+- FramedSource: decodifica o protocolo com sync/seq/CRC da ESP32
+  (src/audio/serial_protocol.py) sobre qualquer outra fonte.
+- PtyBridge: publica uma WavReplaySource em um pseudo-terminal, para rodar o
+  programa sem alterações apontando SERIAL_PORT para /dev/pts/N.
+
+    source = WavReplaySource(["comando.wav"], jitter_ms=2.0)
+    while not source.exhausted:
+        data = source.read(4000)
+    print(source.stats())
+
+Linha de comando (ponte pty):
+    python -m src.audio.sources --wav comando.wav --loop
+"""
+
+import os
+import random
+import threading
+import time
+import wave
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+from src.audio.preprocessor import resample_array
+from src.audio.serial_protocol import OVERHEAD, PacketDecoder, encode_packet
+
+# parâmetros do firmware esp32_stream_ky037.ino
+ESP32_SAMPLE_RATE = 8000
+ESP32_PACKET_SAMPLES = 160
+ESP32_BAUD = 230400
+
+
+def read_wav_pcm16(path: str, sample_rate: int) -> np.ndarray:
+    """Lê um WAV PCM16 (mono ou estéreo) como int16 mono em `sample_rate`."""
+    with wave.open(path, "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: apenas PCM16 é suportado")
+        sr = wf.getframerate()
+        audio = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+        if wf.getnchannels() > 1:
+            audio = audio.reshape(-1, wf.getnchannels()).mean(axis=1).astype(np.int16)
+    if sr != sample_rate:
+        audio = resample_array(audio, sr, sample_rate)
+    return audio
+
+
+class AudioSource:
+    """Interface comum: bytes PCM16 com semântica de leitura de serial.Serial."""
+
+    sample_rate = ESP32_SAMPLE_RATE
+
+    def read(self, size: int) -> bytes:
+        """Retorna até `size` bytes; menos (ou b"") se o timeout expirar."""
+        raise NotImplementedError
+
+    def reset_input_buffer(self) -> None:
+        """Descarta o áudio já recebido e ainda não lido."""
+
+    def close(self) -> None:
+        pass
+
+    @property
+    def exhausted(self) -> bool:
+        """True quando a fonte terminou e não há mais dados (fontes ao vivo nunca terminam)."""
+        return False
+
+    def stats(self) -> dict:
+        return {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class SerialSource(AudioSource):
+    def __init__(self, port: str, baud: int = ESP32_BAUD, timeout: float = 1.0,
+                 sample_rate: int = ESP32_SAMPLE_RATE):
+        import serial  # só necessário com hardware
+
+        self.sample_rate = sample_rate
+        self.serial = serial.Serial(port, baud, timeout=timeout)
+        self.port = port
+
+    def read(self, size: int) -> bytes:
+        return self.serial.read(size)
+
+    def reset_input_buffer(self) -> None:
+        self.serial.reset_input_buffer()
+
+    def close(self) -> None:
+        self.serial.close()
+
+
+class RecorderSource(AudioSource):
+    """Adapta o AudioRecorder (microfone via sounddevice) à interface de fonte."""
+
+    def __init__(self, recorder, timeout: float = 1.0):
+        self.recorder = recorder
+        self.sample_rate = recorder.audio_input.samplerate
+        self.timeout = timeout
+
+    def read(self, size: int) -> bytes:
+        chunk = self.recorder.get_next_chunk(size // 2, timeout=self.timeout)
+        return bytes(chunk) if chunk is not None else b""
+
+    def reset_input_buffer(self) -> None:
+        self.recorder.audio_input.ring.clear()
+
+    def stats(self) -> dict:
+        return self.recorder.audio_input.ring.stats()
+
+
+class WavReplaySource(AudioSource):
+    """
+    Reproduz WAVs no ritmo da ESP32 em uma thread produtora.
+
+    Cada pacote de `packet_samples` amostras é "capturado" no instante ideal
+    (contínuo, sem deriva), sofre um atraso aleatório de 0..jitter_ms e só fica
+    disponível depois do tempo de transmissão na UART (8N1: 10 bits/byte),
+    nunca antes do fim do pacote anterior. `speed` acelera a reprodução
+    (speed <= 0: sem ritmo, o mais rápido possível).
+
+    Com framed=True cada pacote sai no protocolo do firmware (encode_packet,
+    com seq e timestamp em µs); byte_loss é a probabilidade de um pacote
+    perder um byte no caminho, como numa UART saturada.
+
+    Métrica de atraso: a cada read(), o backlog (bytes recebidos e ainda não
+    lidos) convertido em segundos de áudio, isto é, quanto o consumidor está
+    atrás do tempo real.
+    """
+
+    def __init__(self,
+                 paths: Iterable[str],
+                 sample_rate: int = ESP32_SAMPLE_RATE,
+                 packet_samples: int = ESP32_PACKET_SAMPLES,
+                 baud: int = ESP32_BAUD,
+                 jitter_ms: float = 0.0,
+                 speed: float = 1.0,
+                 loop: bool = False,
+                 timeout: float = 1.0,
+                 seed: Optional[int] = None,
+                 max_buffer_seconds: float = 30.0,
+                 framed: bool = False,
+                 byte_loss: float = 0.0):
+        self.paths: List[str] = list(paths)
+        if not self.paths:
+            raise ValueError("Informe ao menos um WAV")
+        self.sample_rate = sample_rate
+        self.packet_bytes = 2 * packet_samples
+        self.packet_seconds = packet_samples / sample_rate
+        self.framed = framed
+        self.byte_loss = byte_loss
+        wire_bytes = self.packet_bytes + (OVERHEAD if framed else 0)
+        self.wire_seconds = wire_bytes * 10 / baud
+        self._bytes_per_second = wire_bytes / self.packet_seconds
+        if self.wire_seconds > self.packet_seconds:
+            print(f"[WavReplaySource] Aviso: {baud} baud não sustenta {sample_rate} Hz "
+                  f"({self.wire_seconds * 1000:.1f} ms de UART por pacote de {self.packet_seconds * 1000:.1f} ms)")
+        self.jitter_seconds = jitter_ms / 1000.0
+        self.speed = speed
+        self.loop = loop
+        self.timeout = timeout
+        self._rng = random.Random(seed)
+        # como a UART, o buffer de recepção é finito: o excesso mais antigo é descartado
+        self._max_buffer = int(max_buffer_seconds * self._bytes_per_second)
+
+        self._buffer = bytearray()
+        self._cond = threading.Condition()
+        self._done = False
+        self._closed = False
+        self.packets = 0
+        self.dropped_bytes = 0
+        self.reads = 0
+        self.max_backlog_seconds = 0.0
+        self._backlog_sum = 0.0
+        self._thread = threading.Thread(target=self._produce, name="wav-replay", daemon=True)
+        self._thread.start()
+
+    def _packets(self):
+        while True:
+            for path in self.paths:
+                data = read_wav_pcm16(path, self.sample_rate).tobytes()
+                for pos in range(0, len(data), self.packet_bytes):
+                    packet = data[pos:pos + self.packet_bytes]
+                    # o firmware só envia pacotes completos
+                    if len(packet) == self.packet_bytes:
+                        yield packet
+            if not self.loop:
+                return
+
+    def _produce(self) -> None:
+        start = time.perf_counter()
+        wire_free = start
+        try:
+            for i, packet in enumerate(self._packets()):
+                if self._closed:
+                    return
+                if self.framed:
+                    packet = encode_packet(i, packet, int(i * self.packet_seconds * 1e6))
+                if self.byte_loss and self._rng.random() < self.byte_loss:
+                    lost = self._rng.randrange(len(packet))
+                    packet = packet[:lost] + packet[lost + 1:]
+                if self.speed > 0:
+                    captured = start + (i + 1) * self.packet_seconds / self.speed
+                    sent = max(captured + self._rng.uniform(0.0, self.jitter_seconds), wire_free)
+                    wire_free = sent + self.wire_seconds / self.speed
+                    delay = wire_free - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                with self._cond:
+                    self._buffer += packet
+                    overflow = len(self._buffer) - self._max_buffer
+                    if overflow > 0:
+                        del self._buffer[:overflow]
+                        self.dropped_bytes += overflow
+                    self.packets += 1
+                    self._cond.notify_all()
+        finally:
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def read(self, size: int) -> bytes:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while len(self._buffer) < size and not self._done:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            backlog = len(self._buffer) / self._bytes_per_second
+            self.reads += 1
+            self._backlog_sum += backlog
+            self.max_backlog_seconds = max(self.max_backlog_seconds, backlog)
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            return data
+
+    def reset_input_buffer(self) -> None:
+        with self._cond:
+            self._buffer.clear()
+
+    def close(self) -> None:
+        self._closed = True
+        self._thread.join(timeout=1.0)
+
+    @property
+    def exhausted(self) -> bool:
+        with self._cond:
+            return self._done and not self._buffer
+
+    def stats(self) -> dict:
+        return {
+            "packets": self.packets,
+            "audio_seconds": self.packets * self.packet_seconds,
+            "dropped_bytes": self.dropped_bytes,
+            "reads": self.reads,
+            "mean_backlog_seconds": self._backlog_sum / self.reads if self.reads else 0.0,
+            "max_backlog_seconds": self.max_backlog_seconds,
+        }
+
+
+class FramedSource(AudioSource):
+    """
+    Fonte que lê bytes do protocolo da ESP32 de outra fonte (serial, replay
+    com framed=True) e entrega só o PCM, já ressincronizado e com as perdas
+    preenchidas com silêncio.
+    """
+
+    def __init__(self, raw: AudioSource, decoder: Optional[PacketDecoder] = None, read_bytes: int = 1024):
+        self.raw = raw
+        self.sample_rate = raw.sample_rate
+        self.decoder = decoder or PacketDecoder()
+        self.read_bytes = read_bytes
+        self._pcm = bytearray()
+
+    def read(self, size: int) -> bytes:
+        while len(self._pcm) < size:
+            data = self.raw.read(self.read_bytes)
+            if not data:
+                break
+            self._pcm += self.decoder.feed(data)
+        data = bytes(self._pcm[:size])
+        del self._pcm[:size]
+        return data
+
+    def reset_input_buffer(self) -> None:
+        self.raw.reset_input_buffer()
+        self.decoder.reset()
+        self._pcm.clear()
+
+    def close(self) -> None:
+        self.raw.close()
+
+    @property
+    def exhausted(self) -> bool:
+        return self.raw.exhausted and not self._pcm
+
+    def stats(self) -> dict:
+        return {**self.raw.stats(), "protocol": self.decoder.stats()}
+
+
+class PtyBridge:
+    """
+    Escreve os bytes de uma AudioSource no lado mestre de um pseudo-terminal;
+    o lado escravo (`port`) se comporta como a serial da ESP32 para qualquer
+    leitor (ex.: serial.Serial(bridge.port, 230400)). Somente POSIX.
+    O pyserial limpa a entrada ao abrir a porta, então o que for escrito antes
+    disso se perde, como acontece com a ESP32 real.
+    """
+
+    def __init__(self, source: AudioSource, chunk_bytes: int = 2 * ESP32_PACKET_SAMPLES):
+        import tty
+
+        self.source = source
+        self.chunk_bytes = chunk_bytes
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._pump, name="pty-bridge", daemon=True)
+
+    def _pump(self) -> None:
+        while not self._stop.is_set() and not self.source.exhausted:
+            data = self.source.read(self.chunk_bytes)
+            if data:
+                os.write(self._master, data)
+
+    def start(self) -> "PtyBridge":
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=2.0)
+        self.source.close()
+        os.close(self._master)
+        os.close(self._slave)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Simula a serial da ESP32 em um pty a partir de WAVs.")
+    parser.add_argument("--wav", nargs="+", required=True)
+    parser.add_argument("--baud", type=int, default=ESP32_BAUD)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--loop", action="store_true")
+    parser.add_argument("--raw", action="store_true", help="PCM sem o protocolo de pacotes (firmware antigo)")
+    parser.add_argument("--byte-loss", type=float, default=0.0, help="probabilidade de perder um byte por pacote")
+    args = parser.parse_args()
+
+    source = WavReplaySource(args.wav, baud=args.baud, jitter_ms=args.jitter_ms, loop=args.loop,
+                             framed=not args.raw, byte_loss=args.byte_loss)
+    with PtyBridge(source) as bridge:
+        print(f"ESP32 simulada em {bridge.port} (Ctrl+C para parar)")
+        try:
+            while not source.exhausted:
+                time.sleep(0.5)
+        except KeyboardInterrupt:
+            pass
+    print("Estatísticas:", source.stats())
+
+
+if __name__ == "__main__":
+    main()
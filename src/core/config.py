@@ -10,13 +10,61 @@ CONFIG = {
     # --- Configurações de Áudio ---
     "audio": {
         "samplerate": 8000,
-        "blocksize": 512,  # Valor estático (requerido pelo Porcupine)
+        # bloco de captura; é reempacotado para o tamanho de frame de cada motor
+        # (src/audio/reframer.py), então pode ser ajustado por latência/overhead
+        "blocksize": 512,
         "device": 0,
+        # buffer circular entre o callback de áudio e os consumidores
+        "buffer_seconds": 2.0,
+        "overflow_policy": "drop_oldest",  # 'drop_oldest' ou 'block'
     },
 
     # --- Configurações de Reconhecimento de Fala (Vosk ASR) ---
     "recognition": {
         "model_path": os.path.join(MODELS_DIR, "vosk-model-small-pt-0.3"),
+        # amostras por bloco entregue ao Vosk (2000 @ 8 kHz = 250 ms = 4000 bytes)
+        "block_samples": 2000,
+        # None = vocabulário aberto; "commands" = gramática gerada de src/nlp/keys.py
+        # (ou uma lista JSON de frases), ver src/nlp/grammar.py
+        "grammar": None,
+        # modo de commit antecipado: age sobre o resultado parcial do Vosk quando
+        # ação e dispositivo ficam estáveis por stable_chunks chunks seguidos,
+        # sem esperar o silêncio do endpoint (ver src/core/early_commit.py)
+        "early_commit": {
+            "enabled": False,
+            "stable_chunks": 2,
+            "min_confidence": 0.9,
+        },
+        # endpointer na frente do Vosk (src/audio/endpointer.py): o Kaldi só
+        # decodifica entre o início e o fim de cada frase detectados pela VAD
+        "endpointer": {
+            "enabled": False,
+            "preroll_ms": 300.0,
+            "min_speech_ms": 90.0,
+            "trailing_silence_ms": 600.0,
+            "max_utterance_ms": 10000.0,
+        },
+    },
+
+    # --- Parser de comandos, ver src/nlp/nlp.py ---
+    "nlp": {
+        # resultados de parse_command guardados por frase exata (LRU); 0 desliga
+        "cache_size": 1024,
+        # vocabulário externo (JSON ou .py no formato de keys.py); None = src/nlp/keys.py
+        "vocabulary_path": None,
+        # snapshot compilado (índice pronto); None = <vocabulário>.snapshot
+        "snapshot_path": None,
+        # intervalo de checagem do arquivo pelo VocabularyStore (None = só SIGHUP/manual)
+        "watch_interval_s": 2.0,
+        # casamento aproximado/fonético quando o exato não acha ação ou dispositivo
+        # (src/nlp/fuzzy.py): distância máxima nas palavras longas, tamanho mínimo
+        # da palavra corrigida e peso do casamento aproximado na confiança
+        "fuzzy": {
+            "enabled": True,
+            "max_distance": 2,
+            "min_word_length": 3,
+            "weight": 0.9,
+        },
     },
 
     # --- Configurações de Detecção de Hotword (Picovoice Porcupine KWS) ---
@@ -29,5 +77,54 @@ CONFIG = {
         "model_path": os.path.join(MODELS_DIR, 'picovoice', 'porcupine_params_pt.pv'),
 
         "sensitivities": [0.7],
-    }
+    },
+
+    # --- Pipeline KWS -> ASR ---
+    "pipeline": {
+        # áudio anterior à detecção reenviado ao Vosk, para não perder o início da fala
+        "preroll_ms": 200,
+        # tempo máximo (de áudio) em modo ASR sem endpoint antes de voltar ao KWS
+        "asr_timeout_s": 5.0,
+    },
+
+    # --- Ingestão pela rede (ESP32 via WiFi), ver src/core/ingest.py ---
+    "ingest": {
+        "host": "0.0.0.0",
+        "tcp_port": 5005,
+        "udp_port": 5006,
+        # áudio pendente por nó antes de descartar o mais antigo (ou pausar o TCP)
+        "buffer_seconds": 2.0,
+        "overflow_policy": "drop_oldest",  # 'drop_oldest' ou 'block'
+        # sessão desconectada há mais que isso é encerrada (None = nunca)
+        "session_timeout_s": 300.0,
+    },
+
+    # --- Log de comandos (JSON lines), ver src/model/jsonwriter.py ---
+    "command_log": {
+        "dir": "command_logs",
+        # o escritor grava em lote quando acumula flush_bytes ou após flush_interval_s
+        "flush_bytes": 64 * 1024,
+        "flush_interval_s": 1.0,
+        # 'never' (o SO decide), 'batch' (fsync a cada lote) ou 'always' (a cada comando)
+        "fsync": "batch",
+        # compacta (gzip) o arquivo do dia anterior na rotação
+        "compress": False,
+    },
+
+    # --- Histórico consultável (SQLite), ver src/model/history.py ---
+    "history": {
+        "path": os.path.join("command_logs", "history.sqlite3"),
+    },
+
+    # --- Instrumentação de latência, ver src/core/telemetry.py ---
+    "telemetry": {
+        # False: spans e histogramas viram no-op (custo de uma checagem de atributo)
+        "enabled": True,
+        # RMS (PCM16) acima do qual um chunk conta como fala, para medir o fim da fala
+        "speech_rms": 500.0,
+        # formato texto do Prometheus: arquivo reescrito a cada interval_s e/ou HTTP /metrics
+        "export_path": None,
+        "http_port": None,
+        "interval_s": 10.0,
+    },
 }
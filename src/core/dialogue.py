@@ -0,0 +1,123 @@
+"""
+src/core/dialogue.py
+
+Regras do diálogo de comandos (antes embutidas em main_esp32_serial.py),
+sem nenhuma E/S: quem lê áudio e imprime é o runtime.
+
+    decisao, valor = decidir(parse_command(texto))
+    # "ignorar"  -> valor None (confiança baixa e nada reconhecido)
+    # "pronto"   -> valor = resultado final do NLP
+    # "perguntar"-> valor = dispositivo; perguntar a ação e chamar completar()
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+from src.nlp import keys  # pra reutilizar as listas de palavras (keys.ACTIONS segue os reloads)
+
+# confiança mínima pra levar o comando a sério
+CONF_MIN = 0.4
+
+IGNORAR = "ignorar"
+PRONTO = "pronto"
+PERGUNTAR = "perguntar"
+
+
+def classificar_dispositivo(dispositivo: str) -> str:
+    """Decide o tipo do dispositivo:"""
+    dispositivo = dispositivo or ""
+    if any(p in dispositivo for p in ["porta", "janela", "cortina"]):
+        return "abrir_fechar"
+    return "ligar_desligar"
+
+
+def opcoes_para(dispositivo: str) -> Tuple[str, str]:
+    """As duas ações oferecidas no diálogo para o dispositivo."""
+    if classificar_dispositivo(dispositivo) == "abrir_fechar":
+        return "abrir", "fechar"
+    return "ligar", "desligar"
+
+
+def detectar_acao_em_texto(texto: str) -> str | None:
+    if not texto:
+        return None
+
+    t = texto.lower()
+
+    # checa nas listas do keys.py
+    for acao, palavras in keys.ACTIONS.items():
+        for p in palavras:
+            if p in t:
+                return acao
+
+    # fallback pra sim/não (será tratado na função que chama)
+    return None
+
+
+def interpretar_resposta(texto: str, opcao1: str, opcao2: str) -> Tuple[bool, Optional[str]]:
+    """
+    Interpreta a resposta do diálogo. Retorna (entendeu, ação); ação None com
+    entendeu=True significa cancelar o comando.
+    """
+    lower = (texto or "").lower()
+    if not lower:
+        return False, None
+
+    # 1) tenta achar ação explícita (ligar, desligar, abrir, fechar)
+    acao_detectada = detectar_acao_em_texto(lower)
+    if acao_detectada in ["ligar", "desligar", "abrir", "fechar"]:
+        return True, acao_detectada
+
+    # 2) trata 'sim' / 'não'
+    if "sim" in lower:
+        return True, opcao1
+    if "nao" in lower or "não" in lower:
+        return True, None
+
+    # 3) se chegou aqui, não entendeu
+    return False, None
+
+
+def decidir(nlp_raw: Dict[str, Any], conf_min: float = CONF_MIN) -> Tuple[str, Any]:
+    """Aplica os casos A-D do diálogo ao resultado bruto do NLP."""
+    entities_raw = nlp_raw.get("entities") or {}
+    acao_raw = entities_raw.get("acao")
+    disp_raw = entities_raw.get("dispositivo")
+    conf_raw = nlp_raw.get("confidence", 0.0)
+
+    # Caso A: confiança muito baixa ou nada reconhecido -> ignora
+    if conf_raw < conf_min and not acao_raw and not disp_raw:
+        return IGNORAR, None
+
+    # Caso B: temos ação E dispositivo -> comando pronto
+    if acao_raw and disp_raw and conf_raw >= conf_min:
+        return PRONTO, nlp_raw
+
+    # Caso C: só dispositivo (tipo 'microondas', 'televisão', 'porta') -> perguntar ação
+    if disp_raw and not acao_raw and conf_raw >= conf_min:
+        return PERGUNTAR, disp_raw
+
+    # Caso D: só ação ou tudo muito confuso -> marca como desconhecido
+    return PRONTO, {
+        "intent": "desconhecido",
+        "entities": {"acao": acao_raw, "dispositivo": disp_raw},
+        "confidence": conf_raw,
+    }
+
+
+def completar(nlp_raw: Dict[str, Any], acao_escolhida: Optional[str]) -> Dict[str, Any]:
+    """Resultado final depois do diálogo (ação None = cancelado)."""
+    entities_raw = nlp_raw.get("entities") or {}
+    conf_raw = nlp_raw.get("confidence", 0.0)
+    if acao_escolhida is None:
+        return {
+            "intent": "desconhecido",
+            "entities": {"acao": None, "dispositivo": entities_raw.get("dispositivo")},
+            "confidence": conf_raw,
+        }
+    entities_final = dict(entities_raw)
+    entities_final["acao"] = acao_escolhida
+    return {
+        "intent": "controlar_dispositivo",
+        "entities": entities_final,
+        "confidence": conf_raw,
+    }
@@ -0,0 +1,142 @@
+"""
+src/core/early_commit.py
+
+Commit antecipado sobre resultados parciais do Vosk.
+
+O endpoint do Kaldi só fecha a frase depois de um trecho de silêncio; com o
+parcial já em "desliga a luz da sala", o comando fica esperando à toa. O
+EarlyCommitter roda o NLP a cada parcial e acompanha a estabilidade: quando a
+intenção tem ação E dispositivo, com confiança >= min_confidence, e o mesmo
+resultado (intent + entidades) se repete por `stable_chunks` chunks seguidos,
+o comando é liberado na hora, marcado com "early": True. Com o parse
+padrão, os parciais passam pelo IncrementalParser (src/nlp/incremental.py),
+que só processa as palavras novas de cada parcial.
+
+Quando o texto final chega:
+- se o NLP do final dá o mesmo resultado já executado, ele é descartado
+  (dedup) e só serve para medir quanto tempo o commit antecipado economizou;
+- se diverge (ex.: o parcial mudou depois do commit), o final segue o fluxo
+  normal e a divergência é contada em `mismatches`.
+
+    committer = EarlyCommitter()
+    for chunk in chunks:
+        if asr.accept_chunk(chunk) is None:
+            result = committer.update(asr.partial())   # comando antecipado ou None
+        else:
+            result = committer.final(text)             # None = já executado (ou vazio)
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+from src.core.config import CONFIG
+from src.nlp.incremental import IncrementalParser
+from src.nlp.nlp import parse_command
+
+
+def result_key(result: Dict[str, Any]) -> tuple:
+    """O que identifica um comando: intent e entidades (sem a confiança)."""
+    entities = result.get("entities") or {}
+    return result.get("intent"), tuple(sorted(entities.items()))
+
+
+class EarlyCommitter:
+    def __init__(self,
+                 stable_chunks: Optional[int] = None,
+                 min_confidence: Optional[float] = None,
+                 parse: Callable[[str], Dict[str, Any]] = parse_command):
+        cfg = CONFIG["recognition"]["early_commit"]
+        self.stable_chunks = cfg["stable_chunks"] if stable_chunks is None else stable_chunks
+        self.min_confidence = cfg["min_confidence"] if min_confidence is None else min_confidence
+        self.parse = parse
+        # parse_command do zero a cada parcial só quando o parse é customizado
+        self._incremental = IncrementalParser() if parse is parse_command else None
+        self._parse_partial = self._incremental.update if self._incremental is not None else parse
+        self.partials = 0
+        self.parses = 0
+        self.early_commits = 0
+        self.deduped = 0
+        self.mismatches = 0
+        self.saved_seconds = 0.0
+        # quanto o último comando deduplicado chegou antes do final
+        self.last_saved_seconds = 0.0
+        self.reset()
+
+    def reset(self) -> None:
+        """Começa uma frase nova."""
+        self._text: Optional[str] = None
+        self._result: Optional[Dict[str, Any]] = None
+        self._key = None
+        self._streak = 0
+        self.committed: Optional[Dict[str, Any]] = None
+        self._committed_at = 0.0
+        if self._incremental is not None:
+            self._incremental.reset()
+
+    def _actionable(self, result: Dict[str, Any]) -> bool:
+        entities = result.get("entities") or {}
+        # casamento aproximado em parcial é arriscado demais: espera o final
+        return (bool(entities.get("acao")) and bool(entities.get("dispositivo"))
+                and "fuzzy" not in result
+                and result.get("confidence", 0.0) >= self.min_confidence)
+
+    def update(self, partial: str) -> Optional[Dict[str, Any]]:
+        """
+        Processa o parcial de mais um chunk. Retorna o comando quando ele acaba
+        de ficar estável (uma única vez por frase); senão None.
+        """
+        self.partials += 1
+        if self.committed is not None or not partial:
+            return None
+        if partial != self._text:
+            # o NLP só roda quando o parcial muda
+            self._text = partial
+            self._result = self._parse_partial(partial)
+            self.parses += 1
+        result = self._result
+        if not self._actionable(result):
+            self._key, self._streak = None, 0
+            return None
+        key = result_key(result)
+        if key == self._key:
+            self._streak += 1
+        else:
+            self._key, self._streak = key, 1
+        if self._streak < self.stable_chunks:
+            return None
+        self.committed = {**result, "early": True}
+        self._committed_at = time.perf_counter()
+        self.early_commits += 1
+        return self.committed
+
+    def final(self, text: str, result: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Texto final da frase: retorna o resultado do NLP a executar, ou None se
+        ele repete o comando já liberado antecipadamente (ou se o final veio
+        vazio). Encerra a frase; chame também nos endpoints sem texto.
+        """
+        committed, committed_at = self.committed, self._committed_at
+        self.reset()
+        if not text and result is None:
+            # endpoint vazio (timeout do ASR, final sem fala): só encerra a frase
+            return None
+        result = result if result is not None else self.parse(text)
+        if committed is None:
+            return result
+        if result_key(result) == result_key(committed):
+            self.deduped += 1
+            self.last_saved_seconds = time.perf_counter() - committed_at
+            self.saved_seconds += self.last_saved_seconds
+            return None
+        self.mismatches += 1
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "partials": self.partials,
+            "parses": self.parses,
+            "early_commits": self.early_commits,
+            "deduped": self.deduped,
+            "mismatches": self.mismatches,
+            "mean_saved_ms": 1000 * self.saved_seconds / self.deduped if self.deduped else 0.0,
+        }
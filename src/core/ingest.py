@@ -0,0 +1,507 @@
+"""
+src/core/ingest.py
+
+Ingestão de áudio pela rede: nós ESP32 via WiFi enviam o mesmo fluxo da
+serial (pacotes com sync/seq/CRC de src/audio/serial_protocol.py, ou PCM16
+cru a 8 kHz) para um servidor asyncio local, que entrega cada nó ao
+MultiStreamServer (src/core/server.py) como mais um stream.
+
+Protocolo:
+- TCP: a conexão começa com uma linha "HELLO <nó>\\n"; o resto são os bytes do
+  fluxo, exatamente como sairiam na UART.
+- UDP: cada datagrama é "<nó>\\n" seguido de um ou mais pacotes.
+
+Sessões: o estado de cada nó (buffer, decodificador de pacotes, reconhecedor,
+diálogo) pertence à sessão, não à conexão. Se o WiFi cair e o nó reconectar
+com o mesmo nome, ele continua na mesma sessão: o PacketDecoder trata o buraco
+como pacotes perdidos. Uma segunda conexão com o mesmo nome substitui a
+anterior. Sessões sem dados há mais de `session_timeout_s` são encerradas.
+
+Recepção sem cópias extras: o protocolo TCP é um BufferedProtocol; o kernel
+escreve direto num buffer pré-alocado e o memoryview é anexado ao buffer da
+sessão (a única cópia, entre o loop e a thread que alimenta o Vosk). Com
+overflow "block" o TCP para de ler quando a sessão acumula `buffer_seconds`
+(a pressão volta até o nó); com "drop_oldest" o áudio mais antigo é
+descartado, como na UART.
+
+    server = MultiStreamServer(workers=2)
+    async with IngestServer(server, tcp_port=5005):
+        await server.run(forever=True)
+
+Linha de comando:
+    python -m src.core.ingest serve --port 5005 --udp-port 5006 --workers 2
+    python -m src.core.ingest client --wav comando.wav --nodes 8 --speed 0
+"""
+
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from src.audio.ring_buffer import BLOCK, DROP_OLDEST
+from src.audio.serial_protocol import encode_packet
+from src.audio.sources import ESP32_PACKET_SAMPLES, ESP32_SAMPLE_RATE, AudioSource, FramedSource
+from src.core.config import CONFIG
+
+HELLO = b"HELLO"
+# tamanho máximo da linha de apresentação
+MAX_HELLO_BYTES = 128
+
+
+class NetworkSession(AudioSource):
+    """
+    Áudio de um nó da rede. Alimentada pelo loop asyncio (feed) e lida pela
+    thread de captura do runtime (read), com a semântica de serial.Serial.
+    """
+
+    def __init__(self, node: str,
+                 sample_rate: int = ESP32_SAMPLE_RATE,
+                 buffer_seconds: float = 2.0,
+                 overflow: str = DROP_OLDEST,
+                 timeout: float = 1.0):
+        if overflow not in (BLOCK, DROP_OLDEST):
+            raise ValueError(f"Política de estouro desconhecida: {overflow}")
+        self.node = node
+        self.sample_rate = sample_rate
+        self.overflow = overflow
+        self.timeout = timeout
+        self.capacity = int(2 * sample_rate * buffer_seconds)
+        self._buffer = bytearray()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._paused = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.transport = None
+        self.last_seen = time.monotonic()
+        self.bytes_received = 0
+        self.connections = 0
+        self.reconnects = 0
+        self.dropped_bytes = 0
+        self.pauses = 0
+        self.max_backlog_seconds = 0.0
+
+    # ---------- lado da rede (loop asyncio) ----------
+
+    def attach(self, transport) -> None:
+        if self.connections:
+            self.reconnects += 1
+        self.connections += 1
+        self.transport = transport
+        self._loop = asyncio.get_running_loop()
+        self._paused = False
+
+    def detach(self, transport) -> None:
+        if self.transport is transport:
+            self.transport = None
+            self.last_seen = time.monotonic()
+
+    def feed(self, data) -> None:
+        """Anexa bytes recebidos (bytes ou memoryview)."""
+        self.last_seen = time.monotonic()
+        with self._cond:
+            if self._closed:
+                return
+            self._buffer += data
+            self.bytes_received += len(data)
+            overflow = len(self._buffer) - self.capacity
+            if overflow > 0:
+                # UDP não tem como pausar o remetente: descarta mesmo com "block"
+                if self.overflow == BLOCK and self.transport is not None:
+                    if not self._paused:
+                        self._paused = True
+                        self.pauses += 1
+                        self.transport.pause_reading()
+                else:
+                    del self._buffer[:overflow]
+                    self.dropped_bytes += overflow
+            self.max_backlog_seconds = max(self.max_backlog_seconds, len(self._buffer) / (2 * self.sample_rate))
+            self._cond.notify_all()
+
+    def _resume(self) -> None:
+        if self._paused and self.transport is not None:
+            self._paused = False
+            self.transport.resume_reading()
+
+    # ---------- lado do consumidor (thread de captura) ----------
+
+    def read(self, size: int) -> bytes:
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while len(self._buffer) < size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            if self._paused and len(self._buffer) <= self.capacity // 2:
+                self._loop.call_soon_threadsafe(self._resume)
+        return data
+
+    def reset_input_buffer(self) -> None:
+        with self._cond:
+            self._buffer.clear()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def exhausted(self) -> bool:
+        with self._cond:
+            return self._closed and not self._buffer
+
+    def stats(self) -> dict:
+        return {
+            "connected": self.transport is not None,
+            "bytes_received": self.bytes_received,
+            "audio_seconds": self.bytes_received / (2 * self.sample_rate),
+            "connections": self.connections,
+            "reconnects": self.reconnects,
+            "dropped_bytes": self.dropped_bytes,
+            "pauses": self.pauses,
+            "max_backlog_seconds": self.max_backlog_seconds,
+        }
+
+
+class _TcpIngestProtocol(asyncio.BufferedProtocol):
+    def __init__(self, ingest: "IngestServer"):
+        self.ingest = ingest
+        self.session: Optional[NetworkSession] = None
+        self.transport = None
+        self._view = memoryview(bytearray(ingest.recv_bytes))
+        self._hello = bytearray()
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def get_buffer(self, sizehint: int):
+        return self._view
+
+    def buffer_updated(self, nbytes: int) -> None:
+        data = self._view[:nbytes]
+        if self.session is not None:
+            self.session.feed(data)
+            return
+        self._hello += data
+        line, sep, rest = self._hello.partition(b"\n")
+        if not sep:
+            if len(self._hello) > MAX_HELLO_BYTES:
+                self.ingest._reject(self.transport, "apresentação longa demais")
+            return
+        parts = line.split()
+        if len(parts) != 2 or parts[0] != HELLO:
+            self.ingest._reject(self.transport, f"apresentação inválida {bytes(line[:32])!r}")
+            return
+        self.session = self.ingest._session(parts[1].decode(errors="replace"), self.transport)
+        self._hello = bytearray()
+        if self.session is not None and rest:
+            self.session.feed(rest)
+
+    def eof_received(self):
+        return False
+
+    def connection_lost(self, exc) -> None:
+        if self.session is not None:
+            self.ingest._disconnected(self.session, self.transport)
+
+
+class _UdpIngestProtocol(asyncio.DatagramProtocol):
+    def __init__(self, ingest: "IngestServer"):
+        self.ingest = ingest
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        node, sep, _ = data[:MAX_HELLO_BYTES].partition(b"\n")
+        if not sep or not node:
+            self.ingest.invalid_datagrams += 1
+            return
+        session = self.ingest._session(node.decode(errors="replace"), None)
+        if session is not None:
+            session.feed(memoryview(data)[len(node) + 1:])
+
+
+class IngestServer:
+    def __init__(self,
+                 server=None,
+                 host: Optional[str] = None,
+                 tcp_port: Optional[int] = -1,
+                 udp_port: Optional[int] = -1,
+                 framed: bool = True,
+                 sample_rate: int = ESP32_SAMPLE_RATE,
+                 buffer_seconds: Optional[float] = None,
+                 overflow: Optional[str] = None,
+                 session_timeout_s: Optional[float] = -1,
+                 on_session: Optional[Callable[[str, AudioSource], None]] = None,
+                 recv_bytes: int = 65536,
+                 verbose: bool = True):
+        """
+        server: MultiStreamServer que recebe cada nó novo (add_stream); opcional.
+        tcp_port / udp_port: -1 = valor de CONFIG["ingest"]; None = desativado;
+            0 = porta livre (ver self.tcp_port/self.udp_port após start()).
+        framed: os nós enviam o protocolo de pacotes (False = PCM16 cru).
+        on_session(nó, fonte) é chamado para cada sessão nova, com a fonte já
+            decodificada (FramedSource) quando framed=True.
+        """
+        cfg = CONFIG["ingest"]
+        self.server = server
+        self.host = host or cfg["host"]
+        self.tcp_port = cfg["tcp_port"] if tcp_port == -1 else tcp_port
+        self.udp_port = cfg["udp_port"] if udp_port == -1 else udp_port
+        self.framed = framed
+        self.sample_rate = sample_rate
+        self.buffer_seconds = cfg["buffer_seconds"] if buffer_seconds is None else buffer_seconds
+        self.overflow = overflow or cfg["overflow_policy"]
+        self.session_timeout_s = cfg["session_timeout_s"] if session_timeout_s == -1 else session_timeout_s
+        self.on_session = on_session
+        self.recv_bytes = recv_bytes
+        self.verbose = verbose
+        self.sessions: Dict[str, NetworkSession] = {}
+        self.rejected = 0
+        self.invalid_datagrams = 0
+        self.expired = 0
+        self._tcp = None
+        self._udp = None
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def _log(self, *args) -> None:
+        if self.verbose:
+            print("[IngestServer]", *args)
+
+    # ---------- sessões ----------
+
+    def _session(self, node: str, transport) -> Optional[NetworkSession]:
+        session = self.sessions.get(node)
+        if session is None:
+            session = NetworkSession(node, self.sample_rate, self.buffer_seconds, self.overflow)
+            source = FramedSource(session) if self.framed else session
+            if self.server is not None:
+                try:
+                    self.server.add_stream(node, source)
+                except (ValueError, RuntimeError) as e:
+                    # ex.: a sessão anterior deste nó ainda está terminando
+                    self._reject(transport, str(e))
+                    return None
+            if self.on_session is not None:
+                self.on_session(node, source)
+            self.sessions[node] = session
+            self._log(f"nova sessão '{node}'")
+        if transport is not None:
+            old = session.transport
+            if old is not None and old is not transport:
+                self._log(f"'{node}' reconectou; encerrando a conexão anterior")
+                old.close()
+            session.attach(transport)
+        return session
+
+    def _disconnected(self, session: NetworkSession, transport) -> None:
+        session.detach(transport)
+        self._log(f"'{session.node}' desconectou (sessão mantida)")
+
+    def _reject(self, transport, reason: str) -> None:
+        self.rejected += 1
+        self._log("conexão recusada:", reason)
+        if transport is not None:
+            transport.close()
+
+    async def _sweep(self) -> None:
+        interval = min(5.0, max(0.05, self.session_timeout_s / 4))
+        while True:
+            await asyncio.sleep(interval)
+            now = time.monotonic()
+            for node, session in list(self.sessions.items()):
+                if session.transport is None and now - session.last_seen > self.session_timeout_s:
+                    self._log(f"sessão '{node}' expirou")
+                    del self.sessions[node]
+                    session.close()
+                    self.expired += 1
+
+    # ---------- ciclo de vida ----------
+
+    async def start(self) -> "IngestServer":
+        loop = asyncio.get_running_loop()
+        if self.tcp_port is not None:
+            self._tcp = await loop.create_server(lambda: _TcpIngestProtocol(self), self.host, self.tcp_port)
+            self.tcp_port = self._tcp.sockets[0].getsockname()[1]
+            self._log(f"TCP em {self.host}:{self.tcp_port}")
+        if self.udp_port is not None:
+            self._udp, _ = await loop.create_datagram_endpoint(lambda: _UdpIngestProtocol(self),
+                                                               local_addr=(self.host, self.udp_port))
+            self.udp_port = self._udp.get_extra_info("sockname")[1]
+            self._log(f"UDP em {self.host}:{self.udp_port}")
+        if self.session_timeout_s is not None:
+            self._sweeper = asyncio.create_task(self._sweep(), name="ingest-sweep")
+        return self
+
+    async def close(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        if self._udp is not None:
+            self._udp.close()
+        if self._tcp is not None:
+            self._tcp.close()
+            for session in self.sessions.values():
+                if session.transport is not None:
+                    session.transport.close()
+            await self._tcp.wait_closed()
+        for session in self.sessions.values():
+            session.close()
+
+    async def __aenter__(self) -> "IngestServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    def stats(self) -> dict:
+        return {
+            "tcp_port": self.tcp_port,
+            "udp_port": self.udp_port,
+            "connections": sum(s.transport is not None for s in self.sessions.values()),
+            "rejected": self.rejected,
+            "invalid_datagrams": self.invalid_datagrams,
+            "expired": self.expired,
+            "sessions": {node: s.stats() for node, s in self.sessions.items()},
+        }
+
+
+# ---------- cliente de loopback (simula nós ESP32) ----------
+
+async def push_audio(host: str, port: int, node: str, pcm: bytes,
+                     speed: float = 1.0,
+                     framed: bool = True,
+                     udp: bool = False,
+                     packet_samples: int = ESP32_PACKET_SAMPLES,
+                     sample_rate: int = ESP32_SAMPLE_RATE,
+                     reconnect_every: Optional[int] = None,
+                     batch_packets: int = 32) -> dict:
+    """
+    Envia `pcm` como um nó: pacotes de `packet_samples` amostras no ritmo do
+    áudio (speed <= 0: o mais rápido possível, em lotes de `batch_packets`).
+    reconnect_every=N derruba e refaz a conexão TCP a cada N pacotes.
+    """
+    loop = asyncio.get_running_loop()
+    packet_bytes = 2 * packet_samples
+    packet_seconds = packet_samples / sample_rate
+    header = node.encode() + b"\n"
+    writer = transport = None
+    connects = 0
+
+    async def connect():
+        nonlocal writer, transport, connects
+        connects += 1
+        if udp:
+            transport, _ = await loop.create_datagram_endpoint(asyncio.DatagramProtocol, remote_addr=(host, port))
+        else:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.write(HELLO + b" " + header)
+
+    await connect()
+    start = time.perf_counter()
+    sent = packets = 0
+    batch = []
+    n_packets = len(pcm) // packet_bytes
+    for i in range(n_packets):
+        payload = pcm[i * packet_bytes:(i + 1) * packet_bytes]
+        packet = encode_packet(i, payload, int(i * packet_seconds * 1e6)) if framed else payload
+        batch.append(header + packet if udp else packet)
+        packets += 1
+        if speed > 0:
+            delay = start + (i + 1) * packet_seconds / speed - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif len(batch) < batch_packets and i + 1 < n_packets:
+            continue
+        if udp:
+            for datagram in batch:
+                transport.sendto(datagram)
+            # deixa o loop respirar entre lotes
+            await asyncio.sleep(0)
+        else:
+            writer.writelines(batch)
+            await writer.drain()
+        sent += sum(map(len, batch))
+        batch = []
+        if reconnect_every and not udp and (i + 1) % reconnect_every == 0 and i + 1 < n_packets:
+            writer.close()
+            await writer.wait_closed()
+            await connect()
+    elapsed = time.perf_counter() - start
+    if udp:
+        transport.close()
+    else:
+        writer.close()
+        await writer.wait_closed()
+    return {"node": node, "packets": packets, "bytes": sent, "connects": connects,
+            "seconds": elapsed, "audio_seconds": packets * packet_seconds}
+
+
+async def push_wav(host: str, port: int, node: str, paths, **kwargs) -> dict:
+    from src.audio.sources import read_wav_pcm16
+
+    sample_rate = kwargs.get("sample_rate", ESP32_SAMPLE_RATE)
+    pcm = b"".join(read_wav_pcm16(path, sample_rate).tobytes() for path in paths)
+    return await push_audio(host, port, node, pcm, **kwargs)
+
+
+def main():
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Ingestão de áudio de nós ESP32 pela rede.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    serve = sub.add_parser("serve", help="recebe os nós e reconhece os comandos")
+    serve.add_argument("--host", default=CONFIG["ingest"]["host"])
+    serve.add_argument("--port", type=int, default=CONFIG["ingest"]["tcp_port"])
+    serve.add_argument("--udp-port", type=int, default=CONFIG["ingest"]["udp_port"])
+    serve.add_argument("--raw", action="store_true", help="nós enviam PCM sem pacotes")
+    serve.add_argument("--workers", type=int, default=None)
+    serve.add_argument("--model", default=None)
+    client = sub.add_parser("client", help="simula nós enviando WAVs")
+    client.add_argument("--wav", nargs="+", required=True)
+    client.add_argument("--host", default="127.0.0.1")
+    client.add_argument("--port", type=int, default=None, help="padrão: porta TCP (ou UDP com --udp) do CONFIG")
+    client.add_argument("--nodes", type=int, default=1)
+    client.add_argument("--udp", action="store_true")
+    client.add_argument("--raw", action="store_true")
+    client.add_argument("--speed", type=float, default=1.0, help="1 = tempo real; 0 = sem ritmo")
+    client.add_argument("--reconnect-every", type=int, default=None, metavar="PACOTES")
+    args = parser.parse_args()
+
+    if args.cmd == "serve":
+        from src.core.server import MultiStreamServer
+
+        server = MultiStreamServer(model_path=args.model, workers=args.workers,
+                                   on_command=lambda name, result: print(f"[{name}] →", result))
+        ingest = IngestServer(server, host=args.host, tcp_port=args.port, udp_port=args.udp_port,
+                              framed=not args.raw)
+
+        async def serve_forever():
+            async with ingest:
+                await server.run(forever=True)
+
+        try:
+            asyncio.run(serve_forever())
+        except KeyboardInterrupt:
+            pass
+        print(json.dumps(ingest.stats(), indent=2, ensure_ascii=False))
+        return
+
+    port = args.port or CONFIG["ingest"]["udp_port" if args.udp else "tcp_port"]
+
+    async def run_clients():
+        return await asyncio.gather(*(
+            push_wav(args.host, port, f"no{i}", args.wav, speed=args.speed, framed=not args.raw,
+                     udp=args.udp, reconnect_every=args.reconnect_every)
+            for i in range(args.nodes)))
+
+    results = asyncio.run(run_clients())
+    total = sum(r["bytes"] for r in results)
+    elapsed = max(r["seconds"] for r in results)
+    audio = sum(r["audio_seconds"] for r in results)
+    print(f"{args.nodes} nós, {total / 1e6:.2f} MB em {elapsed:.2f} s "
+          f"({total / 1e6 / elapsed:.1f} MB/s, {audio / elapsed:.0f}x tempo real no total)")
+
+
+if __name__ == "__main__":
+    main()
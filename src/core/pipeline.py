@@ -0,0 +1,179 @@
+"""
+src/core/pipeline.py
+
+Pipeline em dois estágios, ativado por hotword:
+
+    KWS_Listening (Porcupine, sempre ativo)
+        -- hotword --> ASR_Active (Vosk alimentado com pré-roll + fala)
+        -- endpoint do Vosk ou timeout --> KWS_Listening
+
+Enquanto nenhuma hotword é detectada, apenas o Porcupine processa o áudio; o
+KaldiRecognizer só recebe dados depois da ativação. Os últimos `preroll_ms` de
+áudio são guardados e reenviados ao Vosk na ativação para não perder as
+primeiras sílabas do comando.
+
+A entrada pode ter qualquer tamanho de bloco: um FrameAdapter reempacota o
+áudio, na mesma passada, em frames exatos do Porcupine (`frame_length`) e em
+blocos maiores para o Vosk (`CONFIG["recognition"]["block_samples"]`).
+
+O pipeline recebe os reconhecedores prontos (PorcupineRecognizer e
+VoskRecognizer, ou objetos com a mesma interface) e mede o ciclo de trabalho
+do ASR e o custo de CPU de cada estágio; as latências de parede vão para
+TELEMETRY (kws, asr_chunk, asr_final; ver src/core/telemetry.py).
+"""
+
+import time
+from collections import deque
+from typing import Optional
+
+from src.core.config import CONFIG
+from src.core.telemetry import TELEMETRY
+from src.audio.reframer import FrameAdapter
+
+KWS_LISTENING = "KWS_Listening"
+ASR_ACTIVE = "ASR_Active"
+
+
+class PipelineMetrics:
+    """Contadores de tempo de áudio e CPU por estágio."""
+
+    def __init__(self):
+        self.audio_seconds = 0.0
+        self.asr_audio_seconds = 0.0
+        self.kws_cpu_seconds = 0.0
+        self.asr_cpu_seconds = 0.0
+        self.activations = 0
+        self.endpoints = 0
+        self.timeouts = 0
+
+    def report(self) -> dict:
+        audio = self.audio_seconds or 1e-12
+        cpu = self.kws_cpu_seconds + self.asr_cpu_seconds
+        return {
+            "audio_seconds": self.audio_seconds,
+            "asr_audio_seconds": self.asr_audio_seconds,
+            # fração do tempo de áudio em que o Vosk esteve ativo
+            "duty_cycle": self.asr_audio_seconds / audio,
+            "kws_cpu_seconds": self.kws_cpu_seconds,
+            "asr_cpu_seconds": self.asr_cpu_seconds,
+            # segundos de CPU gastos por hora de áudio
+            "cpu_seconds_per_hour": cpu / audio * 3600.0,
+            "kws_cpu_seconds_per_hour": self.kws_cpu_seconds / audio * 3600.0,
+            "asr_cpu_seconds_per_hour": self.asr_cpu_seconds / audio * 3600.0,
+            "activations": self.activations,
+            "endpoints": self.endpoints,
+            "timeouts": self.timeouts,
+        }
+
+
+class HotwordPipeline:
+    """
+    Uso típico:
+        pipeline = HotwordPipeline(PorcupineRecognizer(), VoskRecognizer(model))
+        while True:
+            text = pipeline.feed(recorder.get_next_chunk())
+            if text:
+                print(parse_command(text))
+    """
+
+    def __init__(self, kws, asr,
+                 sample_rate: Optional[int] = None,
+                 preroll_ms: Optional[float] = None,
+                 asr_timeout_s: Optional[float] = None,
+                 asr_block_samples: Optional[int] = None):
+        cfg = CONFIG["pipeline"]
+        self.kws = kws
+        self.asr = asr
+        self.sample_rate = sample_rate or CONFIG["audio"]["samplerate"]
+        preroll_ms = cfg["preroll_ms"] if preroll_ms is None else preroll_ms
+        self.preroll_samples = int(self.sample_rate * preroll_ms / 1000.0)
+        self.asr_timeout_s = cfg["asr_timeout_s"] if asr_timeout_s is None else asr_timeout_s
+        self.frames = FrameAdapter(
+            kws=kws.frame_length,
+            asr=asr_block_samples or CONFIG["recognition"]["block_samples"],
+        )
+        self.state = KWS_LISTENING
+        self.metrics = PipelineMetrics()
+        self._preroll = deque()
+        self._preroll_len = 0
+        self._asr_elapsed = 0.0
+
+    def _remember(self, chunk: bytes, n_samples: int) -> None:
+        """Mantém apenas os últimos `preroll_samples` de áudio (em chunks inteiros)."""
+        if self.preroll_samples <= 0:
+            return
+        self._preroll.append(chunk)
+        self._preroll_len += n_samples
+        while self._preroll and self._preroll_len - len(self._preroll[0]) // 2 >= self.preroll_samples:
+            self._preroll_len -= len(self._preroll.popleft()) // 2
+
+    def _activate(self) -> Optional[str]:
+        self.state = ASR_ACTIVE
+        self.metrics.activations += 1
+        self._asr_elapsed = 0.0
+        self.asr.reset_session()
+        text = None
+        while self._preroll and text is None:
+            text = self.asr.accept_chunk(self._preroll.popleft())
+        self._preroll.clear()
+        self._preroll_len = 0
+        return text
+
+    def _deactivate(self) -> None:
+        self.state = KWS_LISTENING
+        self.frames.reset("kws")
+
+    def feed(self, chunk: bytes) -> Optional[str]:
+        """
+        Processa um chunk PCM16 de qualquer tamanho. Retorna o texto final
+        quando uma frase termina (endpoint do Vosk ou timeout), ou None.
+        """
+        text = None
+        for name, frame in self.frames.push(chunk):
+            if self.state == KWS_LISTENING and name == "kws":
+                text = self._feed_kws(frame.tobytes()) or text
+            elif self.state == ASR_ACTIVE and name == "asr":
+                text = self._feed_asr(frame.tobytes()) or text
+        return text
+
+    def _feed_kws(self, chunk: bytes) -> Optional[str]:
+        n_samples = len(chunk) // 2
+        self.metrics.audio_seconds += n_samples / self.sample_rate
+        self._remember(chunk, n_samples)
+        w0 = time.perf_counter()
+        t0 = time.thread_time()
+        index = self.kws.process_chunk(chunk)
+        t1 = time.thread_time()
+        TELEMETRY.observe("kws", time.perf_counter() - w0)
+        self.metrics.kws_cpu_seconds += t1 - t0
+        if index >= 0:
+            print(f"Hotword detectada (índice {index}). Ativando ASR...")
+            text = self._activate()
+            self.metrics.asr_cpu_seconds += time.thread_time() - t1
+            # a partir daqui os blocos do Vosk começam do zero
+            self.frames.reset("asr")
+            if text is not None:
+                self.metrics.endpoints += 1
+                self._deactivate()
+                return text or None
+        return None
+
+    def _feed_asr(self, chunk: bytes) -> Optional[str]:
+        duration = len(chunk) // 2 / self.sample_rate
+        self.metrics.audio_seconds += duration
+        self.metrics.asr_audio_seconds += duration
+        self._asr_elapsed += duration
+        w0 = time.perf_counter()
+        t0 = time.thread_time()
+        text = self.asr.accept_chunk(chunk)
+        if text is not None:
+            self.metrics.endpoints += 1
+        elif self._asr_elapsed >= self.asr_timeout_s:
+            self.metrics.timeouts += 1
+            text = self.asr.flush()
+        self.metrics.asr_cpu_seconds += time.thread_time() - t0
+        TELEMETRY.observe("asr_chunk" if text is None else "asr_final", time.perf_counter() - w0)
+        if text is not None:
+            self._deactivate()
+            return text or None
+        return None
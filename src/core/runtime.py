@@ -0,0 +1,508 @@
+"""
+src/core/runtime.py
+
+Runtime asyncio do assistente: cada etapa é uma task ligada à próxima por uma
+fila limitada.
+
+    captura -> [pré-processamento] -> reconhecimento (KWS + ASR) -> diálogo/NLP -> saída
+
+- Captura: source.read() (serial, replay, microfone) roda em uma thread de E/S
+  própria, então a leitura continua mesmo com o Vosk ocupado ou com um
+  diálogo em andamento.
+- Backpressure explícita: as filas internas bloqueiam o produtor (a pressão
+  volta até a fila da captura); na fila da captura a política é configurável:
+  "block" (arquivos, nada se perde) ou "drop_oldest" (ao vivo: descarta o áudio
+  mais antigo e conta). stats() informa ocupação máxima e descartes por fila.
+- Reconhecimento: chamadas bloqueantes do Vosk/Porcupine rodam em um executor
+  (por padrão de uma thread; pode ser compartilhado entre streams, ver
+  src/core/server.py). Cada stream tem no máximo uma chamada em andamento e
+  um lock próprio protege o reconhecedor.
+- Endpointer opcional (src/audio/endpointer.py): sem hotword, a VAD decide
+  onde começam e terminam as frases e o Vosk só recebe o áudio entre START e
+  END; o silêncio não passa pelo Kaldi.
+- Diálogo: máquina de estados em corrotina (src/core/dialogue.py). Quando só o
+  dispositivo é reconhecido, pergunta a ação e aguarda a próxima frase do
+  mesmo stream, com gramática mínima e timeout, sem um loop de leitura aninhado.
+
+    runtime = AsyncRuntime(FramedSource(SerialSource(porta)), VoskRecognizer(model))
+    asyncio.run(runtime.run())
+"""
+
+import asyncio
+import inspect
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from src.audio.endpointer import END, START, Endpointer
+from src.audio.preprocessor import frame_mean_square
+from src.audio.ring_buffer import BLOCK, DROP_OLDEST
+from src.core.config import CONFIG
+from src.core.dialogue import CONF_MIN, PERGUNTAR, PRONTO, completar, decidir, interpretar_resposta, opcoes_para
+from src.core.early_commit import EarlyCommitter
+from src.core.pipeline import ASR_ACTIVE
+from src.core.telemetry import TELEMETRY
+from src.nlp.grammar import choice_grammar
+from src.nlp.nlp import parse_command
+
+# marca o fim do stream ao longo das filas
+_END = None
+# quadro usado para achar o fim da fala dentro de um chunk (telemetria)
+_SPEECH_FRAME_MS = 10
+
+
+class StageQueue:
+    """asyncio.Queue limitada com política de estouro e contadores."""
+
+    def __init__(self, name: str, maxsize: int, policy: str = BLOCK):
+        if policy not in (BLOCK, DROP_OLDEST):
+            raise ValueError(f"Política de estouro desconhecida: {policy}")
+        self.name = name
+        self.policy = policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self.high_water = 0
+
+    async def put(self, item) -> None:
+        if item is not _END and self.policy == DROP_OLDEST:
+            while self.queue.full():
+                if self.queue.get_nowait() is _END:
+                    # nunca descarta o fim do stream
+                    self.queue.put_nowait(_END)
+                    return
+                self.dropped += 1
+            self.queue.put_nowait(item)
+        else:
+            await self.queue.put(item)
+        self.high_water = max(self.high_water, self.queue.qsize())
+
+    async def get(self):
+        return await self.queue.get()
+
+    def stats(self) -> dict:
+        return {"maxsize": self.queue.maxsize, "high_water": self.high_water, "dropped": self.dropped}
+
+
+class AsyncRuntime:
+    def __init__(self,
+                 source,
+                 asr,
+                 kws=None,
+                 preprocessor=None,
+                 pool=None,
+                 read_bytes: int = 4000,
+                 queue_size: int = 8,
+                 overflow: str = DROP_OLDEST,
+                 dialogue: bool = True,
+                 dialogue_grammar: bool = True,
+                 dialogue_timeout_s: float = 8.0,
+                 conf_min: float = CONF_MIN,
+                 on_command: Optional[Callable[[Dict[str, Any]], Any]] = None,
+                 verbose: bool = True,
+                 io_executor: Optional[Executor] = None,
+                 asr_executor: Optional[Executor] = None,
+                 name: str = "",
+                 early_commit: Optional[bool] = None,
+                 endpointer=None):
+        """
+        source: AudioSource (read(size), exhausted) de src/audio/sources.py.
+        asr: VoskRecognizer (ou objeto com accept_chunk/flush/reset_session).
+        kws: PorcupineRecognizer opcional; com ele o ASR só decodifica após a
+            hotword (HotwordPipeline), exceto durante um diálogo.
+        pool: RecognizerPool opcional; o diálogo usa um reconhecedor do pool com
+            a gramática mínima e o devolve no fim.
+        on_command: chamado (ou aguardado, se for corrotina) com cada resultado final.
+        io_executor / asr_executor: executores externos (compartilhados entre
+            streams); se omitidos, o runtime cria e encerra os seus.
+        early_commit: age sobre parciais estáveis (src/core/early_commit.py);
+            None = CONFIG["recognition"]["early_commit"]["enabled"].
+        endpointer: Endpointer (sem preprocessor: o áudio já chega processado),
+            True para um criado de CONFIG["recognition"]["endpointer"], ou None =
+            CONFIG. Não combina com `kws`, que já decide quando o ASR roda.
+        """
+        self.source = source
+        self.asr = asr
+        self.preprocessor = preprocessor
+        self.pool = pool
+        self.read_bytes = read_bytes
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.dialogue = dialogue
+        self.dialogue_grammar = dialogue_grammar
+        self.dialogue_timeout_s = dialogue_timeout_s
+        self.conf_min = conf_min
+        self.on_command = on_command
+        self.verbose = verbose
+        self.name = name
+        if early_commit is None:
+            early_commit = CONFIG["recognition"]["early_commit"]["enabled"]
+        self.early = EarlyCommitter() if early_commit and hasattr(asr, "partial") else None
+        if endpointer is None:
+            endpointer = CONFIG["recognition"]["endpointer"]["enabled"]
+        if endpointer is True:
+            cfg = {k: v for k, v in CONFIG["recognition"]["endpointer"].items() if k != "enabled"}
+            endpointer = Endpointer(sample_rate=source.sample_rate, **cfg)
+        self.endpointer: Optional[Endpointer] = endpointer or None
+        if self.endpointer is not None and kws is not None:
+            raise ValueError("endpointer e kws são alternativos: a hotword já controla o ASR")
+        # amostras que passaram pelo endpointer / que ele entregou ao Vosk
+        self.endpointer_samples = 0
+        self.speech_samples = 0
+        self.hotword = None
+        if kws is not None:
+            from src.core.pipeline import HotwordPipeline
+            self.hotword = HotwordPipeline(kws, asr)
+        self.commands = 0
+        self.dialogues = 0
+        self.dialogue_timeouts = 0
+        self._queues: Dict[str, StageQueue] = {}
+        self._in_dialogue = False
+        self._saved_recognizer = None
+        self._saved_grammar = None
+        self._loop = None
+        self._io = io_executor
+        self._cpu = asr_executor
+        self._owns_executors = io_executor is None, asr_executor is None
+        self._asr_lock = threading.Lock()
+        self.asr_calls = 0
+        self.asr_wait_seconds = 0.0
+        self.asr_max_wait_seconds = 0.0
+        self._last_speech: Optional[float] = None
+
+    def _log(self, *args) -> None:
+        if self.verbose:
+            print(*((f"[{self.name}]",) if self.name else ()), *args)
+
+    def _locked(self, submitted: float, fn, *args):
+        # espera na fila do executor: mede a justiça do escalonamento entre streams
+        wait = time.perf_counter() - submitted
+        with self._asr_lock:
+            self.asr_calls += 1
+            self.asr_wait_seconds += wait
+            self.asr_max_wait_seconds = max(self.asr_max_wait_seconds, wait)
+            return fn(*args)
+
+    def _call_asr(self, fn, *args):
+        return self._loop.run_in_executor(self._cpu, self._locked, time.perf_counter(), fn, *args)
+
+    # ---------- etapas ----------
+
+    async def _capture(self, out: StageQueue) -> None:
+        try:
+            while True:
+                t0 = time.perf_counter()
+                data = await self._loop.run_in_executor(self._io, self.source.read, self.read_bytes)
+                if not data:
+                    if self.source.exhausted:
+                        break
+                    continue
+                captured = time.perf_counter()
+                TELEMETRY.observe("capture", captured - t0)
+                # cada chunk segue pelas filas com o instante da captura
+                await out.put((data, captured))
+        finally:
+            await out.put(_END)
+
+    async def _preprocess(self, inp: StageQueue, out: StageQueue) -> None:
+        # leituras de tamanho ímpar (timeout da serial): a meia amostra que
+        # sobra vai para o começo do próximo chunk
+        odd = b""
+        while True:
+            item = await inp.get()
+            if item is not _END:
+                chunk, captured = item
+                if odd:
+                    chunk = odd + chunk
+                even = len(chunk) & ~1
+                odd = bytes(chunk[even:])
+                if not even:
+                    continue
+                chunk = chunk[:even]
+                item = chunk, captured
+            if item is not _END and self.preprocessor is not None:
+                with TELEMETRY.span("preprocess"):
+                    arr = self.preprocessor.process_array(np.frombuffer(chunk, dtype=np.int16))
+                    item = arr.astype(np.int16).tobytes(), captured
+            await out.put(item)
+            if item is _END:
+                return
+
+    def _recognize_chunk(self, chunk: bytes) -> Optional[str]:
+        """Texto final quando a frase fecha ("" se fechou vazia), ou None."""
+        # no diálogo a resposta não exige hotword: vai direto ao Vosk
+        if self.hotword is not None and not self._in_dialogue:
+            # o HotwordPipeline mede KWS e ASR por conta própria; ele devolve
+            # None também num endpoint/timeout vazio, que os contadores revelam
+            metrics = self.hotword.metrics
+            ends = metrics.endpoints + metrics.timeouts
+            text = self.hotword.feed(chunk)
+            if text is None and metrics.endpoints + metrics.timeouts != ends:
+                return ""
+            return text
+        if self.endpointer is not None:
+            return self._recognize_speech(chunk)
+        t0 = time.perf_counter()
+        text = self.asr.accept_chunk(chunk)
+        TELEMETRY.observe("asr_chunk" if text is None else "asr_final", time.perf_counter() - t0)
+        return text
+
+    def _recognize_speech(self, chunk: bytes) -> Optional[str]:
+        """Com endpointer: o Vosk só recebe o áudio das frases; END força o final."""
+        texts = []
+        ended = False
+        fed = 0
+        for event in self.endpointer.push(chunk):
+            if event.kind == START:
+                self.asr.reset_session()
+            if event.audio:
+                fed += len(event.audio) // 2
+                t0 = time.perf_counter()
+                text = self.asr.accept_chunk(event.audio)
+                TELEMETRY.observe("asr_chunk" if text is None else "asr_final", time.perf_counter() - t0)
+                if text is not None:
+                    texts.append(text)
+                    ended = True
+            if event.kind == END:
+                t0 = time.perf_counter()
+                texts.append(self.asr.flush())
+                TELEMETRY.observe("asr_final", time.perf_counter() - t0)
+                ended = True
+        self.endpointer_samples += len(chunk) // 2
+        self.speech_samples += fed
+        if not ended:
+            return None
+        return " ".join(t for t in texts if t)
+
+    def _recognize_with_partial(self, chunk: bytes):
+        """(texto final ou None, parcial ou None); o parcial só interessa ao commit antecipado."""
+        text = self._recognize_chunk(chunk)
+        if text is not None or self.early is None or self._in_dialogue:
+            return text, None
+        if self.hotword is not None and self.hotword.state != ASR_ACTIVE:
+            return None, None
+        if self.endpointer is not None and not self.endpointer.in_speech:
+            return None, None
+        return None, self.asr.partial() or None
+
+    def _track_speech(self, chunk: bytes, captured: float) -> None:
+        """Guarda o instante estimado do fim da última fala (em quadros de 10 ms)."""
+        arr = np.frombuffer(chunk, dtype=np.int16, count=len(chunk) // 2)
+        frame = max(1, self.source.sample_rate * _SPEECH_FRAME_MS // 1000)
+        if arr.size < frame:
+            return
+        voiced = np.flatnonzero(frame_mean_square(arr, frame) > TELEMETRY.speech_rms ** 2)
+        if voiced.size:
+            # o chunk termina em `captured`; a fala, `tail` amostras antes
+            tail = arr.size - (voiced[-1] + 1) * frame
+            self._last_speech = captured - tail / self.source.sample_rate
+
+    def _marks(self, captured: float) -> dict:
+        """Instantes da frase que acabou de fechar: fim da fala e texto final."""
+        marks = {"eos": self._last_speech if self._last_speech is not None else captured,
+                 "final": time.perf_counter()}
+        self._last_speech = None
+        return marks
+
+    async def _recognize(self, inp: StageQueue, out: StageQueue) -> None:
+        while True:
+            item = await inp.get()
+            if item is _END:
+                text = await self._call_asr(self.asr.flush)
+                if text:
+                    await out.put((text, self._marks(time.perf_counter())))
+                await out.put(_END)
+                return
+            chunk, captured = item
+            if TELEMETRY.enabled:
+                self._track_speech(chunk, captured)
+            text, partial = await self._call_asr(self._recognize_with_partial, chunk)
+            if text:
+                await out.put((text, self._marks(captured)))
+            elif text is not None and self.early is not None:
+                # frase fechada sem texto: o commit antecipado precisa saber que acabou
+                await out.put((text, self._marks(captured)))
+            elif partial:
+                eos = self._last_speech if self._last_speech is not None else captured
+                await out.put((partial, {"eos": eos, "final": time.perf_counter(), "partial": True}))
+
+    async def _decide(self, inp: StageQueue, out: StageQueue) -> None:
+        while True:
+            item = await inp.get()
+            if item is _END:
+                await out.put(_END)
+                return
+            text, marks = item
+            if marks.get("partial"):
+                with TELEMETRY.span("nlp_partial"):
+                    early = self.early.update(text)
+                if early is not None:
+                    self._log(f"Comando antecipado (parcial estável): '{text}'")
+                    await out.put(({"text": text, **early}, marks))
+                continue
+            if not text:
+                # endpoint vazio: encerra a frase do commit antecipado
+                if self.early is not None:
+                    self.early.final(text)
+                continue
+            self._log("Texto reconhecido:", text)
+            with TELEMETRY.span("nlp"):
+                nlp_raw = parse_command(text)
+            if self.early is not None and self.early.final(text, nlp_raw) is None:
+                self._log("Texto final confirma o comando antecipado; não repete.")
+                TELEMETRY.observe("early_saved", self.early.last_saved_seconds)
+                continue
+            if not self.dialogue:
+                await out.put(({"text": text, **nlp_raw}, marks))
+                continue
+            decisao, valor = decidir(nlp_raw, self.conf_min)
+            if decisao == PRONTO:
+                await out.put((valor, marks))
+            elif decisao == PERGUNTAR:
+                acao, fim, answer_marks = await self._ask(valor, inp)
+                # a latência do comando passa a contar a partir da resposta
+                await out.put((completar(nlp_raw, acao), answer_marks or marks))
+                if fim:
+                    await out.put(_END)
+                    return
+            else:
+                self._log("Confiança muito baixa e sem ação/dispositivo -> ignorando comando.")
+
+    async def _output(self, inp: StageQueue) -> None:
+        while True:
+            item = await inp.get()
+            if item is _END:
+                return
+            result, marks = item
+            self.commands += 1
+            self._log("Resultado NLP (final):", result)
+            if self.on_command is not None:
+                with TELEMETRY.span("output"):
+                    ret = self.on_command(result)
+                    if inspect.isawaitable(ret):
+                        await ret
+            if TELEMETRY.enabled:
+                done = time.perf_counter()
+                TELEMETRY.observe("final_to_action", done - marks["final"])
+                TELEMETRY.observe("eos_to_action", done - marks["eos"])
+
+    # ---------- diálogo ----------
+
+    def _enter_dialogue(self, grammar: Optional[str]) -> None:
+        """Roda no executor do ASR: troca para o reconhecedor/gramática do diálogo."""
+        self._in_dialogue = True
+        if self.pool is not None and hasattr(self.asr, "recognizer"):
+            rec = self.pool.acquire()
+            if grammar:
+                rec.SetGrammar(grammar)
+            self._saved_recognizer = self.asr.recognizer
+            self.asr.recognizer = rec
+        elif grammar and hasattr(self.asr, "set_grammar"):
+            self._saved_grammar = (self.asr.grammar,)
+            self.asr.set_grammar(grammar)
+        self.asr.reset_session()
+
+    def _leave_dialogue(self) -> None:
+        if self._saved_recognizer is not None:
+            rec, self.asr.recognizer = self.asr.recognizer, self._saved_recognizer
+            self._saved_recognizer = None
+            self.pool.release(rec)
+        elif self._saved_grammar is not None:
+            (grammar,), self._saved_grammar = self._saved_grammar, None
+            self.asr.set_grammar(grammar)
+        self.asr.reset_session()
+        self._in_dialogue = False
+
+    async def _ask(self, dispositivo: str, inp: StageQueue):
+        """
+        Pergunta a ação; retorna (ação ou None, True se o stream acabou,
+        instantes da resposta ou None).
+        """
+        self.dialogues += 1
+        opcao1, opcao2 = opcoes_para(dispositivo)
+        grammar = None
+        if self.dialogue_grammar:
+            grammar = choice_grammar((opcao1, opcao2), getattr(self.asr, "model", None))
+        self._log(f"O que você deseja fazer com {dispositivo}? Diga '{opcao1}' ou '{opcao2}' "
+                  f"(ou 'sim' para {opcao1} / 'não' para cancelar).")
+        await self._call_asr(self._enter_dialogue, grammar)
+        deadline = time.monotonic() + self.dialogue_timeout_s
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(inp.get(), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    self.dialogue_timeouts += 1
+                    self._log("Sem resposta, cancelando comando para esse dispositivo.")
+                    return None, False, None
+                if item is _END:
+                    return None, True, None
+                text, marks = item
+                if marks.get("partial") or not text:
+                    continue
+                self._log(f"Resposta reconhecida para ação: '{text}'")
+                entendeu, acao = interpretar_resposta(text, opcao1, opcao2)
+                if entendeu:
+                    return acao, False, marks
+                self._log("Não entendi a ação. Por favor, diga claramente", opcao1, "ou", opcao2, "ou 'sim'/'não'.")
+        finally:
+            await self._call_asr(self._leave_dialogue)
+
+    # ---------- execução ----------
+
+    async def run(self) -> dict:
+        """Executa até a fonte terminar (ou a task ser cancelada); retorna stats()."""
+        self._loop = asyncio.get_running_loop()
+        own_io, own_cpu = self._owns_executors
+        if own_io:
+            self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="captura")
+        if own_cpu:
+            self._cpu = ThreadPoolExecutor(max_workers=1, thread_name_prefix="asr")
+        q = self._queues = {
+            "captura": StageQueue("captura", self.queue_size, self.overflow),
+            "asr": StageQueue("asr", self.queue_size),
+            "texto": StageQueue("texto", self.queue_size),
+            "saida": StageQueue("saida", self.queue_size),
+        }
+        tasks = [
+            asyncio.create_task(self._capture(q["captura"]), name="captura"),
+            asyncio.create_task(self._preprocess(q["captura"], q["asr"]), name="pre"),
+            asyncio.create_task(self._recognize(q["asr"], q["texto"]), name="asr"),
+            asyncio.create_task(self._decide(q["texto"], q["saida"]), name="dialogo"),
+            asyncio.create_task(self._output(q["saida"]), name="saida"),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            # a thread de captura pode estar presa em read(); não espera por ela
+            if own_io:
+                self._io.shutdown(wait=False, cancel_futures=True)
+            if own_cpu:
+                self._cpu.shutdown(wait=True, cancel_futures=True)
+        return self.stats()
+
+    def stats(self) -> dict:
+        stats = {
+            "commands": self.commands,
+            "dialogues": self.dialogues,
+            "dialogue_timeouts": self.dialogue_timeouts,
+            "asr_calls": self.asr_calls,
+            "asr_mean_wait_ms": 1000 * self.asr_wait_seconds / self.asr_calls if self.asr_calls else 0.0,
+            "asr_max_wait_ms": 1000 * self.asr_max_wait_seconds,
+            "queues": {name: q.stats() for name, q in self._queues.items()},
+            "source": self.source.stats(),
+        }
+        if self.hotword is not None:
+            stats["pipeline"] = self.hotword.metrics.report()
+        if self.early is not None:
+            stats["early_commit"] = self.early.stats()
+        if self.endpointer is not None:
+            rate = self.source.sample_rate
+            # o pré-roll reenvia áudio já contado: o pulado é a diferença
+            skipped = max(0, self.endpointer_samples - self.speech_samples)
+            stats["endpointer"] = {"speech_s": self.speech_samples / rate, "skipped_s": skipped / rate}
+        return stats
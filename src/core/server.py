@@ -0,0 +1,192 @@
+"""
+src/core/server.py
+
+Servidor multi-stream: um único processo decodifica N fontes de áudio (portas
+seriais das ESP32, replays, sockets...) com um só vosk.Model carregado.
+
+- Modelo: carregado uma vez pelo ModelRegistry (ModelManager) e compartilhado
+  por todos os streams; cada stream tem apenas o seu KaldiRecognizer (via
+  VoskRecognizer) e o seu estado de NLP/diálogo (um AsyncRuntime por stream).
+- Workers: um pool de `workers` threads executa as chamadas do Vosk/Porcupine
+  de todos os streams. Cada stream mantém no máximo uma chamada pendente e o
+  pool atende em ordem de chegada, o que resulta em round-robin: um stream
+  muito ativo não passa na frente dos demais. stats() mostra a espera média e
+  máxima na fila por stream.
+- Captura: as leituras bloqueantes (serial) usam um executor de E/S separado,
+  com uma thread por stream, para nunca ocuparem os workers do ASR.
+- O diálogo de cada stream usa reconhecedores de um RecognizerPool
+  compartilhado (ele só cresce até o número de diálogos simultâneos).
+
+    server = MultiStreamServer(workers=2)
+    server.add_stream("sala", FramedSource(SerialSource("/dev/ttyACM0")))
+    server.add_stream("quarto", FramedSource(SerialSource("/dev/ttyACM1")))
+    asyncio.run(server.run())
+
+Linha de comando:
+    python -m src.core.server --serial /dev/ttyACM0 --serial /dev/ttyACM1 --workers 2
+    python -m src.core.server --replay sala.wav --replay quarto.wav --speed 0
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from src.core.runtime import AsyncRuntime
+from src.recognition.model_manager import REGISTRY, ModelManager
+
+
+class MultiStreamServer:
+    def __init__(self,
+                 model=None,
+                 model_path: Optional[str] = None,
+                 workers: Optional[int] = None,
+                 max_streams: int = 64,
+                 asr_factory: Optional[Callable[[Any], Any]] = None,
+                 kws_factory: Optional[Callable[[], Any]] = None,
+                 dialogue_pool=None,
+                 on_command: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+                 **runtime_options):
+        """
+        asr_factory(model) cria o reconhecedor de cada stream (padrão: VoskRecognizer).
+        kws_factory() cria um KWS por stream (ex.: PorcupineRecognizer); None = sem hotword.
+        on_command(nome_do_stream, resultado) recebe os comandos de todos os streams.
+        runtime_options são repassadas a cada AsyncRuntime (queue_size, overflow...).
+        """
+        self.model = model if model is not None else ModelManager(model_path).load_model()
+        self.workers = workers or os.cpu_count() or 1
+        self.max_streams = max_streams
+        if asr_factory is None:
+            from src.recognition.recognizer_pool import RecognizerPool
+            from src.recognition.vosk_recognizer import VoskRecognizer
+
+            asr_factory = VoskRecognizer
+            if dialogue_pool is None:
+                dialogue_pool = RecognizerPool(self.model, size=1)
+        self.asr_factory = asr_factory
+        self.kws_factory = kws_factory
+        self.dialogue_pool = dialogue_pool
+        self.on_command = on_command
+        self.runtime_options = runtime_options
+        self._io = ThreadPoolExecutor(max_workers=max_streams, thread_name_prefix="captura")
+        self._workers = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="asr")
+        self.streams: Dict[str, AsyncRuntime] = {}
+        self.finished: Dict[str, dict] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._changed: Optional[asyncio.Event] = None
+
+    def _command_handler(self, name: str):
+        if self.on_command is None:
+            return None
+        return lambda result: self.on_command(name, result)
+
+    def add_stream(self, name: str, source, **options) -> AsyncRuntime:
+        """Registra uma fonte; se o servidor já estiver rodando, ela começa na hora."""
+        if name in self.streams:
+            raise ValueError(f"Stream já registrado: {name}")
+        if len(self.streams) >= self.max_streams:
+            raise RuntimeError(f"Limite de {self.max_streams} streams atingido")
+        runtime = AsyncRuntime(
+            source,
+            self.asr_factory(self.model),
+            kws=self.kws_factory() if self.kws_factory else None,
+            pool=self.dialogue_pool,
+            on_command=self._command_handler(name),
+            io_executor=self._io,
+            asr_executor=self._workers,
+            name=name,
+            **{**self.runtime_options, **options},
+        )
+        self.streams[name] = runtime
+        if self._changed is not None:
+            self._start(name)
+        return runtime
+
+    def _start(self, name: str) -> None:
+        self._tasks[name] = asyncio.create_task(self.streams[name].run(), name=f"stream-{name}")
+        self._changed.set()
+
+    async def _finish(self, name: str, task: asyncio.Task) -> None:
+        runtime = self.streams.pop(name)
+        try:
+            self.finished[name] = task.result()
+        except Exception as e:
+            print(f"[MultiStreamServer] stream '{name}' terminou com erro: {e!r}")
+            self.finished[name] = {**runtime.stats(), "error": repr(e)}
+        runtime.source.close()
+
+    async def run(self, forever: bool = False) -> dict:
+        """
+        Roda todos os streams até terminarem (ou, com forever=True, até ser
+        cancelado, aceitando streams novos via add_stream). Retorna stats().
+        """
+        self._changed = asyncio.Event()
+        for name in self.streams:
+            self._start(name)
+        try:
+            while self._tasks or forever:
+                self._changed.clear()
+                changed = asyncio.create_task(self._changed.wait())
+                done, _ = await asyncio.wait(list(self._tasks.values()) + [changed],
+                                             return_when=asyncio.FIRST_COMPLETED)
+                changed.cancel()
+                for name, task in list(self._tasks.items()):
+                    if task in done:
+                        del self._tasks[name]
+                        await self._finish(name, task)
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self._tasks.clear()
+            self._changed = None
+            self._io.shutdown(wait=False, cancel_futures=True)
+            self._workers.shutdown(wait=True, cancel_futures=True)
+        return self.stats()
+
+    def stats(self) -> dict:
+        streams = {name: runtime.stats() for name, runtime in self.streams.items()}
+        streams.update(self.finished)
+        stats = {"workers": self.workers, "active_streams": len(self.streams), "streams": streams,
+                 "models": {f"{kind}:{path}": s for (kind, path), s in REGISTRY.stats().items()}}
+        if self.dialogue_pool is not None:
+            stats["dialogue_pool"] = self.dialogue_pool.stats()
+        return stats
+
+
+def main():
+    import argparse
+    import json
+
+    from src.audio.sources import FramedSource, SerialSource, WavReplaySource
+
+    parser = argparse.ArgumentParser(description="Decodifica vários nós ESP32 com um único modelo Vosk.")
+    parser.add_argument("--serial", action="append", default=[], metavar="PORTA")
+    parser.add_argument("--replay", action="append", default=[], metavar="WAV",
+                        help="simula um nó reproduzindo o WAV (um stream por arquivo)")
+    parser.add_argument("--baud", type=int, default=230400)
+    parser.add_argument("--raw", action="store_true", help="PCM sem pacotes (firmware antigo)")
+    parser.add_argument("--speed", type=float, default=1.0, help="(replay) 1 = tempo real; 0 = sem ritmo")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--model", default=None)
+    args = parser.parse_args()
+
+    server = MultiStreamServer(model_path=args.model, workers=args.workers,
+                               on_command=lambda name, result: print(f"[{name}] →", result))
+    sources = [(os.path.basename(port), SerialSource(port, args.baud)) for port in args.serial]
+    sources += [(os.path.splitext(os.path.basename(path))[0],
+                 WavReplaySource([path], speed=args.speed, framed=not args.raw)) for path in args.replay]
+    if not sources:
+        parser.error("informe ao menos uma --serial ou --replay")
+    for name, source in sources:
+        server.add_stream(name, source if args.raw else FramedSource(source))
+
+    try:
+        stats = asyncio.run(server.run())
+    except KeyboardInterrupt:
+        stats = server.stats()
+    print(json.dumps(stats, indent=2, ensure_ascii=False, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+src/core/telemetry.py
+
+Instrumentação leve do pipeline: histogramas de latência com baldes fixos
+(observe = um bisect e três somas) e spans com relógio monotônico
+(time.perf_counter). O runtime registra, por chunk e por frase:
+
+    capture_seconds        espera + leitura da fonte
+    preprocess_seconds     AudioPreprocessor
+    kws_seconds            Porcupine (HotwordPipeline)
+    asr_chunk_seconds      Vosk, chunk sem fim de frase
+    asr_final_seconds      Vosk, chunk que fechou a frase (inclui Result())
+    nlp_seconds            parse_command
+    output_seconds         on_command (envio do comando)
+    final_to_action_seconds  texto final -> comando executado
+    eos_to_action_seconds  fim da fala -> comando executado (SLA principal)
+
+"Fim da fala" é o fim do último chunk com energia acima de
+CONFIG["telemetry"]["speech_rms"] antes do texto final, pelo instante em que
+foi capturado; a medida inclui, portanto, o silêncio que o endpoint do Vosk
+espera.
+
+Desligado (CONFIG["telemetry"]["enabled"] = False ou TELEMETRY.enabled =
+False), span() devolve um objeto nulo compartilhado e observe() retorna na
+primeira linha: o custo é uma checagem de atributo.
+
+Exportação: to_prometheus() gera o formato texto do Prometheus;
+MetricsExporter grava esse texto periodicamente num arquivo (substituição
+atômica) e/ou o serve em http://host:porta/metrics.
+
+    with TELEMETRY.span("nlp"):
+        result = parse_command(text)
+    print(TELEMETRY.snapshot()["nlp_seconds"]["p99_ms"])
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Optional, Sequence
+
+from src.core.config import CONFIG
+
+# de 0,5 ms a 10 s: cobre de um chunk do Porcupine ao fim de fala -> ação
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 10.0)
+
+
+class Histogram:
+    """Histograma cumulativo no estilo Prometheus (valores em segundos)."""
+
+    def __init__(self, name: str, buckets: Sequence[float] = DEFAULT_BUCKETS, help: str = ""):
+        self.name = name
+        self.help = help
+        self.bounds = tuple(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += value
+            if value > self.max:
+                self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimativa por interpolação linear dentro do balde (como histogram_quantile)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max
+                return min(self.max, lower + (upper - lower) * (rank - seen) / n)
+            seen += n
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": 1000 * self.sum / self.count if self.count else 0.0,
+            "p50_ms": 1000 * self.quantile(0.5),
+            "p90_ms": 1000 * self.quantile(0.9),
+            "p99_ms": 1000 * self.quantile(0.99),
+            "max_ms": 1000 * self.max,
+        }
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("histogram", "t0")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.t0)
+        return False
+
+
+class Telemetry:
+    def __init__(self, enabled: Optional[bool] = None, prefix: str = "assistente",
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        cfg = CONFIG["telemetry"]
+        self.enabled = cfg["enabled"] if enabled is None else enabled
+        self.prefix = prefix
+        self.buckets = tuple(buckets)
+        self.speech_rms = cfg["speech_rms"]
+        self.histograms: Dict[str, Histogram] = {}
+        self._by_name: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help: str = "") -> Histogram:
+        """Histograma `<name>_seconds`, criado no primeiro uso."""
+        hist = self._by_name.get(name)
+        if hist is None:
+            key = f"{name}_seconds"
+            with self._lock:
+                hist = self.histograms.setdefault(key, Histogram(key, self.buckets, help))
+                self._by_name[name] = hist
+        return hist
+
+    def span(self, name: str):
+        """Context manager que mede a duração do bloco em `<name>_seconds`."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self.histogram(name))
+
+    def observe(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        self.histogram(name).observe(seconds)
+
+    def since(self, name: str, t0: float) -> None:
+        """Registra perf_counter() - t0 (t0 de um instante anterior, ex.: captura)."""
+        if not self.enabled:
+            return
+        self.histogram(name).observe(time.perf_counter() - t0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.histograms.clear()
+            self._by_name.clear()
+
+    def _sorted_histograms(self) -> list:
+        # cópia sob o lock: histogram() pode criar um novo em outra thread
+        with self._lock:
+            items = list(self.histograms.items())
+        return sorted(items)
+
+    def snapshot(self) -> Dict[str, dict]:
+        return {name: hist.snapshot() for name, hist in self._sorted_histograms()}
+
+    def to_prometheus(self) -> str:
+        lines = []
+        for name, hist in self._sorted_histograms():
+            metric = f"{self.prefix}_{name}"
+            if hist.help:
+                lines.append(f"# HELP {metric} {hist.help}")
+            lines.append(f"# TYPE {metric} histogram")
+            with hist._lock:
+                counts, total, count = list(hist.counts), hist.sum, hist.count
+            cumulative = 0
+            for bound, n in zip(hist.bounds, counts):
+                cumulative += n
+                lines.append(f'{metric}_bucket{{le="{bound:g}"}} {cumulative}')
+            lines.append(f'{metric}_bucket{{le="+Inf"}} {count}')
+            lines.append(f"{metric}_sum {total:.6f}")
+            lines.append(f"{metric}_count {count}")
+        return "\n".join(lines) + "\n"
+
+
+TELEMETRY = Telemetry()
+
+
+class MetricsExporter:
+    """
+    Publica TELEMETRY.to_prometheus(): num arquivo a cada `interval_s`
+    (ex.: para o textfile collector do node_exporter) e/ou por HTTP em /metrics.
+    """
+
+    def __init__(self, telemetry: Telemetry = TELEMETRY,
+                 path: Optional[str] = None,
+                 port: Optional[int] = None,
+                 host: str = "127.0.0.1",
+                 interval_s: Optional[float] = None):
+        cfg = CONFIG["telemetry"]
+        self.telemetry = telemetry
+        self.path = path
+        self.port = port
+        self.host = host
+        self.interval_s = cfg["interval_s"] if interval_s is None else interval_s
+        self.exports = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._httpd = None
+
+    @classmethod
+    def from_config(cls, telemetry: Telemetry = TELEMETRY) -> Optional["MetricsExporter"]:
+        cfg = CONFIG["telemetry"]
+        if not telemetry.enabled or (cfg["export_path"] is None and cfg["http_port"] is None):
+            return None
+        return cls(telemetry, path=cfg["export_path"], port=cfg["http_port"]).start()
+
+    def write(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.telemetry.to_prometheus())
+        os.replace(tmp, self.path)
+        self.exports += 1
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"[MetricsExporter] Erro ao exportar métricas: {e}")
+
+    def start(self) -> "MetricsExporter":
+        if self.path is not None:
+            self._thread = threading.Thread(target=self._loop, name="metrics-export", daemon=True)
+            self._thread.start()
+        if self.port is not None:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            telemetry = self.telemetry
+
+            class Handler(BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = telemetry.to_prometheus().encode()
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, *args):
+                    pass
+
+            self._httpd = ThreadingHTTPServer((self.host, self.port), Handler)
+            self.port = self._httpd.server_address[1]
+            threading.Thread(target=self._httpd.serve_forever, name="metrics-http", daemon=True).start()
+            print(f"[MetricsExporter] métricas em http://{self.host}:{self.port}/metrics")
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self.write()
+        if self._httpd is not None:
+            self._httpd.shutdown()
+            self._httpd.server_close()
@@ -0,0 +1,303 @@
+"""
+src/model/history.py
+
+Histórico consultável dos comandos: SQLite em modo WAL, com índices por
+timestamp, intent, ação e dispositivo. Responde em milissegundos perguntas
+como "quantas vezes a luz da sala foi ligada nesta semana", sem abrir os
+arquivos de log.
+
+Ingestão em lote e fora do caminho crítico:
+- ao vivo: history.attach(command_log) registra insert_many como destino do
+  CommandLog (src/model/jsonwriter.py), que a chama na thread do escritor com
+  cada lote já gravado, numa única transação;
+- retroativa: import_log() lê os JSON lines (inclusive .gz) e os arquivos
+  antigos cmd_*.json do JsonWriter, de forma incremental (guarda até onde
+  cada arquivo foi lido). Registros repetidos são ignorados.
+
+    history = CommandHistory()
+    history.count(dispositivo="luz_sala", acao="ligar", since="7d")
+    history.aggregate(by=("dispositivo",), bucket="day", since="30d")
+
+Linha de comando:
+    python -m src.model.history import
+    python -m src.model.history count --dispositivo luz_sala --acao ligar --since 7d
+    python -m src.model.history top --by dispositivo acao --since 30d
+    python -m src.model.history timeline --bucket day --dispositivo luz_sala
+    python -m src.model.history list --limit 20
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from src.core.config import CONFIG
+from src.model.jsonwriter import _project_path
+
+# colunas que podem ser filtradas/agrupadas
+COLUMNS = ("intent", "acao", "dispositivo")
+BUCKETS = {"hour": "%Y-%m-%d %H:00", "day": "%Y-%m-%d", "week": "%Y-%W", "month": "%Y-%m"}
+_UNITS = {"m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS commands (
+    id INTEGER PRIMARY KEY,
+    key INTEGER NOT NULL UNIQUE,
+    ts REAL NOT NULL,
+    intent TEXT,
+    acao TEXT,
+    dispositivo TEXT,
+    confidence REAL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_commands_ts ON commands (ts);
+CREATE INDEX IF NOT EXISTS idx_commands_intent ON commands (intent, ts);
+CREATE INDEX IF NOT EXISTS idx_commands_acao ON commands (acao, ts);
+CREATE INDEX IF NOT EXISTS idx_commands_dispositivo ON commands (dispositivo, acao, ts);
+CREATE TABLE IF NOT EXISTS imported (
+    path TEXT PRIMARY KEY,
+    offset INTEGER NOT NULL
+);
+"""
+
+Instant = Union[None, float, int, str, datetime]
+
+
+def to_timestamp(value: Instant, now: Optional[float] = None) -> Optional[float]:
+    """
+    Converte um instante para epoch (s): número, datetime, ISO 8601
+    ("2026-03-01", "2026-03-01T08:00") ou relativo ao agora ("90m", "24h", "7d", "2w").
+    """
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, datetime):
+        return value.timestamp()
+    text = value.strip()
+    if text[:-1].isdigit() and text[-1:] in _UNITS:
+        return (time.time() if now is None else now) - int(text[:-1]) * _UNITS[text[-1]]
+    return datetime.fromisoformat(text).timestamp()
+
+
+def _row(record: Dict[str, Any]) -> Tuple:
+    entities = record.get("entities") or {}
+    text = json.dumps(record, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+    # o registro inclui o timestamp (µs): o mesmo hash = o mesmo comando
+    key = int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big", signed=True)
+    return (key, datetime.fromisoformat(record["timestamp"]).timestamp(), record.get("intent"),
+            entities.get("acao"), entities.get("dispositivo"), record.get("confidence"), text)
+
+
+class CommandHistory:
+    def __init__(self, path: Optional[str] = None):
+        """path: arquivo SQLite (padrão CONFIG["history"]["path"]); ":memory:" para testes."""
+        path = path or CONFIG["history"]["path"]
+        if path != ":memory:":
+            path = _project_path(path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        # uma conexão protegida por lock: o escritor do log e as consultas podem estar em threads diferentes
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.inserted = 0
+        self.duplicates = 0
+
+    # ---------- ingestão ----------
+
+    def insert_many(self, records: Iterable[Dict[str, Any]], _imported: Sequence[Tuple[str, int]] = ()) -> int:
+        """Insere um lote numa transação; retorna quantos registros eram novos."""
+        rows = [_row(r) for r in records if r and r.get("timestamp")]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO commands (key, ts, intent, acao, dispositivo, confidence, record) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                new = self._conn.total_changes - before
+                self._conn.executemany("INSERT OR REPLACE INTO imported (path, offset) VALUES (?, ?)", _imported)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        self.inserted += new
+        self.duplicates += len(rows) - new
+        return new
+
+    def attach(self, command_log) -> None:
+        """Passa a receber cada lote gravado pelo CommandLog."""
+        command_log.add_sink(self.insert_many)
+
+    def _offsets(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT path, offset FROM imported"))
+
+    def import_log(self, output_dir: Optional[str] = None, batch: int = 10000) -> int:
+        """Importa (incrementalmente) o log em JSON lines e os cmd_*.json antigos."""
+        output_dir = _project_path(output_dir or CONFIG["command_log"]["dir"])
+        offsets = self._offsets()
+        new = 0
+        for path in sorted(glob.glob(os.path.join(output_dir, "commands_*.jsonl"))):
+            with open(path, "rb") as f:
+                f.seek(offsets.get(path, 0))
+                data = f.read()
+            # só linhas completas; o resto fica para a próxima importação
+            end = data.rfind(b"\n") + 1
+            lines = data[:end].splitlines()
+            offset = offsets.get(path, 0) + end
+            for i in range(0, len(lines), batch):
+                last = i + batch >= len(lines)
+                new += self.insert_many((json.loads(line) for line in lines[i:i + batch]),
+                                        [(path, offset)] if last else ())
+        for path in sorted(glob.glob(os.path.join(output_dir, "commands_*.jsonl.gz"))):
+            size = os.path.getsize(path)
+            if offsets.get(path) == size:
+                continue
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                records = [json.loads(line) for line in f if line.endswith("\n")]
+            new += self.insert_many(records, [(path, size)])
+        legacy = [p for p in glob.glob(os.path.join(output_dir, "cmd_*.json")) if p not in offsets]
+        for i in range(0, len(legacy), batch):
+            records = []
+            for path in legacy[i:i + batch]:
+                with open(path, encoding="utf-8") as f:
+                    records.append(json.load(f))
+            new += self.insert_many(records, [(p, os.path.getsize(p)) for p in legacy[i:i + batch]])
+        return new
+
+    # ---------- consultas ----------
+
+    @staticmethod
+    def _where(since: Instant, until: Instant, filters: Dict[str, Any]) -> Tuple[str, list]:
+        clauses, params = [], []
+        for column, value in filters.items():
+            if column not in COLUMNS:
+                raise ValueError(f"Filtro desconhecido: {column} (use {', '.join(COLUMNS)})")
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(to_timestamp(since))
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(to_timestamp(until))
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _fetch(self, sql: str, params) -> list:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def count(self, since: Instant = None, until: Instant = None, **filters) -> int:
+        where, params = self._where(since, until, filters)
+        return self._fetch(f"SELECT COUNT(*) FROM commands{where}", params)[0][0]
+
+    def query(self, since: Instant = None, until: Instant = None, limit: Optional[int] = 100,
+              newest_first: bool = True, **filters) -> List[Dict[str, Any]]:
+        """Registros completos (como gravados no log), por ordem de tempo."""
+        where, params = self._where(since, until, filters)
+        sql = f"SELECT record FROM commands{where} ORDER BY ts {'DESC' if newest_first else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [json.loads(record) for (record,) in self._fetch(sql, params)]
+
+    def aggregate(self, by: Sequence[str] = ("dispositivo",), bucket: Optional[str] = None,
+                  since: Instant = None, until: Instant = None, **filters) -> List[Dict[str, Any]]:
+        """
+        Contagens agrupadas por colunas e/ou por intervalo de tempo (bucket:
+        hour, day, week, month, em hora local). Sem bucket, ordena pela
+        contagem; com bucket, pelo tempo.
+        """
+        keys = list(by)
+        for column in keys:
+            if column not in COLUMNS:
+                raise ValueError(f"Agrupamento desconhecido: {column}")
+        select = list(keys)
+        if bucket is not None:
+            if bucket not in BUCKETS:
+                raise ValueError(f"Intervalo desconhecido: {bucket} (use {', '.join(BUCKETS)})")
+            select.insert(0, f"strftime('{BUCKETS[bucket]}', ts, 'unixepoch', 'localtime') AS bucket")
+            keys.insert(0, "bucket")
+        where, params = self._where(since, until, filters)
+        group = f" GROUP BY {', '.join(keys)}" if keys else ""
+        order = " ORDER BY bucket, n DESC" if bucket is not None else " ORDER BY n DESC"
+        sql = f"SELECT {', '.join(select + ['COUNT(*) AS n'])} FROM commands{where}{group}{order}"
+        return [{**dict(zip(keys, row[:-1])), "count": row[-1]} for row in self._fetch(sql, params)]
+
+    def stats(self) -> dict:
+        rows, first, last = self._fetch("SELECT COUNT(*), MIN(ts), MAX(ts) FROM commands", [])[0]
+        return {
+            "path": self.path,
+            "rows": rows,
+            "first": datetime.fromtimestamp(first).isoformat() if first else None,
+            "last": datetime.fromtimestamp(last).isoformat() if last else None,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Consultas ao histórico de comandos.")
+    parser.add_argument("--db", default=None, help="arquivo SQLite (padrão: CONFIG['history']['path'])")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="importa o log de comandos (incremental)")
+    imp.add_argument("--logs", default=None, help="diretório do log (padrão: command_logs/)")
+    commands = {name: sub.add_parser(name, help=text) for name, text in (
+        ("count", "conta comandos"), ("top", "contagem agrupada"),
+        ("timeline", "contagem por intervalo de tempo"), ("list", "últimos comandos"))}
+    for p in commands.values():
+        for column in COLUMNS:
+            p.add_argument(f"--{column}")
+        p.add_argument("--since", help="ISO 8601 ou relativo: 24h, 7d, 2w")
+        p.add_argument("--until")
+    commands["top"].add_argument("--by", nargs="+", default=["dispositivo"], choices=COLUMNS)
+    commands["timeline"].add_argument("--by", nargs="*", default=[], choices=COLUMNS)
+    commands["timeline"].add_argument("--bucket", default="day", choices=list(BUCKETS))
+    commands["list"].add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    with CommandHistory(args.db) as history:
+        if args.cmd == "import":
+            t0 = time.perf_counter()
+            new = history.import_log(args.logs)
+            print(f"{new} comandos novos em {time.perf_counter() - t0:.2f} s;", history.stats())
+            return
+        filters = {column: getattr(args, column) for column in COLUMNS}
+        t0 = time.perf_counter()
+        if args.cmd == "count":
+            result = [history.count(args.since, args.until, **filters)]
+        elif args.cmd == "top":
+            result = history.aggregate(args.by, None, args.since, args.until, **filters)
+        elif args.cmd == "timeline":
+            result = history.aggregate(args.by, args.bucket, args.since, args.until, **filters)
+        else:
+            result = history.query(args.since, args.until, limit=args.limit, **filters)
+        elapsed = (time.perf_counter() - t0) * 1000
+        for item in result:
+            print(json.dumps(item, ensure_ascii=False) if isinstance(item, dict) else item)
+        print(f"({elapsed:.2f} ms)")
+
+
+if __name__ == "__main__":
+    main()
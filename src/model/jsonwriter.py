@@ -1,7 +1,291 @@
+"""
+src/model/jsonwriter.py
+
+Registro dos comandos finais do NLP em disco.
+
+- CommandLog: log append-only em JSON lines (um arquivo por dia,
+  commands_AAAAMMDD.jsonl). save_command() só serializa e enfileira; uma thread
+  escreve em lotes (por tamanho ou tempo), com fsync configurável, rotação
+  diária e compressão opcional (gzip) dos dias anteriores. Comandos no mesmo
+  segundo nunca se sobrescrevem.
+  Destinos extras (add_sink) recebem cada lote gravado, na mesma thread; é
+  assim que o histórico consultável (src/model/history.py) é alimentado.
+- JsonWriter: formato antigo, um arquivo JSON indentado por comando (mantido
+  para compatibilidade e como referência no benchmark).
+
+    log = CommandLog()
+    log.save_command(parse_command("liga a luz da sala"))
+    ...
+    log.close()
+    for record in read_log(log.output_dir):
+        print(record["timestamp"], record["intent"])
+"""
+
+import glob
+import gzip
 import json
 import os
+import queue
+import shutil
+import threading
+import time
 from datetime import datetime
-from typing import Dict, Any
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from src.core.config import CONFIG
+
+FSYNC_POLICIES = ("never", "batch", "always")
+
+# marcadores na fila do escritor
+_STOP = object()
+_TICK = object()
+
+
+def _project_path(output_dir: str) -> str:
+    """Caminhos relativos são resolvidos a partir da raiz do projeto."""
+    base_path = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    return os.path.join(base_path, output_dir)
+
+
+class CommandLog:
+    def __init__(self,
+                 output_dir: Optional[str] = None,
+                 flush_bytes: Optional[int] = None,
+                 flush_interval_s: Optional[float] = None,
+                 fsync: Optional[str] = None,
+                 compress: Optional[bool] = None,
+                 max_pending: int = 100000,
+                 clock: Callable[[], datetime] = datetime.now):
+        """
+        flush_bytes / flush_interval_s: o lote pendente é gravado (uma única
+            escrita) quando atinge flush_bytes ou quando o comando mais antigo
+            espera flush_interval_s.
+        fsync: 'never', 'batch' (após cada lote) ou 'always' (cada comando é
+            gravado e sincronizado sozinho).
+        max_pending: comandos aguardando o escritor; além disso save_command
+            descarta (e conta) em vez de bloquear o reconhecimento.
+        """
+        cfg = CONFIG["command_log"]
+        self.output_dir = _project_path(output_dir or cfg["dir"])
+        self.flush_bytes = cfg["flush_bytes"] if flush_bytes is None else flush_bytes
+        self.flush_interval_s = cfg["flush_interval_s"] if flush_interval_s is None else flush_interval_s
+        self.fsync = fsync or cfg["fsync"]
+        if self.fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync desconhecida: {self.fsync}")
+        self.compress = cfg["compress"] if compress is None else compress
+        self.clock = clock
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self._file = None
+        self._day: Optional[str] = None
+        self.records = 0
+        self.batches = 0
+        self.bytes_written = 0
+        self.fsyncs = 0
+        self.rotations = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_batch = 0
+        self.sink_errors = 0
+        self._sinks = []
+        self._thread = threading.Thread(target=self._run, name="command-log", daemon=True)
+        self._thread.start()
+
+    def add_sink(self, sink: Callable[[list], Any]) -> None:
+        """
+        sink(registros) é chamado na thread do escritor com cada lote já
+        gravado (lista de dicts, com timestamp); ex.: CommandHistory.insert_many.
+        """
+        self._sinks.append(sink)
+
+    def path_for(self, day: str) -> str:
+        return os.path.join(self.output_dir, f"commands_{day}.jsonl")
+
+    # ---------- lado de quem chama (thread do reconhecimento) ----------
+
+    def save_command(self, nlp_data: Dict[str, Any]) -> bool:
+        """
+        Registra o comando sem tocar no disco. Retorna False se foi descartado
+        (vazio ou fila cheia).
+        """
+        if not nlp_data:
+            return False
+        timestamp = self.clock()
+        record = dict(nlp_data)
+        record["timestamp"] = timestamp.isoformat()
+        # serializa aqui: o chamador pode alterar o dicionário depois
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        try:
+            self._queue.put_nowait((timestamp.strftime("%Y%m%d"), line))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera tudo o que já foi enfileirado chegar ao arquivo. False se o
+        tempo acabou, ou se o log já foi fechado com comandos pendentes.
+        """
+        if not self._thread.is_alive():
+            # sem escritor ninguém sinalizaria o evento
+            return self._queue.empty()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- thread do escritor ----------
+
+    def _run(self) -> None:
+        pending = []
+        pending_bytes = 0
+        pending_day = None
+        oldest = 0.0
+        while True:
+            timeout = None if not pending else max(0.0, oldest + self.flush_interval_s - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = _TICK
+            if isinstance(item, tuple):
+                day, line = item
+                # um lote nunca mistura dois dias
+                if pending and day != pending_day:
+                    self._write(pending_day, pending)
+                    pending, pending_bytes = [], 0
+                if not pending:
+                    oldest = time.monotonic()
+                    pending_day = day
+                pending.append(line)
+                pending_bytes += len(line)
+                if self.fsync == "always" or pending_bytes >= self.flush_bytes:
+                    self._write(pending_day, pending)
+                    pending, pending_bytes = [], 0
+                continue
+            if pending:
+                self._write(pending_day, pending)
+                pending, pending_bytes = [], 0
+            if item is _STOP:
+                break
+            if isinstance(item, threading.Event):
+                item.set()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write(self, day: str, lines) -> None:
+        try:
+            if day != self._day:
+                self._rotate(day)
+            data = "".join(lines).encode("utf-8")
+            # arquivo sem buffer: um lote = uma chamada write()
+            self._file.write(data)
+            if self.fsync != "never":
+                os.fsync(self._file.fileno())
+                self.fsyncs += 1
+        except Exception as e:
+            self.errors += 1
+            print(f"[CommandLog] Erro ao gravar {len(lines)} comando(s): {e}")
+            return
+        self.records += len(lines)
+        self.batches += 1
+        self.bytes_written += len(data)
+        self.max_batch = max(self.max_batch, len(lines))
+        if self._sinks:
+            records = [json.loads(line) for line in lines]
+            for sink in self._sinks:
+                try:
+                    sink(records)
+                except Exception as e:
+                    self.sink_errors += 1
+                    print(f"[CommandLog] Erro no destino {sink!r}: {e}")
+
+    def _rotate(self, day: str) -> None:
+        if self._file is not None:
+            self._file.close()
+            self.rotations += 1
+        self._file = open(self.path_for(day), "ab", buffering=0)
+        self._day = day
+        if self.compress:
+            self._compress_before(day)
+
+    def _compress_before(self, day: str) -> None:
+        """
+        Compacta os arquivos de dias anteriores (inclusive de execuções passadas).
+
+        O .gz novo (o antigo do dia, se houver, mais o .jsonl) é montado em
+        `.gz.tmp`; apagar o .jsonl é o ponto de confirmação e só então o
+        temporário substitui o .gz. Uma queda no meio deixa um .tmp que a
+        próxima rotação descarta (o .jsonl ainda existe) ou instala (o .jsonl
+        já foi apagado), sem gravar o mesmo dia duas vezes.
+        """
+        for tmp in glob.glob(os.path.join(self.output_dir, "commands_*.jsonl.gz.tmp")):
+            gz = tmp[:-len(".tmp")]
+            if os.path.exists(gz[:-len(".gz")]):
+                os.remove(tmp)
+            else:
+                os.replace(tmp, gz)
+        for path in glob.glob(os.path.join(self.output_dir, "commands_*.jsonl")):
+            if os.path.basename(path)[len("commands_"):-len(".jsonl")] < day:
+                gz = path + ".gz"
+                tmp = gz + ".tmp"
+                with open(tmp, "wb") as raw:
+                    # membros gzip concatenados formam um .gz válido
+                    if os.path.exists(gz):
+                        with open(gz, "rb") as old:
+                            shutil.copyfileobj(old, raw)
+                    with open(path, "rb") as src, gzip.GzipFile(fileobj=raw, mode="wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                    if self.fsync != "never":
+                        raw.flush()
+                        os.fsync(raw.fileno())
+                os.remove(path)
+                os.replace(tmp, gz)
+
+    def stats(self) -> dict:
+        return {
+            "records": self.records,
+            "batches": self.batches,
+            "bytes_written": self.bytes_written,
+            "fsyncs": self.fsyncs,
+            "rotations": self.rotations,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "sink_errors": self.sink_errors,
+            "max_batch": self.max_batch,
+            "pending": self._queue.qsize(),
+        }
+
+
+def read_log(output_dir: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Lê todos os comandos do log (arquivos .jsonl e .jsonl.gz), em ordem de dia."""
+    output_dir = _project_path(output_dir or CONFIG["command_log"]["dir"])
+    paths = glob.glob(os.path.join(output_dir, "commands_*.jsonl")) + \
+        glob.glob(os.path.join(output_dir, "commands_*.jsonl.gz"))
+    for path in sorted(paths):
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                # uma linha incompleta no fim (queda de energia) é ignorada
+                if line.endswith("\n"):
+                    yield json.loads(line)
+
 
 class JsonWriter:
     def __init__(self, output_dir: str = "command_logs"):
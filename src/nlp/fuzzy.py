@@ -0,0 +1,190 @@
+"""
+src/nlp/fuzzy.py
+
+Casamento aproximado para erros do ASR ("ligue a lus da sala").
+
+Cada palavra do vocabulário (todas as palavras dos sinônimos de keys.py) ganha
+uma chave fonética do português: grafias com o mesmo som ("luz"/"lus",
+"acende"/"asende", "cozinha"/"cosinha") caem na mesma chave. As chaves vão
+para um índice de vizinhança por deleção (estilo SymSpell): cada chave é
+registrada junto com as variantes obtidas apagando até `max_distance` letras,
+e uma consulta gera as deleções da palavra ouvida e confere os candidatos com
+Levenshtein. Uma consulta custa algumas dezenas de buscas em dict, sem
+percorrer o vocabulário.
+
+O parser só recorre a este índice quando o casamento exato não achou ação ou
+dispositivo. As palavras fora do vocabulário são trocadas pela palavra mais
+próxima (distância pequena, proporcional ao tamanho), e a frase corrigida passa
+de novo pela trie (src/nlp/matcher.py). Só as categorias que faltavam são
+aproveitadas, com um score em (0, weight] que reduz a confiança (_confidence).
+
+    index = FuzzyIndex({"devices": DEVICES, ...}, _normalize)
+    index.correct("lus")            # ("luz", 0.9)
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# regras aplicadas em ordem a cada palavra (já sem acentos e em minúsculas);
+# "G" marca o g duro de "gue/gui" para não virar j
+_PHONETIC_RULES = [
+    (re.compile(r"ph"), "f"),
+    (re.compile(r"[cs]h"), "x"),
+    (re.compile(r"lh"), "l"),
+    (re.compile(r"nh"), "n"),
+    (re.compile(r"h"), ""),
+    (re.compile(r"[sx]c(?=[ei])"), "s"),
+    (re.compile(r"c(?=[ei])"), "s"),
+    (re.compile(r"qu(?=[ei])"), "k"),
+    (re.compile(r"gu(?=[ei])"), "G"),
+    (re.compile(r"g(?=[ei])"), "j"),
+    (re.compile(r"G"), "g"),
+    (re.compile(r"[cq]"), "k"),
+    (re.compile(r"z"), "s"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"y"), "i"),
+    (re.compile(r"l$"), "u"),
+    (re.compile(r"m$"), "n"),
+    (re.compile(r"e$"), "i"),
+    (re.compile(r"o$"), "u"),
+    (re.compile(r"(.)\1+"), r"\1"),
+]
+
+# palavras comuns que não devem ser "corrigidas" para o vocabulário
+_STOPWORDS = {"para", "pra", "pro", "por", "favor", "pode", "quero", "com", "uma", "que",
+              "isso", "esse", "essa", "este", "esta", "aqui", "agora", "mais", "menos", "nao",
+              "coisa", "alguma", "algum", "hora", "horas", "sistema", "obrigado", "obrigada"}
+
+
+def phonetic_key(word: str) -> str:
+    """Chave fonética de uma palavra normalizada (ver _normalize)."""
+    for pattern, repl in _PHONETIC_RULES:
+        word = pattern.sub(repl, word)
+    return word
+
+
+def levenshtein(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def _deletes(key: str, depth: int) -> Set[str]:
+    """A chave e todas as variantes com até `depth` letras apagadas."""
+    variants = {key}
+    frontier = {key}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+class FuzzyIndex:
+    def __init__(self, vocabularies: Dict[str, Dict[str, list]], normalize,
+                 max_distance: int = 2, min_word_length: int = 3, weight: float = 0.9):
+        self.max_distance = max_distance
+        self.min_word_length = min_word_length
+        self.weight = weight
+        # palavra do vocabulário -> ordem de aparição (desempate)
+        self.words: Dict[str, int] = {}
+        for synonyms_dict in vocabularies.values():
+            for syns in synonyms_dict.values():
+                for s in syns:
+                    for word in normalize(s).split(" "):
+                        if word.isalpha():
+                            self.words.setdefault(word, len(self.words))
+        # chave fonética -> palavras (na ordem do vocabulário)
+        self._by_key: Dict[str, List[str]] = {}
+        for word in self.words:
+            self._by_key.setdefault(phonetic_key(word), []).append(word)
+        # variante por deleção -> chaves que a geram
+        self._deletes: Dict[str, List[str]] = {}
+        for key in self._by_key:
+            for variant in _deletes(key, self._allowed(len(key))):
+                self._deletes.setdefault(variant, []).append(key)
+        self._corrections: Dict[str, Optional[Tuple[str, float]]] = {}
+
+    def _allowed(self, length: int) -> int:
+        """Distância tolerada: nenhuma em chaves curtas, mais em palavras longas."""
+        if length <= 3:
+            return 0
+        if length <= 7:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def correct(self, word: str) -> Optional[Tuple[str, float]]:
+        """(palavra do vocabulário, score) mais próxima de `word`, ou None."""
+        if word in self._corrections:
+            return self._corrections[word]
+        key = phonetic_key(word)
+        allowed = self._allowed(len(key))
+        best = None
+        candidates = set()
+        for variant in _deletes(key, allowed):
+            candidates.update(self._deletes.get(variant, ()))
+        for candidate in candidates:
+            d = levenshtein(key, candidate)
+            if d > allowed or d > self._allowed(len(candidate)):
+                continue
+            target = self._by_key[candidate][0]
+            rank = (d, self.words[target])
+            if best is None or rank < best[0]:
+                best = (rank, target, d)
+        result = None
+        if best is not None:
+            _, target, d = best
+            result = target, self.weight * (1.0 - d / max(len(key), len(best[1]), 1))
+        if len(self._corrections) < 65536:
+            self._corrections[word] = result
+        return result
+
+    def corrections(self, text: str) -> Tuple[str, Dict[str, Tuple[str, float]]]:
+        """
+        Texto com as palavras desconhecidas trocadas pelas do vocabulário e o
+        mapa palavra_corrigida -> (ouvida, score).
+        """
+        words = text.split(" ")
+        replaced: Dict[str, Tuple[str, float]] = {}
+        for i, word in enumerate(words):
+            if (len(word) < self.min_word_length or word in self.words
+                    or word in _STOPWORDS or not word.isalpha()):
+                continue
+            found = self.correct(word)
+            if found is not None:
+                words[i] = found[0]
+                replaced[found[0]] = (word, found[1])
+        return " ".join(words), replaced
+
+    def complete(self, text: str, matches: Dict[str, tuple], index,
+                 categories: Iterable[str]) -> Tuple[Dict[str, tuple], Dict[str, dict]]:
+        """
+        Preenche as `categories` que faltam em `matches` (resultado de
+        index.scan(text)) usando a frase corrigida. Retorna os casamentos e, por
+        categoria preenchida, {"heard", "matched", "score"}.
+        """
+        missing = [c for c in categories if c not in matches]
+        if not missing:
+            return matches, {}
+        fixed_text, replaced = self.corrections(text)
+        if not replaced:
+            return matches, {}
+        fixed = index.scan(fixed_text, missing)
+        merged = dict(matches)
+        info: Dict[str, dict] = {}
+        for category, (key, synonym) in fixed.items():
+            involved = [replaced[w] for w in synonym.split(" ") if w in replaced]
+            if not involved:
+                continue
+            merged[category] = (key, synonym)
+            info[category] = {
+                "heard": " ".join(heard for heard, _ in involved),
+                "matched": synonym,
+                "score": min(score for _, score in involved),
+            }
+        return merged, info
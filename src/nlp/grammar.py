@@ -0,0 +1,102 @@
+"""
+src/nlp/grammar.py
+
+Gramáticas (listas de frases) para decodificação restrita no Vosk.
+
+O domínio de comandos é fechado: ações, dispositivos, cômodos e dispositivos
+genéricos do vocabulário em uso (nlp.current_vocabulary(): keys.py, --vocab ou
+o último reload do VocabularyStore) listam tudo o que o parser entende. Passar essas frases ao
+KaldiRecognizer troca o vocabulário aberto por um grafo de busca pequeno,
+o que reduz a CPU de decodificação e as trocas por palavras fora do domínio.
+
+    rec = KaldiRecognizer(model, 8000, command_grammar(model))
+    rec.SetGrammar(choice_grammar(["ligar", "desligar"], model))
+
+"[unk]" entra sempre no fim, para que fala fora do domínio vire [unk] em vez
+de ser forçada para o comando mais parecido. Com `model`, frases que contêm
+palavras ausentes do léxico do modelo (ex.: grafias sem acento) são
+descartadas, evitando os avisos do Kaldi. As gramáticas são montadas na
+chamada e guardadas por (vocabulário, modelo): depois de um reload a próxima
+chamada já reflete o vocabulário novo.
+"""
+
+import json
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from .nlp import Vocabulary, current_vocabulary
+
+UNK = "[unk]"
+
+# respostas do diálogo (src/core/dialogue.py)
+DIALOGUE_WORDS = ["sim", "não"]
+
+# palavras de ligação e cortesia que aparecem entre ação, dispositivo e cômodo
+CONNECTIVES = ["a", "o", "as", "os", "da", "do", "na", "no", "de", "em", "para", "por favor", "agora"]
+
+
+def vocabulary_phrases(*vocabularies: Dict[str, list]) -> List[str]:
+    """Frases (sinônimos em minúsculas) dos dicionários, sem repetição e na ordem original."""
+    seen = {}
+    for vocabulary in vocabularies:
+        for synonyms in vocabulary.values():
+            for phrase in synonyms:
+                seen.setdefault(" ".join(phrase.lower().split()), None)
+    return list(seen)
+
+
+def filter_phrases(phrases: Iterable[str], model=None) -> List[str]:
+    """Remove frases com palavras que o modelo não conhece (sem modelo, mantém todas)."""
+    if model is None:
+        return list(phrases)
+    known = {}
+
+    def in_lexicon(word: str) -> bool:
+        if word not in known:
+            known[word] = model.vosk_model_find_word(word) >= 0
+        return known[word]
+
+    return [p for p in phrases if all(in_lexicon(w) for w in p.split())]
+
+
+def to_grammar(phrases: Iterable[str], model=None) -> str:
+    """Serializa a lista de frases no formato JSON aceito pelo KaldiRecognizer."""
+    unique = list(dict.fromkeys(phrases))
+    return json.dumps(filter_phrases(unique, model) + [UNK], ensure_ascii=False)
+
+
+def command_grammar(model=None) -> str:
+    """Gramática de comandos completa gerada a partir do vocabulário em uso."""
+    return _command_grammar(current_vocabulary(), model)
+
+
+# o Vocabulary é imutável e trocado por inteiro no reload: serve de chave
+@lru_cache(maxsize=4)
+def _command_grammar(vocabulary: Vocabulary, model) -> str:
+    phrases = vocabulary_phrases(vocabulary.actions, vocabulary.devices,
+                                 vocabulary.generic_devices, vocabulary.rooms)
+    return to_grammar(phrases + DIALOGUE_WORDS + CONNECTIVES, model)
+
+
+def choice_grammar(actions: Iterable[str], model=None) -> str:
+    """Gramática mínima para o diálogo: sinônimos das ações pedidas + sim/não."""
+    return _choice_grammar(tuple(actions), current_vocabulary(), model)
+
+
+@lru_cache(maxsize=16)
+def _choice_grammar(actions: tuple, vocabulary: Vocabulary, model) -> str:
+    phrases = vocabulary_phrases({a: vocabulary.actions.get(a, [a]) for a in actions})
+    return to_grammar(phrases + DIALOGUE_WORDS, model)
+
+
+def resolve_grammar(spec: Optional[str], model=None) -> Optional[str]:
+    """
+    Converte o valor de CONFIG["recognition"]["grammar"] em gramática:
+    None -> vocabulário aberto; "commands" -> command_grammar; qualquer outra
+    string é usada como está (lista JSON de frases).
+    """
+    if spec is None:
+        return None
+    if spec == "commands":
+        return command_grammar(model)
+    return spec
@@ -0,0 +1,224 @@
+"""
+src/nlp/incremental.py
+
+Parser incremental para os parciais do Vosk, que crescem palavra a palavra
+("liga", "liga a", "liga a luz", ...). Rodar parse_command do zero a cada
+parcial repete a normalização e a varredura do vocabulário sobre a frase
+inteira; o IncrementalParser só processa o trecho novo:
+
+- normalização caractere a caractere (minúsculas, sem acentos, espaços
+  colapsados), com o mesmo resultado de _normalize;
+- ScanState (src/nlp/matcher.py) mantém os cursores abertos na trie e os
+  melhores casamentos por categoria;
+- as pistas de confiança, negação e valor (regex de até duas palavras) só são
+  buscadas a partir da penúltima palavra; casamentos que já não podem mudar
+  ficam guardados.
+
+Se o parcial novo não estende o anterior (o Vosk revisou uma palavra), o
+estado volta ao último início de palavra anterior à mudança (um checkpoint por
+palavra) e só o resto é reprocessado.
+
+    parser = IncrementalParser()
+    for partial in ("liga", "liga a luz", "liga a luz da sala"):
+        result = parser.update(partial)   # == parse_command(partial)
+        print(parser.delta)               # o que mudou em relação ao anterior
+
+O casamento aproximado (src/nlp/fuzzy.py), quando o exato não acha ação ou
+dispositivo, roda sobre a frase inteira a cada parcial; as correções de cada
+palavra ficam em cache no FuzzyIndex.
+
+Diferença conhecida de _normalize: str.lower() aplicado à frase inteira trata
+o sigma final grego pelo contexto; caractere a caractere, não. Irrelevante
+para o vocabulário em português.
+"""
+
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional
+
+from . import nlp
+from .nlp import (_COURTESY_RE, _IMPERATIVE_RE, _NEGATION_RE, _NUMBER_RE, _PERCENT_RE,
+                  _VALUE_RE, Vocabulary, _assemble)
+
+# normalização de cada caractere: ch.lower() em NFD, sem as marcas combinantes
+_CHAR_NORM: Dict[str, str] = {}
+
+
+def _normalize_char(ch: str) -> str:
+    norm = _CHAR_NORM.get(ch)
+    if norm is None:
+        norm = "".join(c for c in unicodedata.normalize("NFD", ch.lower())
+                       if unicodedata.category(c) != "Mn")
+        _CHAR_NORM[ch] = norm
+    return norm
+
+
+def _common_prefix(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+class _TailSearch:
+    """
+    Primeiro casamento de uma regex num texto que só cresce no fim.
+
+    Um casamento que termina antes da última palavra não muda mais (as regex do
+    parser cobrem no máximo duas palavras); ele fica guardado em `stable` e a
+    busca deixa de rodar. Os demais são refeitos a partir de `pos`.
+    """
+
+    __slots__ = ("pattern", "stable")
+
+    def __init__(self, pattern: "re.Pattern"):
+        self.pattern = pattern
+        self.stable: Optional["re.Match"] = None
+
+    def search(self, text: str, pos: int, last_word: int) -> Optional["re.Match"]:
+        if self.stable is not None:
+            return self.stable
+        m = self.pattern.search(text, pos)
+        if m is not None and m.end() < last_word:
+            self.stable = m
+        return m
+
+
+_PATTERNS = {
+    "negation": _NEGATION_RE,
+    "percent": _PERCENT_RE,
+    "number": _NUMBER_RE,
+    "courtesy": _COURTESY_RE,
+    "imperative": _IMPERATIVE_RE,
+    "value": _VALUE_RE,
+}
+
+
+class IncrementalParser:
+    def __init__(self, vocabulary: Optional[Vocabulary] = None):
+        """vocabulary: vocabulário fixo; None = o atual do parser, lido a cada frase (segue os reloads)."""
+        self.vocabulary = vocabulary
+        self.updates = 0
+        self.chars_fed = 0
+        self.rollbacks = 0
+        self.reset()
+
+    def reset(self) -> None:
+        """Começa uma frase nova."""
+        self._raw = ""
+        self._body = ""
+        self._pending_space = False
+        self._pos = 0
+        self._vocabulary = self.vocabulary if self.vocabulary is not None else nlp.current_vocabulary()
+        self._scan = self._vocabulary.index.cursor()
+        self._searches = {name: _TailSearch(p) for name, p in _PATTERNS.items()}
+        # (len(raw), len(body), ScanState) em cada início de palavra
+        self._checkpoints: List[tuple] = []
+        self.result: Dict[str, Any] = _assemble({}, False, None, False, False, False, self._vocabulary)
+        self.delta: Dict[str, Any] = {}
+
+    def _checkpoint(self, raw_len: int, body_len: int) -> None:
+        self._checkpoints.append((raw_len, body_len, self._scan.copy()))
+
+    def _rollback(self, common: int) -> None:
+        """Volta ao último início de palavra em `raw[:common]`."""
+        self.rollbacks += 1
+        checkpoints = self._checkpoints
+        while checkpoints and checkpoints[-1][0] > common:
+            checkpoints.pop()
+        if not checkpoints:
+            self.reset()
+            return
+        raw_len, body_len, scan = checkpoints[-1]
+        self._raw = self._raw[:raw_len]
+        self._body = self._body[:body_len]
+        self._pending_space = True
+        self._scan = scan.copy()
+        # um casamento estável continua valendo se ainda termina antes da última palavra
+        last_word = self._body.rfind(" ") + 1
+        for search in self._searches.values():
+            if search.stable is not None and search.stable.end() >= last_word:
+                search.stable = None
+
+    def _feed(self, raw: str) -> None:
+        body_len = len(self._body)
+        # as regex são refeitas a partir da penúltima palavra do texto anterior
+        last = self._body.rfind(" ")
+        pos = self._body.rfind(" ", 0, last) + 1 if last >= 0 else 0
+        out = []
+        scan = self._scan
+        raw_len = len(self._raw)
+        for i, ch in enumerate(raw):
+            if ch.isspace():
+                if body_len or out:
+                    self._pending_space = True
+                continue
+            norm = _normalize_char(ch)
+            if not norm:
+                continue
+            if self._pending_space:
+                self._pending_space = False
+                # o checkpoint fica antes do espaço: reprocessar a partir daqui recoloca tudo
+                self._checkpoint(raw_len + i, body_len + len(out))
+                out.append(" ")
+                scan.feed(" ")
+            out.append(norm)
+            scan.feed(norm)
+        self._raw += raw
+        self._body += "".join(out)
+        self.chars_fed += len(raw)
+        self._pos = pos
+
+    def _evaluate(self) -> Dict[str, Any]:
+        body = self._body
+        pos = self._pos
+        last_word = body.rfind(" ") + 1
+        found = {name: s.search(body, pos, last_word) for name, s in self._searches.items()}
+        val = None
+        if found["percent"] is not None:
+            val = max(0.0, min(100.0, float(found["percent"].group(1)))), "%"
+        elif found["number"] is not None and found["number"].group(2):
+            val = float(found["number"].group(1)), "graus"
+        return _assemble(self._scan.matches(), found["negation"] is not None, val,
+                         found["courtesy"] is not None, found["imperative"] is not None,
+                         found["value"] is not None, self._vocabulary, body)
+
+    def update(self, text: str) -> Dict[str, Any]:
+        """
+        Processa o parcial atual (a frase inteira até aqui) e retorna o mesmo
+        resultado de parse_command(text). `self.delta` descreve a mudança.
+        """
+        self.updates += 1
+        previous = self.result
+        if text == self._raw:
+            self.delta = {}
+            return previous
+        if not text.startswith(self._raw):
+            self._rollback(_common_prefix(self._raw, text))
+        self._feed(text[len(self._raw):])
+        self.result = result = self._evaluate()
+        self.delta = _delta(previous, result)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "updates": self.updates,
+            "chars_fed": self.chars_fed,
+            "rollbacks": self.rollbacks,
+        }
+
+
+def _delta(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Intent e entidades que mudaram (None = entidade removida) e a variação da confiança."""
+    delta: Dict[str, Any] = {}
+    if new["intent"] != old["intent"]:
+        delta["intent"] = new["intent"]
+    old_entities, new_entities = old["entities"], new["entities"]
+    changed = {k: v for k, v in new_entities.items() if old_entities.get(k) != v}
+    changed.update({k: None for k in old_entities if k not in new_entities})
+    if changed:
+        delta["entities"] = changed
+    if new["confidence"] != old["confidence"]:
+        delta["confidence"] = new["confidence"] - old["confidence"]
+    return delta
@@ -0,0 +1,199 @@
+"""
+src/nlp/matcher.py
+
+Índice pré-compilado do vocabulário (keys.py) para o parser de comandos.
+
+Todos os sinônimos normalizados de ACTIONS, DEVICES, ROOMS e GENERIC_DEVICES
+são inseridos uma única vez em uma trie de caracteres. Uma busca percorre o
+texto uma vez, iniciando caminhadas na trie apenas em posições que não são
+precedidas por um caractere de palavra, e registra um casamento quando o
+próximo caractere também não é de palavra. Isso reproduz exatamente a
+semântica de ``(?<!\\w)sinonimo(?!\\w)`` usada antes, com a mesma regra de
+desempate: o sinônimo mais longo vence e, em caso de empate, vence o que
+aparece primeiro no dicionário.
+
+ScanState faz a mesma busca de forma incremental: recebe o texto caractere a
+caractere (append-only) e mantém os cursores ativos na trie, de modo que cada
+novo trecho custa proporcional ao seu tamanho (ver src/nlp/incremental.py).
+"""
+
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# chave reservada nos nós da trie para as entradas terminais
+_END = ""
+
+Match = Tuple[str, str]
+
+
+def _is_word_char(ch: str) -> bool:
+    """Equivalente a ``\\w`` do módulo ``re`` para strings Unicode."""
+    return ch.isalnum() or ch == "_"
+
+
+def _better(current: Optional[tuple], entry: tuple) -> bool:
+    """Desempate: o sinônimo mais longo vence; no empate, o de menor ordinal."""
+    ordinal, _, synonym = entry
+    return (current is None
+            or len(synonym) > len(current[2])
+            or (len(synonym) == len(current[2]) and ordinal < current[0]))
+
+
+class VocabularyIndex:
+    """
+    Trie de caracteres sobre os sinônimos normalizados de várias categorias.
+
+    Uso típico:
+        index = VocabularyIndex({"actions": ACTIONS, "rooms": ROOMS}, _normalize)
+        index.scan("liga a luz da sala")
+        # {"actions": ("ligar", "liga"), "rooms": ("sala", "sala")}
+    """
+
+    def __init__(self, vocabularies: Dict[str, Dict[str, list]], normalize: Callable[[str], str]):
+        self._root: dict = {}
+        self.categories: Tuple[str, ...] = tuple(vocabularies)
+        self.size = 0
+        for category, synonyms_dict in vocabularies.items():
+            ordinal = 0
+            for key, syns in synonyms_dict.items():
+                for s in syns:
+                    self._insert(category, ordinal, key, normalize(s))
+                    ordinal += 1
+
+    def state(self) -> tuple:
+        """A trie pronta, só com dicts/tuplas/strings (serializável com marshal)."""
+        return self._root, self.categories, self.size
+
+    @classmethod
+    def from_state(cls, state: tuple) -> "VocabularyIndex":
+        """Reconstrói o índice de state() sem normalizar nem inserir nada."""
+        index = cls.__new__(cls)
+        index._root, categories, index.size = state
+        index.categories = tuple(categories)
+        return index
+
+    def _insert(self, category: str, ordinal: int, key: str, synonym: str) -> None:
+        if not synonym:
+            return
+        node = self._root
+        for ch in synonym:
+            node = node.setdefault(ch, {})
+        entries = node.setdefault(_END, {})
+        # mantém apenas a primeira ocorrência (menor ordinal) de cada sinônimo
+        if category not in entries:
+            entries[category] = (ordinal, key, synonym)
+            self.size += 1
+
+    def _matches(self, text: str) -> Iterable[dict]:
+        """Gera as entradas terminais de todos os casamentos com fronteira de palavra."""
+        root = self._root
+        n = len(text)
+        prev_is_word = False
+        for i in range(n):
+            ch = text[i]
+            if prev_is_word:
+                prev_is_word = _is_word_char(ch)
+                continue
+            prev_is_word = _is_word_char(ch)
+            node = root.get(ch)
+            j = i + 1
+            while node is not None:
+                entries = node.get(_END)
+                if entries is not None and (j == n or not _is_word_char(text[j])):
+                    yield entries
+                if j == n:
+                    break
+                node = node.get(text[j])
+                j += 1
+
+    def scan(self, text: str, categories: Optional[Iterable[str]] = None) -> Dict[str, Match]:
+        """
+        Percorre o texto (já normalizado) uma única vez e retorna, para cada
+        categoria com casamento, a tupla ``(chave, sinonimo_normalizado)``.
+        """
+        wanted = set(categories) if categories is not None else None
+        best: Dict[str, tuple] = {}
+        for entries in self._matches(text):
+            for category, (ordinal, key, synonym) in entries.items():
+                if wanted is not None and category not in wanted:
+                    continue
+                if _better(best.get(category), (ordinal, key, synonym)):
+                    best[category] = (ordinal, key, synonym)
+        return {category: (entry[1], entry[2]) for category, entry in best.items()}
+
+    def cursor(self) -> "ScanState":
+        """Estado de busca incremental vazio sobre este índice."""
+        return ScanState(self._root)
+
+    def find(self, text: str, category: str) -> Optional[Match]:
+        """Melhor casamento de uma única categoria, ou None."""
+        return self.scan(text, (category,)).get(category)
+
+
+class ScanState:
+    """
+    Varredura incremental equivalente a VocabularyIndex.scan.
+
+    Guarda os nós da trie alcançados pelas caminhadas ainda abertas, o melhor
+    casamento confirmado por categoria e os casamentos que terminam exatamente
+    no fim do texto atual (confirmados só quando chega um caractere que não é
+    de palavra; no fim do texto valem como casamento, como em scan).
+    """
+
+    __slots__ = ("_root", "_walkers", "_prev_is_word", "_best", "_pending")
+
+    def __init__(self, root: dict):
+        self._root = root
+        self._walkers: list = []
+        self._prev_is_word = False
+        self._best: Dict[str, tuple] = {}
+        self._pending: list = []
+
+    def feed(self, text: str) -> None:
+        """Acrescenta `text` (já normalizado) ao fim do texto varrido."""
+        root = self._root
+        walkers = self._walkers
+        prev_is_word = self._prev_is_word
+        pending = self._pending
+        for ch in text:
+            is_word = _is_word_char(ch)
+            if pending and not is_word:
+                self._commit(pending)
+            advanced = []
+            for node in walkers:
+                node = node.get(ch)
+                if node is not None:
+                    advanced.append(node)
+            if not prev_is_word:
+                node = root.get(ch)
+                if node is not None:
+                    advanced.append(node)
+            prev_is_word = is_word
+            walkers = advanced
+            pending = [node[_END] for node in walkers if _END in node]
+        self._walkers = walkers
+        self._prev_is_word = prev_is_word
+        self._pending = pending
+
+    def _commit(self, pending: list) -> None:
+        best = self._best
+        for entries in pending:
+            for category, entry in entries.items():
+                if _better(best.get(category), entry):
+                    best[category] = entry
+
+    def matches(self) -> Dict[str, Match]:
+        """Resultado de scan() para o texto recebido até aqui."""
+        best = dict(self._best)
+        for entries in self._pending:
+            for category, entry in entries.items():
+                if _better(best.get(category), entry):
+                    best[category] = entry
+        return {category: (entry[1], entry[2]) for category, entry in best.items()}
+
+    def copy(self) -> "ScanState":
+        state = ScanState(self._root)
+        state._walkers = list(self._walkers)
+        state._prev_is_word = self._prev_is_word
+        state._best = dict(self._best)
+        state._pending = list(self._pending)
+        return state
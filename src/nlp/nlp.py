@@ -1,53 +1,269 @@
 import unicodedata
 import re
 import json
-from typing import Dict, Any, Optional
+import multiprocessing
+import threading
+from collections import OrderedDict, deque
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Any, Optional, Iterable, Iterator, List
+from src.core.config import CONFIG
+from . import keys
 from .keys import *
+from .fuzzy import FuzzyIndex
+from .matcher import VocabularyIndex
 
+_WHITESPACE_RE = re.compile(r"\s+")
+_NEGATION_RE = re.compile(r"\bnao\b|\bnao\s+\w+|\bn\u00e3o\b")
+_PERCENT_RE = re.compile(r"(\d{1,3})\s*%")
+_NUMBER_RE = re.compile(r"(\d{1,3})\s*(graus|c|°c|°)?")
+_COURTESY_RE = re.compile(r"\b(por favor|agora|imediatamente|por gentileza)\b")
+_IMPERATIVE_RE = re.compile(r"\b(abra|feche|ligue|desligue|aumente|diminua|abre|fecha|liga|desliga)\b")
+_VALUE_RE = re.compile(r"\d+\s*%|\d+\s*(graus|c|°c|°)")
+
+@lru_cache(maxsize=4096)
 def _normalize(text: str) -> str:
     text = text.lower().strip()
     text = unicodedata.normalize("NFD", text)
     text = "".join(ch for ch in text if unicodedata.category(ch) != "Mn")
-    text = re.sub(r"\s+", " ", text)
+    text = _WHITESPACE_RE.sub(" ", text)
     return text
 
+VOCABULARY_FIELDS = ("actions", "devices", "rooms", "generic_devices", "composable", "negation_invert")
+
+
+class Vocabulary:
+    """
+    Vocabulário completo (os dicionários de keys.py) e o índice compilado.
+    Nunca é alterado depois de criado: um reload instala outro objeto
+    (install_vocabulary), e cada parse usa um único snapshot do começo ao fim.
+    """
+
+    def __init__(self, actions: Dict[str, list], devices: Dict[str, list], rooms: Dict[str, list],
+                 generic_devices: Dict[str, list], composable: Iterable[str],
+                 negation_invert: Dict[str, str], intent_default: str = INTENT_DEFAULT,
+                 index: Optional[VocabularyIndex] = None, source: Optional[str] = None):
+        self.actions = actions
+        self.devices = devices
+        self.rooms = rooms
+        self.generic_devices = generic_devices
+        self.composable = set(composable)
+        self.negation_invert = negation_invert
+        self.intent_default = intent_default
+        self.source = source
+        # True quando veio de um snapshot compilado (src/nlp/store.py)
+        self.from_snapshot = False
+        if index is None:
+            index = VocabularyIndex({
+                "actions": actions,
+                "devices": devices,
+                "generic_devices": generic_devices,
+                "rooms": rooms,
+            }, _normalize)
+        self.index = index
+        self._fuzzy: Optional[FuzzyIndex] = None
+
+    def fuzzy(self) -> FuzzyIndex:
+        """Índice aproximado (src/nlp/fuzzy.py), montado no primeiro uso."""
+        if self._fuzzy is None:
+            cfg = CONFIG["nlp"]["fuzzy"]
+            self._fuzzy = FuzzyIndex({
+                "actions": self.actions,
+                "devices": self.devices,
+                "generic_devices": self.generic_devices,
+                "rooms": self.rooms,
+            }, _normalize, cfg["max_distance"], cfg["min_word_length"], cfg["weight"])
+        return self._fuzzy
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], **kwargs) -> "Vocabulary":
+        return cls(*(data[name] for name in VOCABULARY_FIELDS),
+                   intent_default=data.get("intent_default", INTENT_DEFAULT), **kwargs)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Forma serializável (JSON/marshal): composable vira lista ordenada."""
+        data = {name: getattr(self, name) for name in VOCABULARY_FIELDS}
+        data["composable"] = sorted(self.composable)
+        data["intent_default"] = self.intent_default
+        return data
+
+
+# Vocabulário em uso, construído de keys.py na importação. Trocado por inteiro
+# (uma atribuição) em install_vocabulary; _VOCABULARY é o índice dele.
+_CURRENT = Vocabulary(ACTIONS, DEVICES, ROOMS, GENERIC_DEVICES, COMPOSABLE, NEGATION_INVERT,
+                      source=keys.__file__)
+_VOCABULARY = _CURRENT.index
+
+
+class _FrozenDict(dict):
+    """
+    dict somente leitura. Os resultados em cache são o mesmo objeto para todos
+    os chamadores; para alterar, copie (dict(r), {**r}, r.copy()).
+    """
+
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("resultado do parser é somente leitura; copie com dict(...) para alterar")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        # pickle (pool de parse_commands) não pode recriar o dict item a item
+        return _FrozenDict, (dict(self),)
+
+
+def _freeze(result: Dict[str, Any]) -> Dict[str, Any]:
+    frozen = {**result, "entities": _FrozenDict(result["entities"])}
+    if "fuzzy" in result:
+        frozen["fuzzy"] = _FrozenDict({c: _FrozenDict(info) for c, info in result["fuzzy"].items()})
+    return _FrozenDict(frozen)
+
+
+class ParseCache:
+    """
+    LRU de resultados de parse_command, pela frase exata (antes da normalização).
+    clear() avança `generation`: um put() de um parse iniciado antes é ignorado,
+    para que um resultado do vocabulário antigo não volte ao cache.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.generation = 0
+
+    def get(self, text: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._data.get(text)
+            if result is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(text)
+            self.hits += 1
+            return result
+
+    def put(self, text: str, result: Dict[str, Any], generation: Optional[int] = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[text] = result
+            self._data.move_to_end(text)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.generation,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+_PARSE_CACHE = ParseCache(CONFIG["nlp"]["cache_size"])
+
+
+def cache_stats() -> dict:
+    """Estatísticas do cache de parse_command e da memoização de _normalize."""
+    info = _normalize.cache_info()
+    return {
+        "parse": _PARSE_CACHE.stats(),
+        "normalize": {"size": info.currsize, "maxsize": info.maxsize,
+                      "hits": info.hits, "misses": info.misses},
+    }
+
+
+def current_vocabulary() -> Vocabulary:
+    return _CURRENT
+
+
+def install_vocabulary(vocabulary: Vocabulary) -> None:
+    """
+    Passa a usar `vocabulary`. A troca é uma atribuição: parses em andamento
+    terminam com o vocabulário antigo, os seguintes já usam o novo. Os atributos
+    de keys.py (keys.ACTIONS etc.) também passam a apontar para os dicionários
+    novos, e o cache de resultados é invalidado.
+    """
+    global _CURRENT, _VOCABULARY
+    _CURRENT = vocabulary
+    _VOCABULARY = vocabulary.index
+    for name in VOCABULARY_FIELDS:
+        setattr(keys, name.upper(), getattr(vocabulary, name))
+    keys.INTENT_DEFAULT = vocabulary.intent_default
+    _PARSE_CACHE.clear()
+
+
+def reload_vocabulary(path: Optional[str] = None) -> Vocabulary:
+    """
+    Recarrega o vocabulário sem reiniciar o processo: de `path` (JSON ou .py no
+    formato de keys.py), de CONFIG["nlp"]["vocabulary_path"] ou do próprio
+    keys.py, usando o snapshot compilado quando ele está em dia (src/nlp/store.py).
+    """
+    from .store import compile_vocabulary
+
+    vocabulary = compile_vocabulary(path or CONFIG["nlp"]["vocabulary_path"] or keys.__file__)
+    install_vocabulary(vocabulary)
+    return vocabulary
+
+def _index_for(synonyms_dict: Dict[str, list]) -> tuple[VocabularyIndex, str]:
+    vocabulary = _CURRENT
+    for category in ("actions", "devices", "generic_devices", "rooms"):
+        if synonyms_dict is getattr(vocabulary, category):
+            return vocabulary.index, category
+    # dicionário avulso: o conteúdo congelado é a chave, então alterações no
+    # lugar geram outro índice e o cache não segura referências aos dicts
+    frozen = tuple((key, tuple(synonyms)) for key, synonyms in synonyms_dict.items())
+    return _extra_index(frozen), "extra"
+
+@lru_cache(maxsize=32)
+def _extra_index(frozen: tuple) -> VocabularyIndex:
+    return VocabularyIndex({"extra": dict(frozen)}, _normalize)
+
 def _find_best_match(text: str, synonyms_dict: Dict[str, list]) -> Optional[tuple[str, str]]:
-    candidates = []
-    for key, syns in synonyms_dict.items():
-        for s in syns:
-            sn = _normalize(s)
-            pattern = r'(?<!\w)' + re.escape(sn) + r'(?!\w)'
-            if re.search(pattern, text):
-                candidates.append((key, sn, len(sn)))
-    if not candidates:
-        return None
-    candidates.sort(key=lambda x: x[2], reverse=True)
-    return candidates[0][0], candidates[0][1]
+    index, category = _index_for(synonyms_dict)
+    return index.find(text, category)
 
 def _find_room(text: str) -> Optional[str]:
-    found = _find_best_match(text, ROOMS)
+    found = _find_best_match(text, _CURRENT.rooms)
     return found[0] if found else None
 
 def _find_generic_device(text: str) -> Optional[str]:
-    found = _find_best_match(text, GENERIC_DEVICES)
+    found = _find_best_match(text, _CURRENT.generic_devices)
     return found[0] if found else None
 
 def _is_negated(text: str) -> bool:
-    return bool(re.search(r"\bnao\b|\bnao\s+\w+|\bn\u00e3o\b", text)) or " nao " in text or " não " in text
+    return bool(_NEGATION_RE.search(text)) or " nao " in text or " não " in text
 
-def _apply_negation(action_key: Optional[str], negated: bool) -> Optional[str]:
+def _apply_negation(action_key: Optional[str], negated: bool,
+                    invert: Optional[Dict[str, str]] = None) -> Optional[str]:
     if not action_key:
         return action_key
-    if negated and action_key in NEGATION_INVERT:
-        return NEGATION_INVERT[action_key]
+    invert = _CURRENT.negation_invert if invert is None else invert
+    if negated and action_key in invert:
+        return invert[action_key]
     return action_key
 
 def _extract_value(text: str) -> Optional[tuple[float, str]]:
-    m = re.search(r"(\d{1,3})\s*%", text)
+    m = _PERCENT_RE.search(text)
     if m:
         v = float(m.group(1))
         return max(0.0, min(100.0, v)), "%"
-    m = re.search(r"(\d{1,3})\s*(graus|c|°c|°)?", text)
+    m = _NUMBER_RE.search(text)
     if m:
         v = float(m.group(1))
         unit = m.group(2) or ""
@@ -55,43 +271,99 @@ def _extract_value(text: str) -> Optional[tuple[float, str]]:
             return v, "graus"
     return None
 
-def _confidence(has_action: bool, has_device: bool, text: str) -> float:
+def _confidence_from(has_action: bool, has_device: bool, courtesy: bool, imperative: bool,
+                     has_value: bool, has_room: bool,
+                     action_score: float = 1.0, device_score: float = 1.0) -> float:
+    """Os scores (< 1 quando a entidade veio do casamento aproximado) escalam o peso dela."""
     conf = 0.0
     if has_action:
-        conf += 0.5
+        conf += 0.5 * action_score
     if has_device:
-        conf += 0.4
-    if re.search(r"\b(por favor|agora|imediatamente|por gentileza)\b", text):
+        conf += 0.4 * device_score
+    if courtesy:
         conf += 0.05
-    if re.search(r"\b(abra|feche|ligue|desligue|aumente|diminua|abre|fecha|liga|desliga)\b", text):
+    if imperative:
         conf += 0.05
-    if re.search(r"\d+\s*%|\d+\s*(graus|c|°c|°)", text):
+    if has_value:
         conf += 0.05
-    if _find_room(text):
+    if has_room:
         conf += 0.05
     return max(0.0, min(1.0, conf))
 
+def _confidence(has_action: bool, has_device: bool, text: str, has_room: Optional[bool] = None) -> float:
+    if has_room is None:
+        has_room = _find_room(text) is not None
+    return _confidence_from(has_action, has_device, bool(_COURTESY_RE.search(text)),
+                            bool(_IMPERATIVE_RE.search(text)), bool(_VALUE_RE.search(text)), has_room)
+
 def parse_command(text: str) -> Dict[str, Any]:
+    """
+    Resultado somente leitura (_FrozenDict): frases repetidas vêm do cache LRU
+    (CONFIG["nlp"]["cache_size"]) e o mesmo objeto é devolvido a todos.
+    """
+    if not _PARSE_CACHE.maxsize:
+        return _freeze(_parse(text))
+    result = _PARSE_CACHE.get(text)
+    if result is None:
+        generation = _PARSE_CACHE.generation
+        result = _freeze(_parse(text))
+        _PARSE_CACHE.put(text, result, generation)
+    return result
+
+def _parse(text: str) -> Dict[str, Any]:
     norm = _normalize(text)
-    action = _find_best_match(norm, ACTIONS)
-    device = _find_best_match(norm, DEVICES)
+    vocabulary = _CURRENT
+    # uma única passada pelo texto resolve ações, dispositivos, genéricos e cômodos
+    matches = vocabulary.index.scan(norm)
+    return _assemble(matches, _is_negated(" " + norm + " "), _extract_value(norm),
+                     bool(_COURTESY_RE.search(norm)), bool(_IMPERATIVE_RE.search(norm)),
+                     bool(_VALUE_RE.search(norm)), vocabulary, norm)
+
+def _complete(matches: Dict[str, tuple], vocabulary: Vocabulary, norm: str) -> tuple[Dict[str, tuple], Dict[str, dict]]:
+    """
+    Casamento aproximado (CONFIG["nlp"]["fuzzy"]) só quando o exato não achou
+    ação ou dispositivo (nem genérico + cômodo que o componha).
+    """
+    generic = matches["generic_devices"][0] if "generic_devices" in matches else None
+    has_device = "devices" in matches or (generic in vocabulary.composable and "rooms" in matches)
+    if ("actions" in matches and has_device) or not CONFIG["nlp"]["fuzzy"]["enabled"]:
+        return matches, {}
+    categories = ["actions"] if has_device else ["actions", "devices", "generic_devices", "rooms"]
+    return vocabulary.fuzzy().complete(norm, matches, vocabulary.index, categories)
+
+def _assemble(matches: Dict[str, tuple], neg: bool, val: Optional[tuple[float, str]],
+              courtesy: bool, imperative: bool, has_value: bool,
+              vocabulary: Optional[Vocabulary] = None, norm: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Monta o resultado a partir dos casamentos do vocabulário e das pistas do
+    texto; com `norm`, completa com o casamento aproximado o que faltar.
+    """
+    vocabulary = _CURRENT if vocabulary is None else vocabulary
+    fuzzy = {}
+    if norm:
+        matches, fuzzy = _complete(matches, vocabulary, norm)
+    action = matches.get("actions")
+    device = matches.get("devices")
+    room = matches["rooms"][0] if "rooms" in matches else None
 
     has_action = action is not None
     has_device = device is not None
 
-    neg = _is_negated(" " + norm + " ")
     action_key = action[0] if has_action else None
-    action_key = _apply_negation(action_key, neg)
+    action_key = _apply_negation(action_key, neg, vocabulary.negation_invert)
 
     device_key = device[0] if has_device else None
+    device_parts = ("devices",)
     if not device_key:
-        generic = _find_generic_device(norm)
-        room = _find_room(norm)
-        if generic in COMPOSABLE and room:
+        generic = matches["generic_devices"][0] if "generic_devices" in matches else None
+        if generic in vocabulary.composable and room:
             device_key = f"{generic}_{room}"
             has_device = True
+            device_parts = ("generic_devices", "rooms")
+    action_score = fuzzy["actions"]["score"] if "actions" in fuzzy else 1.0
+    device_score = min([fuzzy[c]["score"] for c in device_parts if c in fuzzy], default=1.0)
 
-    intent = INTENT_DEFAULT if (action_key and has_device) else "desconhecido"
+    intent = vocabulary.intent_default if (action_key and has_device) else "desconhecido"
 
     result = {
         "intent": intent,
@@ -99,14 +371,53 @@ def parse_command(text: str) -> Dict[str, Any]:
             "acao": action_key if action_key else None,
             "dispositivo": device_key if has_device else None
         },
-        "confidence": _confidence(bool(action_key), has_device, norm)
+        "confidence": _confidence_from(bool(action_key), has_device, courtesy, imperative,
+                                       has_value, room is not None, action_score, device_score)
     }
-    val = _extract_value(norm)
     if val:
         result["entities"]["valor"] = val[0]
         result["entities"]["unidade"] = val[1]
+    if fuzzy:
+        # o que veio do casamento aproximado: palavra ouvida, sinônimo e score
+        result["fuzzy"] = fuzzy
     return result
 
+def _parse_chunk(texts: List[str]) -> List[Dict[str, Any]]:
+    return [parse_command(t) for t in texts]
+
+def parse_commands(texts: Iterable[str], workers: int = 0, chunksize: int = 1024) -> Iterator[Dict[str, Any]]:
+    """
+    Versão em lote de parse_command: consome um iterável (ou gerador) de textos
+    e produz os resultados na mesma ordem, à medida que ficam prontos.
+
+    Com workers > 1 os textos são despachados em blocos de `chunksize` para um
+    pool de processos. Cada worker constrói o índice do vocabulário uma única
+    vez (na importação deste módulo) e o reutiliza em todos os blocos. No máximo
+    2 * workers blocos ficam em andamento, então geradores longos não são
+    carregados inteiros na memória.
+    """
+    if workers <= 1:
+        for text in texts:
+            yield parse_command(text)
+        return
+
+    source = iter(texts)
+    pending = deque()
+    with multiprocessing.Pool(workers) as pool:
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(islice(source, chunksize))
+                if not chunk:
+                    break
+                pending.append(pool.apply_async(_parse_chunk, (chunk,)))
+            if not pending:
+                break
+            yield from pending.popleft().get()
+
+# vocabulário externo configurado: substitui o de keys.py já na importação
+if CONFIG["nlp"]["vocabulary_path"]:
+    reload_vocabulary()
+
 if __name__ == "__main__":
     samples = [
         "Abra a porta da garagem, por favor",
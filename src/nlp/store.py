@@ -0,0 +1,276 @@
+"""
+src/nlp/store.py
+
+Vocabulário recarregável em tempo de execução, sem reiniciar o processo (e sem
+recarregar o modelo Vosk).
+
+Fonte: um arquivo JSON com as chaves de keys.py em minúsculas
+
+    {"actions": {"ligar": ["liga", ...]}, "devices": {...}, "rooms": {...},
+     "generic_devices": {...}, "composable": ["luz", ...],
+     "negation_invert": {"ligar": "desligar", ...}, "intent_default": "..."}
+
+ou um .py no formato do próprio keys.py (ACTIONS, DEVICES, ...).
+
+Snapshot: a primeira carga compila a fonte (normalização de todos os sinônimos
+e a trie do VocabularyIndex) e grava `<fonte>.snapshot`, um arquivo marshal com
+cabeçalho (versão do formato, versão do Python e hash da fonte). As cargas
+seguintes com a fonte inalterada só leem o snapshot; qualquer divergência no
+cabeçalho recompila.
+
+VocabularyStore vigia a fonte numa thread (mtime/tamanho a cada
+`watch_interval_s`) e/ou recarrega ao receber SIGHUP. A compilação roda nessa
+thread; a troca é uma atribuição (install_vocabulary em src/nlp/nlp.py), então
+a captura e o reconhecimento seguem rodando e cada parse vê o vocabulário
+antigo ou o novo, nunca uma mistura. Erro na fonte nova mantém o vocabulário
+atual. A gramática "commands" do Vosk (src/nlp/grammar.py) vem do vocabulário
+em uso; o VoskRecognizer a reaplica na próxima frase (reset_session).
+
+    store = VocabularyStore("vocabulario.json").load().start()
+    store.install_signal_handler()   # kill -HUP <pid>
+
+    python -m src.nlp.store export vocabulario.json   # keys.py -> JSON
+    python -m src.nlp.store compile vocabulario.json  # gera o snapshot
+"""
+
+import argparse
+import hashlib
+import json
+import marshal
+import os
+import runpy
+import signal
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from src.core.config import CONFIG
+from . import keys
+from .matcher import VocabularyIndex
+from .nlp import VOCABULARY_FIELDS, Vocabulary, current_vocabulary, install_vocabulary
+
+SNAPSHOT_MAGIC = b"VOCABSNAP1"
+
+
+def _snapshot_header(digest: bytes) -> bytes:
+    python = f"{sys.version_info[0]}.{sys.version_info[1]}".encode()
+    return SNAPSHOT_MAGIC + b" " + python + b" " + digest.hex().encode() + b"\n"
+
+
+def snapshot_path_for(path: str) -> str:
+    return CONFIG["nlp"]["snapshot_path"] or f"{path}.snapshot"
+
+
+def parse_source(path: str, data: bytes) -> Dict[str, Any]:
+    """Dicionário com VOCABULARY_FIELDS a partir de um JSON ou de um .py como keys.py."""
+    if path.endswith(".py"):
+        namespace = runpy.run_path(path)
+        source = {name: namespace[name.upper()] for name in VOCABULARY_FIELDS if name.upper() in namespace}
+        if "INTENT_DEFAULT" in namespace:
+            source["intent_default"] = namespace["INTENT_DEFAULT"]
+    else:
+        source = json.loads(data.decode("utf-8"))
+    if not isinstance(source, dict):
+        raise ValueError(f"{path}: o vocabulário deve ser um objeto")
+    missing = [name for name in VOCABULARY_FIELDS if name not in source]
+    if missing:
+        raise ValueError(f"{path}: faltam as chaves {missing}")
+    for name in ("actions", "devices", "rooms", "generic_devices"):
+        table = source[name]
+        if not isinstance(table, dict) or not all(
+                isinstance(key, str) and isinstance(syns, list) and all(isinstance(s, str) for s in syns)
+                for key, syns in table.items()):
+            raise ValueError(f"{path}: '{name}' deve mapear chave -> lista de sinônimos")
+    composable = source["composable"]
+    if not isinstance(composable, (list, tuple, set)) or not all(isinstance(c, str) for c in composable):
+        raise ValueError(f"{path}: 'composable' deve ser uma lista de chaves")
+    invert = source["negation_invert"]
+    if not isinstance(invert, dict) or not all(
+            isinstance(k, str) and isinstance(v, str) for k, v in invert.items()):
+        raise ValueError(f"{path}: 'negation_invert' deve mapear ação -> ação")
+    if not isinstance(source.get("intent_default", ""), str):
+        raise ValueError(f"{path}: 'intent_default' deve ser texto")
+    return source
+
+
+def _read_snapshot(path: str, digest: bytes) -> Optional[Vocabulary]:
+    try:
+        with open(path, "rb") as f:
+            blob = f.read()
+    except OSError:
+        return None
+    header = _snapshot_header(digest)
+    if not blob.startswith(header):
+        return None
+    try:
+        data, state = marshal.loads(blob[len(header):])
+    except (EOFError, ValueError, TypeError):
+        return None
+    return Vocabulary.from_dict(data, index=VocabularyIndex.from_state(state))
+
+
+def _write_snapshot(path: str, digest: bytes, vocabulary: Vocabulary) -> None:
+    payload = marshal.dumps((vocabulary.as_dict(), vocabulary.index.state()))
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_snapshot_header(digest) + payload)
+    os.replace(tmp, path)
+
+
+def compile_vocabulary(path: str, snapshot_path: Optional[str] = None) -> Vocabulary:
+    """
+    Vocabulário de `path`: lido do snapshot se ele corresponde à fonte atual,
+    senão compilado da fonte (e o snapshot é regravado).
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.blake2b(data, digest_size=16).digest()
+    snapshot_path = snapshot_path or snapshot_path_for(path)
+    vocabulary = _read_snapshot(snapshot_path, digest)
+    if vocabulary is None:
+        vocabulary = Vocabulary.from_dict(parse_source(path, data))
+        try:
+            _write_snapshot(snapshot_path, digest, vocabulary)
+        except OSError as e:
+            print(f"[VocabularyStore] Não foi possível gravar o snapshot {snapshot_path}: {e}")
+        vocabulary.from_snapshot = False
+    else:
+        vocabulary.from_snapshot = True
+    vocabulary.source = path
+    # o índice aproximado também fica pronto aqui, fora do caminho do parse
+    vocabulary.fuzzy()
+    return vocabulary
+
+
+class VocabularyStore:
+    def __init__(self, path: Optional[str] = None,
+                 snapshot_path: Optional[str] = None,
+                 watch_interval_s: Optional[float] = -1,
+                 verbose: bool = True):
+        """
+        path: fonte do vocabulário; None = CONFIG["nlp"]["vocabulary_path"] ou keys.py.
+        watch_interval_s: checagem do arquivo; -1 = CONFIG, None = só sob demanda
+            (request_reload / SIGHUP).
+        """
+        cfg = CONFIG["nlp"]
+        self.path = path or cfg["vocabulary_path"] or keys.__file__
+        self.snapshot_path = snapshot_path
+        self.watch_interval_s = cfg["watch_interval_s"] if watch_interval_s == -1 else watch_interval_s
+        self.verbose = verbose
+        self.reloads = 0
+        self.errors = 0
+        self.last_reload_ms = 0.0
+        self._signature = None
+        self._trigger = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _log(self, *args) -> None:
+        if self.verbose:
+            print("[VocabularyStore]", *args)
+
+    def _stat(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def load(self) -> "VocabularyStore":
+        """Carga inicial (síncrona); erros na fonte são propagados."""
+        self._signature = self._stat()
+        vocabulary = compile_vocabulary(self.path, self.snapshot_path)
+        install_vocabulary(vocabulary)
+        origem = "snapshot" if vocabulary.from_snapshot else "fonte"
+        self._log(f"Vocabulário de {self.path} ({origem}, {vocabulary.index.size} sinônimos)")
+        return self
+
+    def reload(self, force: bool = False) -> bool:
+        """Recompila e instala se a fonte mudou (ou se `force`). True se trocou."""
+        signature = None
+        try:
+            signature = self._stat()
+            if not force and signature == self._signature:
+                return False
+            t0 = time.perf_counter()
+            vocabulary = compile_vocabulary(self.path, self.snapshot_path)
+        except Exception as e:
+            # qualquer erro na fonte (ou no .py executado) mantém o vocabulário
+            # atual e não pode derrubar a thread de vigia; a mesma versão ruim
+            # do arquivo não é reprocessada a cada checagem
+            self.errors += 1
+            if signature is not None:
+                self._signature = signature
+            self._log(f"Erro ao recarregar {self.path}; mantendo o vocabulário atual: {e!r}")
+            return False
+        install_vocabulary(vocabulary)
+        self._signature = signature
+        self.reloads += 1
+        self.last_reload_ms = 1000 * (time.perf_counter() - t0)
+        self._log(f"Vocabulário recarregado em {self.last_reload_ms:.1f} ms "
+                  f"({vocabulary.index.size} sinônimos)")
+        return True
+
+    def request_reload(self) -> None:
+        """Pede um reload à thread do store (seguro para chamar de um handler de sinal)."""
+        self._trigger.set()
+
+    def install_signal_handler(self, signum: Optional[int] = None) -> bool:
+        """Recarrega ao receber SIGHUP (só na thread principal; False se indisponível)."""
+        signum = signum if signum is not None else getattr(signal, "SIGHUP", None)
+        if signum is None or threading.current_thread() is not threading.main_thread():
+            return False
+        signal.signal(signum, lambda *_: self.request_reload())
+        return True
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            triggered = self._trigger.wait(self.watch_interval_s)
+            if self._stop.is_set():
+                return
+            self._trigger.clear()
+            self.reload(force=triggered)
+
+    def start(self) -> "VocabularyStore":
+        self._thread = threading.Thread(target=self._loop, name="vocabulary-store", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._stop.set()
+        self._trigger.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+
+    def stats(self) -> dict:
+        vocabulary = current_vocabulary()
+        return {
+            "path": self.path,
+            "synonyms": vocabulary.index.size,
+            "reloads": self.reloads,
+            "errors": self.errors,
+            "last_reload_ms": self.last_reload_ms,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Vocabulário do parser: exporta keys.py e compila snapshots.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("export", help="grava o vocabulário de keys.py em JSON")
+    p.add_argument("path")
+    p = sub.add_parser("compile", help="compila a fonte e grava o snapshot")
+    p.add_argument("path")
+    args = parser.parse_args()
+
+    if args.cmd == "export":
+        with open(args.path, "w", encoding="utf-8") as f:
+            json.dump(current_vocabulary().as_dict(), f, ensure_ascii=False, indent=2)
+        print(f"Vocabulário exportado para {args.path}")
+    else:
+        t0 = time.perf_counter()
+        vocabulary = compile_vocabulary(args.path)
+        origem = "snapshot em dia" if vocabulary.from_snapshot else "compilado"
+        print(f"{args.path}: {vocabulary.index.size} sinônimos, {origem} "
+              f"em {1000 * (time.perf_counter() - t0):.1f} ms -> {snapshot_path_for(args.path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,156 @@
 import os
+import resource
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional, Tuple
+
 from vosk import Model
 from src.core.config import CONFIG
 
-class ModelManager:
+
+def _resident_bytes() -> Optional[int]:
+    """RSS atual do processo (Linux: /proc/self/statm; senão pico via getrusage)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        try:
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except Exception:
+            return None
+
+
+class ModelRegistry:
+    """
+    Cache de modelos compartilhado pelo processo, chaveado por (tipo, caminho).
+
+    - get(): retorna o modelo já carregado ou carrega uma única vez, mesmo com
+      várias threads pedindo ao mesmo tempo (as demais esperam o mesmo carregamento).
+    - preload(): inicia o carregamento em uma thread de fundo e retorna um
+      Future, para que o restante da inicialização (ex.: abrir a serial) siga
+      em paralelo.
+    - evict(): remove o modelo do cache (a memória é liberada quando não houver
+      mais referências a ele).
+    - stats(): tempo de carga e RSS adicionado por modelo. O RSS é a diferença
+      medida em volta do carregamento, então é aproximado se houver outras
+      alocações em paralelo.
+    """
+
     def __init__(self):
-        self.model_path = CONFIG["recognition"]["model_path"]
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], Future] = {}
+        self._stats: Dict[Tuple[str, str], dict] = {}
+        self._loaders: Dict[str, Callable[[str], object]] = {"vosk": Model}
+
+    def register_loader(self, kind: str, loader: Callable[[str], object]) -> None:
+        self._loaders[kind] = loader
+
+    @staticmethod
+    def _key(path: str, kind: str) -> Tuple[str, str]:
+        return kind, os.path.abspath(path)
+
+    def _entry(self, path: str, kind: str) -> Tuple[Future, bool]:
+        """Retorna (future, True se o chamador deve fazer o carregamento)."""
+        if kind not in self._loaders:
+            raise KeyError(f"Tipo de modelo desconhecido: {kind}")
+        key = self._key(path, kind)
+        with self._lock:
+            future = self._entries.get(key)
+            if future is not None:
+                return future, False
+            future = Future()
+            self._entries[key] = future
+            return future, True
+
+    def _load(self, path: str, kind: str, future: Future) -> None:
+        key = self._key(path, kind)
+        rss_before = _resident_bytes()
+        t0 = time.perf_counter()
+        try:
+            model = self._loaders[kind](key[1])
+        except BaseException as e:
+            # falhou: remove a entrada para permitir nova tentativa
+            with self._lock:
+                if self._entries.get(key) is future:
+                    del self._entries[key]
+            future.set_exception(e)
+            return
+        load_seconds = time.perf_counter() - t0
+        rss_after = _resident_bytes()
+        with self._lock:
+            # evict()/clear() durante o carregamento: não recria as estatísticas
+            # de uma entrada que já saiu do cache (ou que outra carga substituiu)
+            if self._entries.get(key) is future:
+                self._stats[key] = {
+                    "kind": kind,
+                    "path": key[1],
+                    "load_seconds": load_seconds,
+                    "resident_bytes": (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+                }
+        print(f"[ModelRegistry] {kind} carregado de {key[1]} em {load_seconds:.2f} s")
+        future.set_result(model)
+
+    def get(self, path: str, kind: str = "vosk", timeout: Optional[float] = None):
+        """Retorna o modelo, carregando-o (ou esperando o preload) se necessário."""
+        future, owner = self._entry(path, kind)
+        if owner:
+            self._load(path, kind, future)
+        return future.result(timeout=timeout)
+
+    def preload(self, path: str, kind: str = "vosk") -> Future:
+        """Inicia o carregamento em segundo plano; retorna o Future do modelo."""
+        future, owner = self._entry(path, kind)
+        if owner:
+            threading.Thread(target=self._load, args=(path, kind, future),
+                             name=f"preload-{kind}", daemon=True).start()
+        return future
+
+    def is_loaded(self, path: str, kind: str = "vosk") -> bool:
+        future = self._entries.get(self._key(path, kind))
+        return future is not None and future.done() and future.exception() is None
+
+    def evict(self, path: str, kind: str = "vosk") -> bool:
+        """Remove o modelo do cache. Retorna False se ele não estava registrado."""
+        key = self._key(path, kind)
+        with self._lock:
+            self._stats.pop(key, None)
+            return self._entries.pop(key, None) is not None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+
+    def stats(self) -> Dict[Tuple[str, str], dict]:
+        with self._lock:
+            return {key: dict(value) for key, value in self._stats.items()}
+
+
+# registro único do processo
+REGISTRY = ModelRegistry()
+
+
+class ModelManager:
+    def __init__(self, model_path: Optional[str] = None, registry: ModelRegistry = REGISTRY):
+        self.model_path = model_path or CONFIG["recognition"]["model_path"]
+        self.registry = registry
         self.model = None
 
-    def load_model(self):
+    def _check_path(self):
         if not os.path.exists(self.model_path):
             raise FileNotFoundError(f"Modelo Vosk não encontrado em {self.model_path}")
+
+    def preload(self) -> Future:
+        """Começa a carregar o modelo em segundo plano (ver ModelRegistry.preload)."""
+        self._check_path()
+        return self.registry.preload(self.model_path, kind="vosk")
+
+    def load_model(self):
+        self._check_path()
         if self.model is None:
-            self.model = Model(self.model_path)
+            self.model = self.registry.get(self.model_path, kind="vosk")
         return self.model
+
+    def stats(self) -> Optional[dict]:
+        return self.registry.stats().get(ModelRegistry._key(self.model_path, "vosk"))
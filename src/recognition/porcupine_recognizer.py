@@ -2,6 +2,7 @@ import pvporcupine
 import numpy as np
 import os
 from src.core.config import CONFIG
+from src.audio.reframer import FrameAdapter
 
 class PorcupineRecognizer:
     """
@@ -16,6 +17,8 @@ class PorcupineRecognizer:
         self.sensitivities = kws_config["sensitivities"]
         self.model_path = kws_config["model_path"]
         self.handle = None
+        self.frame_length = None
+        self._frames = None
 
         # Verifica se o arquivo da hotword (.ppn) existe
         if not os.path.exists(self.keyword_paths[0]):
@@ -33,6 +36,9 @@ class PorcupineRecognizer:
                 model_path=self.model_path,
                 sensitivities=self.sensitivities
             )
+            self.frame_length = self.handle.frame_length
+            # chunks de qualquer tamanho são reempacotados em frames exatos do Porcupine
+            self._frames = FrameAdapter(kws=self.frame_length)
             print(f"Porcupine ativado (PT). Frame: {self.handle.frame_length} amostras.")
 
         except pvporcupine.PorcupineError as e:
@@ -41,15 +47,19 @@ class PorcupineRecognizer:
 
     def process_chunk(self, chunk: bytes) -> int:
         """
-        Processa um chunk de áudio PCM16 (1024 bytes).
+        Processa um chunk de áudio PCM16 de qualquer tamanho. As amostras são
+        acumuladas e cada frame completo de `frame_length` é enviado ao Porcupine;
+        o resto fica guardado para o próximo chunk.
         :param chunk: Chunk de áudio em bytes.
         :return: Índice (int) da palavra-chave detectada, ou -1.
         """
         if self.handle is None:
             return -1
-        frame = np.frombuffer(chunk, dtype=np.int16)
-
-        result = self.handle.process(frame)
+        result = -1
+        for _, frame in self._frames.push(np.frombuffer(chunk, dtype=np.int16)):
+            index = self.handle.process(frame)
+            if index >= 0 and result < 0:
+                result = index
         return result
 
     def delete(self):
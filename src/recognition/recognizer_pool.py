@@ -0,0 +1,67 @@
+"""
+src/recognition/recognizer_pool.py
+
+Pool de KaldiRecognizer prontos para uso.
+
+Construir um KaldiRecognizer aloca o decodificador, o pipeline de features e
+o estado de rescoring; no diálogo (perguntar_acao) isso acontecia a cada nova
+tentativa, justamente no caminho que o usuário percebe como latência. O pool
+mantém reconhecedores pré-alocados: acquire() devolve um já zerado em tempo
+constante e release() faz o Reset() (barato comparado a uma construção) fora
+do caminho crítico.
+
+    pool = RecognizerPool(model, 8000, size=2)
+    with pool.recognizer() as rec:
+        rec.AcceptWaveform(data)
+"""
+
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from vosk import KaldiRecognizer
+from src.core.config import CONFIG
+
+
+class RecognizerPool:
+    def __init__(self, model, sample_rate: Optional[int] = None, size: int = 1,
+                 grammar: Optional[str] = None,
+                 factory: Optional[Callable[[], object]] = None):
+        self.sample_rate = sample_rate or CONFIG["audio"]["samplerate"]
+        if factory is None:
+            if grammar is None:
+                factory = lambda: KaldiRecognizer(model, self.sample_rate)
+            else:
+                factory = lambda: KaldiRecognizer(model, self.sample_rate, grammar)
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._idle = deque(self._factory() for _ in range(size))
+        self.created = size
+        self.reused = 0
+
+    def acquire(self):
+        """Retorna um reconhecedor zerado; só constrói um novo se o pool estiver vazio."""
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+            self.created += 1
+        return self._factory()
+
+    def release(self, recognizer) -> None:
+        """Zera o reconhecedor e o devolve ao pool."""
+        recognizer.Reset()
+        with self._lock:
+            self._idle.append(recognizer)
+
+    @contextmanager
+    def recognizer(self):
+        rec = self.acquire()
+        try:
+            yield rec
+        finally:
+            self.release(rec)
+
+    def stats(self) -> dict:
+        return {"idle": len(self._idle), "created": self.created, "reused": self.reused}
@@ -1,29 +1,99 @@
 from vosk import KaldiRecognizer
 import json
+from typing import Optional
 from src.core.config import CONFIG
+from src.nlp.grammar import command_grammar, resolve_grammar
 
 class VoskRecognizer():
-    def __init__(self, model):
+    def __init__(self, model, grammar: Optional[str] = None):
+        """
+        grammar: lista JSON de frases (ver src/nlp/grammar.py) ou "commands";
+        se omitido, usa CONFIG["recognition"]["grammar"] (None = vocabulário aberto).
+        """
         self.model = model
         self.sample_rate = CONFIG["audio"]["samplerate"]
+        spec = grammar or CONFIG["recognition"].get("grammar")
+        self.grammar = resolve_grammar(spec, model)
+        # gramática "commands" em uso: acompanha os reloads do vocabulário
+        self._commands = self.grammar if spec == "commands" else None
+        self._own = None
+        self.recognizer = None
         self.reset_session()
-        print(f"VoskRecognizer inicializado em {self.sample_rate} Hz.")
+        modo = "gramática restrita" if self.grammar else "vocabulário aberto"
+        print(f"VoskRecognizer inicializado em {self.sample_rate} Hz ({modo}).")
+
+    def _new_recognizer(self) -> KaldiRecognizer:
+        if self.grammar is None:
+            self._own = KaldiRecognizer(self.model, self.sample_rate)
+        else:
+            self._own = KaldiRecognizer(self.model, self.sample_rate, self.grammar)
+        return self._own
 
     def reset_session(self):
-        self.recognizer = KaldiRecognizer(self.model, self.sample_rate)
+        # Reset() zera o estado sem realocar o reconhecedor
+        if self.recognizer is None:
+            self.recognizer = self._new_recognizer()
+        else:
+            self.recognizer.Reset()
+            self._follow_vocabulary()
+
+    def _follow_vocabulary(self) -> None:
+        """Reaplica a gramática "commands" se o vocabulário foi recarregado (src/nlp/store.py)."""
+        # só no reconhecedor próprio e fora do diálogo (gramática de escolha ou do pool)
+        if self._commands is None or self.grammar is not self._commands or self.recognizer is not self._own:
+            return
+        fresh = command_grammar(self.model)
+        if fresh != self._commands:
+            self.recognizer.SetGrammar(fresh)
+        self._commands = self.grammar = fresh
+
+    def set_grammar(self, grammar: Optional[str]) -> None:
+        """Troca a gramática em tempo de execução (None volta ao vocabulário aberto)."""
+        self.grammar = resolve_grammar(grammar, self.model)
+        if grammar == "commands":
+            self._commands = self.grammar
+        if self.grammar is None:
+            # o Kaldi não remove uma gramática já aplicada; recria o reconhecedor
+            self.recognizer = self._new_recognizer()
+        else:
+            self.recognizer.SetGrammar(self.grammar)
 
     def recognize_chunk(self, chunk: bytes) -> str:
-        if self.recognizer.AcceptWaveform(chunk):
+        # o Vosk (cffi) só aceita bytes; memoryviews do buffer circular são convertidas aqui
+        if self.recognizer.AcceptWaveform(bytes(chunk)):
             result = json.loads(self.recognizer.Result())
             return result.get("text", "")
         else:
             partial = json.loads(self.recognizer.PartialResult())
             return partial.get("partial", "")
 
+    def accept_chunk(self, chunk: bytes):
+        """
+        Alimenta o Kaldi com um chunk. Retorna o texto final quando o endpoint
+        do Vosk dispara, ou None enquanto a frase ainda está em andamento.
+        """
+        if self.recognizer.AcceptWaveform(bytes(chunk)):
+            return json.loads(self.recognizer.Result()).get("text", "")
+        return None
+
+    def partial(self) -> str:
+        """Hipótese parcial da frase em andamento (não encerra a frase)."""
+        return json.loads(self.recognizer.PartialResult()).get("partial", "")
+
+    def flush(self) -> str:
+        """Força o fim da frase atual e retorna o texto reconhecido até aqui."""
+        return json.loads(self.recognizer.FinalResult()).get("text", "")
+
+    def recognize_utterance(self, audio: bytes) -> str:
+        """Decodifica uma frase completa (ex.: Endpointer.utterances) do zero."""
+        self.reset_session()
+        self.recognizer.AcceptWaveform(bytes(audio))
+        return self.flush()
+
     def recognize_stream(self, audio_source) -> str:
         final_text = ""
         for chunk in audio_source:  # precisa ser iterável
-            if self.recognizer.AcceptWaveform(chunk):
+            if self.recognizer.AcceptWaveform(bytes(chunk)):
                 final_text += json.loads(self.recognizer.Result()).get("text", "") + " "
         final_text += json.loads(self.recognizer.FinalResult()).get("text", "")
         return final_text.strip()
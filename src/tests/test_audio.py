@@ -11,10 +11,10 @@ def test_audio_stream():
 
     with stream:
         # tenta pegar um chunk do microfone
-        chunk = audio_input.q.get(timeout=5)  # espera até 5 segundos
+        chunk = audio_input.ring.read(audio_input.blocksize, timeout=5)  # espera até 5 segundos
         assert chunk is not None
-        assert isinstance(chunk, bytes)
-        assert len(chunk) > 0
+        assert isinstance(chunk, memoryview)
+        assert len(chunk) == audio_input.blocksize * 2
     print("Stream de áudio funcionando corretamente!")
 
 
@@ -26,7 +26,7 @@ def test_audio_recorder():
     stream = audio_input.start_stream()
 
     with stream:
-        chunk = recorder.get_next_chunk()
+        chunk = recorder.get_next_chunk(timeout=5)
         assert chunk is not None
-        assert isinstance(chunk, bytes)
+        assert isinstance(chunk, memoryview)
         print("Recorder capturou áudio corretamente!")
\ No newline at end of file
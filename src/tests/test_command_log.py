@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.model.jsonwriter import CommandLog, read_log
+
+CMD = {"intent": "controlar_dispositivo", "entities": {"acao": "ligar", "dispositivo": "portão"},
+       "confidence": 0.9}
+
+
+class FakeClock:
+    def __init__(self, start=datetime(2026, 3, 1, 23, 59, 59)):
+        self.now = start
+
+    def __call__(self):
+        return self.now
+
+
+def test_commands_in_same_second_are_all_kept(tmp_path):
+    clock = FakeClock()
+    with CommandLog(str(tmp_path), clock=clock) as log:
+        for i in range(5):
+            log.save_command({**CMD, "n": i})
+    records = list(read_log(str(tmp_path)))
+    assert [r["n"] for r in records] == list(range(5))
+    assert records[0]["timestamp"] == "2026-03-01T23:59:59"
+    assert records[0]["entities"]["dispositivo"] == "portão"
+    assert os.listdir(tmp_path) == ["commands_20260301.jsonl"]
+
+
+def test_writes_are_batched(tmp_path):
+    log = CommandLog(str(tmp_path), flush_bytes=1 << 20, flush_interval_s=60, fsync="batch")
+    for _ in range(100):
+        log.save_command(CMD)
+    assert log.flush(timeout=5)
+    stats = log.stats()
+    assert stats["records"] == 100
+    assert stats["batches"] == 1 and stats["fsyncs"] == 1
+    log.close()
+
+
+def test_size_and_time_thresholds(tmp_path):
+    log = CommandLog(str(tmp_path), flush_bytes=300, flush_interval_s=0.05, fsync="never")
+    for _ in range(10):
+        log.save_command(CMD)
+    # cada linha tem ~110 bytes: lotes de 3
+    log.flush(timeout=5)
+    assert log.stats()["max_batch"] == 3
+    log.save_command(CMD)
+    deadline = time.monotonic() + 2
+    while log.stats()["records"] < 11 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # gravado pelo limite de tempo, sem flush explícito
+    assert log.stats()["records"] == 11
+    assert log.stats()["fsyncs"] == 0
+    log.close()
+
+
+def test_fsync_always_writes_each_command(tmp_path):
+    with CommandLog(str(tmp_path), flush_bytes=1 << 20, fsync="always") as log:
+        for _ in range(4):
+            log.save_command(CMD)
+    assert log.stats()["batches"] == 4 and log.stats()["fsyncs"] == 4
+
+
+def test_daily_rotation_and_compression(tmp_path):
+    clock = FakeClock()
+    with CommandLog(str(tmp_path), clock=clock, compress=True) as log:
+        log.save_command({**CMD, "n": 0})
+        log.flush()
+        clock.now += timedelta(seconds=2)
+        log.save_command({**CMD, "n": 1})
+    assert sorted(os.listdir(tmp_path)) == ["commands_20260301.jsonl.gz", "commands_20260302.jsonl"]
+    assert log.stats()["rotations"] == 1
+    assert [r["n"] for r in read_log(str(tmp_path))] == [0, 1]
+
+
+def test_interrupted_compression_never_duplicates_a_day(tmp_path):
+    """Queda durante a compactação: o .tmp é descartado ou instalado, nunca somado de novo."""
+    clock = FakeClock()
+    with CommandLog(str(tmp_path), clock=clock, compress=True) as log:
+        log.save_command({**CMD, "n": 0})
+    day1 = tmp_path / "commands_20260301.jsonl"
+    # queda antes da confirmação: .tmp parcial e o .jsonl intacto
+    (tmp_path / "commands_20260301.jsonl.gz.tmp").write_bytes(b"parcial")
+    clock.now += timedelta(seconds=2)
+    with CommandLog(str(tmp_path), clock=clock, compress=True) as log:
+        log.save_command({**CMD, "n": 1})
+    assert not day1.exists()
+    assert [r["n"] for r in read_log(str(tmp_path))] == [0, 1]
+
+    # queda depois da confirmação: .jsonl já apagado, .tmp completo com o dia
+    gz = tmp_path / "commands_20260301.jsonl.gz"
+    os.replace(gz, str(gz) + ".tmp")
+    clock.now += timedelta(days=1)
+    with CommandLog(str(tmp_path), clock=clock, compress=True) as log:
+        log.save_command({**CMD, "n": 2})
+    assert sorted(os.listdir(tmp_path)) == ["commands_20260301.jsonl.gz", "commands_20260302.jsonl.gz",
+                                            "commands_20260303.jsonl"]
+    assert [r["n"] for r in read_log(str(tmp_path))] == [0, 1, 2]
+
+
+def test_flush_after_close_returns_immediately(tmp_path):
+    log = CommandLog(str(tmp_path))
+    log.save_command(CMD)
+    log.close()
+    t0 = time.monotonic()
+    assert log.flush() is True
+    log.save_command(CMD)  # sem escritor: fica pendente
+    assert log.flush() is False
+    assert time.monotonic() - t0 < 1.0
+
+
+def test_flush_with_full_queue_times_out(tmp_path):
+    release = threading.Event()
+    log = CommandLog(str(tmp_path), max_pending=1, fsync="always")
+    # escritor travado num destino: a fila enche e não esvazia
+    log.add_sink(lambda records: release.wait(5))
+    log.save_command(CMD)
+    deadline = time.monotonic() + 2
+    while log._queue.qsize() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert log.save_command(CMD)
+    t0 = time.monotonic()
+    assert log.flush(timeout=0.1) is False
+    assert time.monotonic() - t0 < 1.0
+    release.set()
+    log.close()
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    with CommandLog(str(tmp_path), clock=FakeClock()) as log:
+        log.save_command(CMD)
+    with open(tmp_path / "commands_20260301.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"intent": "contr')
+    assert len(list(read_log(str(tmp_path)))) == 1
+
+
+def test_empty_command_and_invalid_policy(tmp_path):
+    with CommandLog(str(tmp_path)) as log:
+        assert log.save_command({}) is False
+    with pytest.raises(ValueError):
+        CommandLog(str(tmp_path), fsync="sometimes")
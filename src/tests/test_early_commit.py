@@ -0,0 +1,181 @@
+import asyncio
+import time
+
+from src.audio.ring_buffer import BLOCK
+from src.audio.sources import AudioSource
+from src.core.early_commit import EarlyCommitter
+from src.core.runtime import AsyncRuntime
+
+
+def test_commits_once_after_stable_chunks():
+    committer = EarlyCommitter(stable_chunks=2, min_confidence=0.5)
+    assert committer.update("desliga a luz") is None               # sem dispositivo ainda
+    assert committer.update("desliga a luz da sala") is None       # primeiro parcial acionável
+    result = committer.update("desliga a luz da sala")             # segundo igual: estável
+    assert result["early"] is True
+    assert result["entities"]["dispositivo"] == "luz_sala"
+    assert committer.update("desliga a luz da sala agora") is None  # já liberado nesta frase
+    assert committer.stats()["early_commits"] == 1
+
+
+def test_nlp_runs_only_when_partial_changes():
+    calls = []
+
+    def parse(text):
+        calls.append(text)
+        return {"intent": "x", "entities": {"acao": "ligar", "dispositivo": "luz"}, "confidence": 1.0}
+
+    committer = EarlyCommitter(stable_chunks=5, min_confidence=0.5, parse=parse)
+    for _ in range(4):
+        committer.update("liga a luz")
+    assert calls == ["liga a luz"]
+
+
+def test_final_dedups_matching_and_passes_divergent():
+    committer = EarlyCommitter(stable_chunks=1, min_confidence=0.5)
+    assert committer.update("liga a luz da sala") is not None
+    assert committer.final("liga a luz da sala") is None
+    assert committer.stats()["deduped"] == 1
+
+    assert committer.update("liga a luz da sala") is not None
+    result = committer.final("liga a luz do quarto")
+    assert result["entities"]["dispositivo"] == "luz_quarto"
+    assert committer.stats()["mismatches"] == 1
+    # sem commit antecipado o final passa direto
+    assert committer.final("liga a luz da sala") is not None
+
+
+def test_empty_final_ends_the_phrase():
+    """Endpoint vazio após o commit: a mesma ordem repetida não é deduplicada."""
+    committer = EarlyCommitter(stable_chunks=1, min_confidence=0.5)
+    assert committer.update("liga a luz da sala") is not None
+    assert committer.final("") is None
+    assert committer.committed is None
+    assert committer.update("liga a luz da sala") is not None
+    assert committer.stats()["early_commits"] == 2
+    assert committer.stats()["mismatches"] == 0
+
+
+class ListSource(AudioSource):
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = list(chunks)
+        self.delay = delay
+
+    def read(self, size):
+        time.sleep(self.delay)
+        return self.chunks.pop(0) if self.chunks else b""
+
+    @property
+    def exhausted(self):
+        return not self.chunks
+
+
+class PartialASR:
+    """Parciais crescentes e o texto final só no último chunk (endpoint)."""
+
+    def __init__(self, partials, final):
+        self.partials = list(partials)
+        self.final = final
+        self.current = ""
+        self.model = None
+
+    def accept_chunk(self, chunk):
+        if self.partials:
+            self.current = self.partials.pop(0)
+            return None
+        return self.final
+
+    def partial(self):
+        return self.current
+
+    def flush(self):
+        return ""
+
+    def reset_session(self):
+        pass
+
+
+def run_runtime(partials, final, early_commit):
+    commands = []
+    chunks = [b"\x00\x00" * 800] * (len(partials) + 1)
+    runtime = AsyncRuntime(ListSource(chunks, delay=0.01), PartialASR(partials, final),
+                           overflow=BLOCK, on_command=commands.append, verbose=False,
+                           early_commit=early_commit)
+    asyncio.run(runtime.run())
+    return runtime, commands
+
+
+def test_runtime_acts_on_stable_partial_and_skips_duplicate_final():
+    partials = ["liga", "liga a luz", "liga a luz da sala", "liga a luz da sala", "liga a luz da sala"]
+    runtime, commands = run_runtime(partials, "liga a luz da sala", early_commit=True)
+    assert len(commands) == 1
+    assert commands[0]["early"] is True
+    stats = runtime.stats()["early_commit"]
+    assert stats["early_commits"] == 1 and stats["deduped"] == 1
+
+
+def test_runtime_without_early_commit_waits_for_final():
+    partials = ["liga", "liga a luz", "liga a luz da sala"]
+    runtime, commands = run_runtime(partials, "liga a luz da sala", early_commit=False)
+    assert len(commands) == 1
+    assert "early" not in commands[0]
+    assert "early_commit" not in runtime.stats()
+
+
+class ScriptASR:
+    """Por chunk: ("p", parcial) atualiza o parcial; ("f", texto) fecha a frase."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.current = ""
+        self.model = None
+
+    def accept_chunk(self, chunk):
+        kind, text = self.script.pop(0)
+        if kind == "f":
+            self.current = ""
+            return text
+        self.current = text
+        return None
+
+    def partial(self):
+        return self.current
+
+    def flush(self):
+        return ""
+
+    def reset_session(self):
+        pass
+
+
+def test_runtime_empty_final_does_not_dedup_repeated_command():
+    command = "liga a luz da sala"
+    script = [("p", command), ("p", command), ("f", ""),
+              ("p", command), ("p", command), ("f", command)]
+    commands = []
+    runtime = AsyncRuntime(ListSource([b"\x00\x00" * 800] * len(script), delay=0.01), ScriptASR(script),
+                           overflow=BLOCK, on_command=commands.append, verbose=False, early_commit=True)
+    asyncio.run(runtime.run())
+    assert [c["entities"]["dispositivo"] for c in commands] == ["luz_sala", "luz_sala"]
+    stats = runtime.stats()["early_commit"]
+    assert stats["early_commits"] == 2 and stats["deduped"] == 1
+
+
+def test_hotword_timeout_is_reported_as_empty_final():
+    """O HotwordPipeline devolve None no timeout; o runtime o entrega como final vazio."""
+    from src.core.pipeline import HotwordPipeline
+
+    class KWS:
+        frame_length = 512
+
+        def process_chunk(self, data):
+            return 0 if data[:2] == b"\x01\x00" else -1
+
+    asr = ScriptASR([("p", "liga a luz")] * 10)
+    runtime = AsyncRuntime(ListSource([]), asr, verbose=False, early_commit=True)
+    runtime.hotword = HotwordPipeline(KWS(), asr, sample_rate=8000, preroll_ms=0,
+                                      asr_timeout_s=0.1, asr_block_samples=512)
+    assert runtime._recognize_chunk(b"\x01\x00" * 512) is None   # hotword
+    assert runtime._recognize_chunk(b"\x00\x00" * 512) is None   # 64 ms de fala
+    assert runtime._recognize_chunk(b"\x00\x00" * 512) == ""     # timeout sem texto
+    assert runtime._recognize_chunk(b"\x00\x00" * 512) is None   # de volta ao KWS
@@ -0,0 +1,83 @@
+import numpy as np
+
+from src.audio.endpointer import Endpointer, START, CONTINUE, END
+from src.audio.preprocessor import VAD
+
+SR = 8000
+FRAME = 240  # 30 ms @ 8 kHz
+
+
+def energy_vad():
+    vad = VAD(sample_rate=SR, energy_threshold=500.0)
+    vad.vad = None  # decisão determinística por energia
+    return vad
+
+
+def frames(value, count):
+    return np.full(FRAME * count, value, dtype=np.int16)
+
+
+def make_endpointer(**kwargs):
+    params = dict(sample_rate=SR, vad=energy_vad(), preroll_ms=90, min_speech_ms=60,
+                  trailing_silence_ms=150, max_utterance_ms=3000)
+    params.update(kwargs)
+    return Endpointer(**params)
+
+
+def test_utterance_includes_preroll_and_trailing_silence():
+    """A frase sai inteira: pré-roll + fala + silêncio final até o timeout."""
+    audio = np.concatenate([frames(0, 10), frames(3000, 8), frames(0, 20)])
+    chunks = [audio[i:i + 160].tobytes() for i in range(0, audio.size, 160)]
+    utterances = list(make_endpointer().utterances(chunks))
+    assert len(utterances) == 1
+    utt = np.frombuffer(utterances[0], dtype=np.int16)
+    # 3 frames de pré-roll + 8 de fala + 5 de silêncio final
+    assert utt.size == FRAME * (3 + 8 + 5)
+    assert np.count_nonzero(utt) == FRAME * 8
+
+
+def test_short_clicks_do_not_start_speech():
+    """Picos menores que min_speech_ms não abrem frase."""
+    audio = np.concatenate([frames(0, 5), frames(3000, 1), frames(0, 10)])
+    assert list(make_endpointer().events([audio.tobytes()])) == []
+
+
+def test_event_sequence_and_max_length():
+    """Eventos START/CONTINUE/END, com corte em max_utterance_ms."""
+    endpointer = make_endpointer(max_utterance_ms=300)
+    events = list(endpointer.events([frames(3000, 30).tobytes()]))
+    kinds = [e.kind for e in events]
+    assert kinds[0] == START and kinds[1] == CONTINUE and kinds[2] == END
+    assert kinds.count(END) == 3
+    assert events[2].end_sample - events[0].start_sample == FRAME * 10
+
+
+class PassThrough:
+    """Preprocessor identidade: registra o que chega depois do realinhamento."""
+
+    def __init__(self):
+        self.seen = []
+
+    def bytes_to_np(self, b):
+        return np.frombuffer(b, dtype=np.int16)
+
+    def process_array(self, arr):
+        self.seen.append(arr.copy())
+        return arr
+
+
+def test_odd_sized_chunks_keep_alignment():
+    """Leituras de tamanho ímpar (timeout da serial) com e sem preprocessor."""
+    audio = np.concatenate([frames(0, 10), frames(3000, 8), frames(0, 20)])
+    raw = audio.tobytes()
+    sizes = [1, 321, 2, 55, 1000]
+    chunks, pos = [], 0
+    while pos < len(raw):
+        size = sizes[len(chunks) % len(sizes)]
+        chunks.append(raw[pos:pos + size])
+        pos += size
+    expected = list(make_endpointer().utterances([raw]))
+    preprocessor = PassThrough()
+    for endpointer in (make_endpointer(), make_endpointer(preprocessor=preprocessor)):
+        assert list(endpointer.utterances(chunks)) == expected
+    assert np.array_equal(np.concatenate(preprocessor.seen), audio)
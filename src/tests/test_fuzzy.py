@@ -0,0 +1,69 @@
+import pytest
+
+from src.core.config import CONFIG
+from src.core.early_commit import EarlyCommitter
+from src.nlp import nlp
+from src.nlp.fuzzy import FuzzyIndex, levenshtein, phonetic_key
+
+
+@pytest.mark.parametrize("a, b", [
+    ("luz", "lus"),
+    ("acende", "asende"),
+    ("cozinha", "cosinha"),
+    ("ligue", "ligui"),
+    ("garagem", "garajem"),
+    ("janela", "janella"),
+    ("quarto", "kuarto"),
+])
+def test_phonetic_key_merges_homophones(a, b):
+    assert phonetic_key(a) == phonetic_key(b)
+
+
+def test_levenshtein():
+    assert levenshtein("ventilador", "ventilado") == 1
+    assert levenshtein("", "abc") == 3
+    assert levenshtein("sala", "sala") == 0
+
+
+def test_correct_is_bounded_by_word_length():
+    index = FuzzyIndex({"x": {"luz": ["luz"], "ventilador": ["ventilador"], "sala": ["sala"]}}, nlp._normalize)
+    assert index.correct("lus") == ("luz", pytest.approx(0.9))
+    word, score = index.correct("ventilado")
+    assert word == "ventilador" and score < 0.9
+    # chave curta: só igualdade fonética
+    assert index.correct("lua") is None
+    assert index.correct("pizza") is None
+
+
+def test_parse_command_recovers_near_misses():
+    result = nlp.parse_command("ligue a lus da sala")
+    assert result["intent"] == nlp.INTENT_DEFAULT
+    assert result["entities"] == {"acao": "ligar", "dispositivo": "luz_sala"}
+    assert result["fuzzy"]["devices"]["heard"] == "lus"
+    # o casamento aproximado pesa menos na confiança que o exato
+    assert result["confidence"] < nlp.parse_command("ligue a luz da sala")["confidence"]
+
+    result = nlp.parse_command("asende a luz da cosinha")
+    assert result["entities"] == {"acao": "ligar", "dispositivo": "luz_cozinha"}
+    assert "actions" in result["fuzzy"]
+
+
+def test_exact_matches_and_noise_are_untouched():
+    assert "fuzzy" not in nlp.parse_command("liga a luz da sala")
+    for text in ("quero pizza", "que horas sao", "toca alguma coisa"):
+        assert "fuzzy" not in nlp.parse_command(text), text
+
+
+def test_fuzzy_can_be_disabled(monkeypatch):
+    monkeypatch.setitem(CONFIG["nlp"]["fuzzy"], "enabled", False)
+    nlp._PARSE_CACHE.clear()
+    try:
+        assert nlp.parse_command("ligue a lus da sala")["entities"]["dispositivo"] is None
+    finally:
+        nlp._PARSE_CACHE.clear()
+
+
+def test_early_commit_waits_for_final_on_fuzzy_partials():
+    committer = EarlyCommitter(stable_chunks=1, min_confidence=0.5)
+    assert committer.update("ligue a lus da sala") is None
+    assert committer.update("ligue a luz da sala") is not None
@@ -0,0 +1,57 @@
+import json
+
+from src.nlp.grammar import UNK, choice_grammar, command_grammar, resolve_grammar, vocabulary_phrases
+from src.nlp.keys import ACTIONS, DEVICES
+
+
+class FakeModel:
+    """Léxico mínimo: só palavras acentuadas/ASCII listadas aqui existem."""
+
+    def __init__(self, words):
+        self.words = set(words)
+
+    def vosk_model_find_word(self, word):
+        return 1 if word in self.words else -1
+
+
+def test_command_grammar_covers_keys():
+    """A gramática de comandos contém todos os sinônimos, sim/não e termina em [unk]."""
+    phrases = json.loads(command_grammar())
+    assert phrases[-1] == UNK
+    for synonyms in list(ACTIONS.values()) + list(DEVICES.values()):
+        assert set(s.lower() for s in synonyms) <= set(phrases)
+    assert "sim" in phrases and "não" in phrases
+    assert len(phrases) == len(set(phrases))
+
+
+def test_choice_grammar_is_small_and_filtered():
+    """No diálogo só entram os sinônimos das opções e frases com palavras conhecidas."""
+    model = FakeModel(["ligar", "liga", "desligar", "desliga", "sim", "não"])
+    phrases = json.loads(choice_grammar(["ligar", "desligar"], model))
+    assert phrases == ["ligar", "liga", "desligar", "desliga", "sim", "não", UNK]
+
+
+def test_vocabulary_phrases_dedup_and_resolve():
+    assert vocabulary_phrases({"a": ["Liga", "liga  ", "x y"]}) == ["liga", "x y"]
+    assert resolve_grammar(None) is None
+    assert resolve_grammar('["sim"]') == '["sim"]'
+    assert resolve_grammar("commands") == command_grammar()
+
+
+def test_grammar_follows_installed_vocabulary():
+    """--vocab e reloads: a gramática vem do vocabulário em uso, não de keys.py na importação."""
+    from src.nlp import nlp
+
+    original = nlp.current_vocabulary()
+    data = original.as_dict()
+    data["devices"] = {**data["devices"], "abajur": ["abajur"]}
+    data["actions"] = {**data["actions"], "ligar": ["ativar"]}
+    try:
+        before = command_grammar()
+        nlp.install_vocabulary(nlp.Vocabulary.from_dict(data))
+        assert "abajur" not in json.loads(before)
+        assert "abajur" in json.loads(command_grammar())
+        assert json.loads(choice_grammar(["ligar"])) == ["ativar", "sim", "não", UNK]
+    finally:
+        nlp.install_vocabulary(original)
+    assert command_grammar() == before
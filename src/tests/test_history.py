@@ -0,0 +1,98 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.model.history import CommandHistory, to_timestamp
+from src.model.jsonwriter import CommandLog
+
+T0 = datetime(2026, 3, 2, 8, 0, 0)
+
+
+def cmd(acao, dispositivo, when, intent="controlar_dispositivo"):
+    return {"intent": intent, "entities": {"acao": acao, "dispositivo": dispositivo},
+            "confidence": 0.9, "timestamp": when.isoformat()}
+
+
+@pytest.fixture
+def history():
+    with CommandHistory(":memory:") as h:
+        h.insert_many([
+            cmd("ligar", "luz_sala", T0),
+            cmd("desligar", "luz_sala", T0 + timedelta(hours=2)),
+            cmd("ligar", "luz_sala", T0 + timedelta(days=1)),
+            cmd("ligar", "tv_sala", T0 + timedelta(days=1, minutes=5)),
+            cmd(None, None, T0 + timedelta(days=8), intent="desconhecido"),
+        ])
+        yield h
+
+
+def test_count_with_filters_and_range(history):
+    assert history.count() == 5
+    assert history.count(dispositivo="luz_sala", acao="ligar") == 2
+    assert history.count(dispositivo="luz_sala", since=T0 + timedelta(hours=1)) == 2
+    assert history.count(since=T0, until=T0 + timedelta(days=1)) == 2
+    assert history.count(intent="desconhecido") == 1
+
+
+def test_query_returns_original_records(history):
+    latest = history.query(limit=2)
+    assert latest[0]["intent"] == "desconhecido"
+    assert latest[1]["entities"] == {"acao": "ligar", "dispositivo": "tv_sala"}
+    oldest = history.query(limit=1, newest_first=False, dispositivo="luz_sala")
+    assert oldest[0]["timestamp"] == T0.isoformat()
+
+
+def test_aggregate_by_columns_and_day(history):
+    top = history.aggregate(by=("dispositivo", "acao"), intent="controlar_dispositivo")
+    assert top[0] == {"dispositivo": "luz_sala", "acao": "ligar", "count": 2}
+    per_day = history.aggregate(by=(), bucket="day", dispositivo="luz_sala")
+    assert per_day == [{"bucket": "2026-03-02", "count": 2}, {"bucket": "2026-03-03", "count": 1}]
+    with pytest.raises(ValueError):
+        history.aggregate(by=("record",))
+    with pytest.raises(ValueError):
+        history.count(comodo="sala")
+
+
+def test_duplicates_are_ignored(history):
+    assert history.insert_many([cmd("ligar", "luz_sala", T0)]) == 0
+    # mesmo segundo, comando diferente: entra
+    assert history.insert_many([cmd("ligar", "tv_sala", T0)]) == 1
+    assert history.count() == 6
+
+
+def test_relative_times():
+    assert to_timestamp("7d", now=1_000_000) == 1_000_000 - 7 * 86400
+    assert to_timestamp("90m", now=10_000) == 10_000 - 5400
+    assert to_timestamp("2026-03-02T08:00:00") == T0.timestamp()
+
+
+def test_live_ingest_through_command_log(tmp_path):
+    history = CommandHistory(str(tmp_path / "h.sqlite3"))
+    clock = iter(T0 + timedelta(seconds=i) for i in range(100))
+    with CommandLog(str(tmp_path / "logs"), clock=lambda: next(clock)) as log:
+        history.attach(log)
+        for _ in range(10):
+            log.save_command({"intent": "controlar_dispositivo",
+                              "entities": {"acao": "ligar", "dispositivo": "luz_sala"}, "confidence": 1.0})
+    assert history.count(dispositivo="luz_sala") == 10
+    # importar o mesmo log depois não duplica nada
+    assert history.import_log(str(tmp_path / "logs")) == 0
+    history.close()
+
+
+def test_incremental_import_of_log_and_legacy_files(tmp_path):
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    with open(logs / "cmd_20260301_120000.json", "w", encoding="utf-8") as f:
+        json.dump(cmd("abrir", "porta_garagem", T0 - timedelta(days=1)), f, indent=4)
+    day = logs / "commands_20260302.jsonl"
+    day.write_text(json.dumps(cmd("ligar", "luz_sala", T0)) + "\n" + '{"intent": "contr', encoding="utf-8")
+    with CommandHistory(str(tmp_path / "h.sqlite3")) as history:
+        assert history.import_log(str(logs)) == 2
+        # a linha incompleta é lida quando terminar de ser gravada
+        with open(day, "a", encoding="utf-8") as f:
+            f.write('olar_dispositivo", "entities": {}, "timestamp": "2026-03-02T09:00:00"}\n')
+        assert history.import_log(str(logs)) == 1
+        assert history.import_log(str(logs)) == 0
+        assert history.count() == 3
@@ -0,0 +1,168 @@
+import asyncio
+
+import numpy as np
+
+from src.audio.ring_buffer import BLOCK
+from src.core.ingest import IngestServer, NetworkSession, push_audio
+from src.core.server import MultiStreamServer
+
+# 12 pacotes de 160 amostras
+RAMP = (np.arange(1920) % 1000).astype(np.int16).tobytes()
+
+
+def make_ingest(**kwargs):
+    sources = {}
+    options = dict(host="127.0.0.1", tcp_port=0, udp_port=0, session_timeout_s=None, verbose=False,
+                   on_session=lambda node, source: sources.__setitem__(node, source))
+    options.update(kwargs)
+    return IngestServer(**options), sources
+
+
+async def read_all(source, size):
+    """Lê a fonte (bloqueante) numa thread, como a captura do runtime."""
+    loop = asyncio.get_running_loop()
+    data = b""
+    while len(data) < size:
+        chunk = await loop.run_in_executor(None, source.read, size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+async def wait_for(condition, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition() and loop.time() < deadline:
+        await asyncio.sleep(0.01)
+    assert condition()
+
+
+def test_tcp_framed_stream_is_decoded_per_node():
+    """Dois nós pelo TCP: cada um vira uma sessão e o PCM chega íntegro."""
+    ingest, sources = make_ingest()
+
+    async def scenario():
+        async with ingest:
+            await asyncio.gather(push_audio("127.0.0.1", ingest.tcp_port, "sala", RAMP, speed=0),
+                                 push_audio("127.0.0.1", ingest.tcp_port, "quarto", RAMP, speed=0))
+            return {node: await read_all(src, len(RAMP)) for node, src in sources.items()}
+
+    received = asyncio.run(scenario())
+    assert set(received) == {"sala", "quarto"}
+    assert all(data == RAMP for data in received.values())
+
+
+def test_reconnect_keeps_session():
+    """O nó reconecta no meio do áudio e continua na mesma sessão."""
+    ingest, sources = make_ingest()
+
+    async def scenario():
+        async with ingest:
+            result = await push_audio("127.0.0.1", ingest.tcp_port, "sala", RAMP, speed=0,
+                                      reconnect_every=4, batch_packets=1)
+            session = ingest.sessions["sala"]
+            await wait_for(lambda: session.bytes_received == result["bytes"] and session.transport is None)
+            return result, session.stats()
+
+    result, stats = asyncio.run(scenario())
+    assert len(sources) == 1
+    assert result["connects"] == 3
+    assert stats["connections"] == 3 and stats["reconnects"] == 2
+    assert not stats["connected"]
+
+
+def test_udp_datagrams_carry_node_name():
+    ingest, sources = make_ingest(framed=False)
+
+    async def scenario():
+        async with ingest:
+            await push_audio("127.0.0.1", ingest.udp_port, "cozinha", RAMP, speed=0, framed=False, udp=True)
+            await wait_for(lambda: "cozinha" in sources)
+            return await read_all(sources["cozinha"], len(RAMP))
+
+    assert asyncio.run(scenario()) == RAMP
+
+
+def test_invalid_hello_is_rejected():
+    ingest, sources = make_ingest()
+
+    async def scenario():
+        async with ingest:
+            reader, writer = await asyncio.open_connection("127.0.0.1", ingest.tcp_port)
+            writer.write(b"GET / HTTP/1.1\r\n")
+            assert await reader.read() == b""
+            writer.close()
+
+    asyncio.run(scenario())
+    assert ingest.rejected == 1 and not sources
+
+
+def test_block_policy_pauses_instead_of_dropping():
+    """Com "block", a sessão cheia pausa a leitura do TCP e nada é descartado."""
+    ingest, sources = make_ingest(framed=False, buffer_seconds=0.02, overflow=BLOCK)
+
+    async def scenario():
+        async with ingest:
+            push = asyncio.create_task(push_audio("127.0.0.1", ingest.tcp_port, "sala", RAMP,
+                                                  speed=0, framed=False, batch_packets=1))
+            await wait_for(lambda: "sala" in ingest.sessions and ingest.sessions["sala"].pauses > 0)
+            data = await read_all(sources["sala"], len(RAMP))
+            await push
+            return data, ingest.sessions["sala"].stats()
+
+    data, stats = asyncio.run(scenario())
+    assert data == RAMP
+    assert stats["dropped_bytes"] == 0
+
+
+def test_expired_session_ends_stream():
+    session = NetworkSession("sala", timeout=0.05)
+    session.feed(b"\x01\x00")
+    session.close()
+    assert session.read(4) == b"\x01\x00"
+    assert session.exhausted
+
+
+class FakeASR:
+    """Reconhece um comando depois de receber meio segundo de áudio."""
+
+    def __init__(self, model):
+        self.model = model
+        self.received = 0
+
+    def accept_chunk(self, chunk):
+        self.received += len(chunk)
+        if self.received >= 8000:
+            self.received = -10 ** 9
+            return "ligar a luz da sala"
+        return None
+
+    def flush(self):
+        return ""
+
+    def reset_session(self):
+        pass
+
+
+def test_nodes_feed_multistream_server():
+    commands = []
+    server = MultiStreamServer(model=object(), workers=1, asr_factory=FakeASR, verbose=False,
+                               read_bytes=800, on_command=lambda name, r: commands.append((name, r)))
+    ingest = IngestServer(server, host="127.0.0.1", tcp_port=0, udp_port=None,
+                          session_timeout_s=0.1, verbose=False)
+    pcm = RAMP * 3
+
+    async def scenario():
+        async with ingest:
+            task = asyncio.create_task(server.run(forever=True))
+            await push_audio("127.0.0.1", ingest.tcp_port, "sala", pcm, speed=0)
+            # a sessão expira depois que o nó some, e o stream termina
+            await wait_for(lambda: "sala" in server.finished)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(scenario())
+    assert [name for name, _ in commands] == ["sala"]
+    assert commands[0][1]["entities"]["dispositivo"] == "luz_sala"
+    assert ingest.expired == 1
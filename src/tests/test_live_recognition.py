@@ -1,6 +1,9 @@
-import json
+import asyncio
 
 from src.audio.microphone import AudioInput
+from src.audio.recorder import AudioRecorder
+from src.audio.sources import RecorderSource
+from src.core.runtime import AsyncRuntime
 from src.recognition.model_manager import ModelManager
 from src.recognition.vosk_recognizer import VoskRecognizer
 from src.audio.preprocessor import AudioPreprocessor
@@ -12,31 +15,27 @@ def run_live_recognition():
     recognizer = VoskRecognizer(model)
 
     audio_input = AudioInput()
+    recorder = AudioRecorder(audio_input)
     stream = audio_input.start_stream()
 
     print("Fale algo no microfone (Ctrl+C para parar)")
-    final_text = ""
+    texts = []
+    runtime = AsyncRuntime(
+        RecorderSource(recorder),
+        recognizer,
+        preprocessor=AudioPreprocessor(streaming=True),
+        read_bytes=2 * audio_input.blocksize,
+        dialogue=False,
+        on_command=lambda result: texts.append(result["text"]),
+    )
 
     try:
         with stream:
-            while True:
-                chunk = audio_input.q.get()
-                preprocessor = AudioPreprocessor()
-                processed_chunk = preprocessor.process_array(chunk)
-                if recognizer.recognizer.AcceptWaveform(processed_chunk):
-                    result = json.loads(recognizer.recognizer.Result())
-                    text = result.get("text", "")
-                    if text:
-                        print("→", text)
-                        final_text += text + " "
-                else:
-                    partial = json.loads(recognizer.recognizer.PartialResult()).get("partial", "")
-                    if partial:
-                        print("…", partial, end="\r")
-
+            asyncio.run(runtime.run())
     except KeyboardInterrupt:
         print("\nReconhecimento parado pelo usuário")
-        print("Texto final:", final_text.strip())
+        print("Texto final:", " ".join(texts))
+        print("Runtime:", runtime.stats())
 
 if __name__ == "__main__":
-    run_live_recognition()
\ No newline at end of file
+    run_live_recognition()
@@ -0,0 +1,92 @@
+import threading
+import time
+import pytest
+
+pytest.importorskip("vosk")
+from src.recognition.model_manager import ModelRegistry, ModelManager
+
+
+class CountingLoader:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self.delay = delay
+
+    def __call__(self, path):
+        self.calls += 1
+        time.sleep(self.delay)
+        return object()
+
+
+@pytest.fixture
+def registry():
+    reg = ModelRegistry()
+    reg.register_loader("fake", CountingLoader(delay=0.05))
+    return reg
+
+
+def test_model_is_loaded_once_per_path(registry, tmp_path):
+    """Vários pedidos (inclusive concorrentes) compartilham um único carregamento."""
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get(str(tmp_path), kind="fake")))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert registry._loaders["fake"].calls == 1
+    assert all(r is results[0] for r in results)
+    stats = registry.stats()[("fake", str(tmp_path))]
+    assert stats["load_seconds"] >= 0.05
+
+
+def test_preload_and_evict(registry, tmp_path):
+    """preload() carrega em segundo plano; evict() força novo carregamento."""
+    future = registry.preload(str(tmp_path), kind="fake")
+    model = registry.get(str(tmp_path), kind="fake")
+    assert future.result() is model
+    assert registry.is_loaded(str(tmp_path), kind="fake")
+    assert registry.evict(str(tmp_path), kind="fake")
+    assert not registry.is_loaded(str(tmp_path), kind="fake")
+    assert registry.get(str(tmp_path), kind="fake") is not model
+    assert registry._loaders["fake"].calls == 2
+
+
+def test_failed_load_can_be_retried(tmp_path):
+    reg = ModelRegistry()
+    attempts = []
+
+    def flaky(path):
+        attempts.append(path)
+        if len(attempts) == 1:
+            raise RuntimeError("falha")
+        return "ok"
+
+    reg.register_loader("flaky", flaky)
+    with pytest.raises(RuntimeError):
+        reg.get(str(tmp_path), kind="flaky")
+    assert reg.get(str(tmp_path), kind="flaky") == "ok"
+
+
+def test_evict_during_preload_drops_stats(tmp_path):
+    """Um carregamento que termina depois do evict() não deixa estatísticas órfãs."""
+    reg = ModelRegistry()
+    started, release = threading.Event(), threading.Event()
+
+    def slow(path):
+        started.set()
+        release.wait(5)
+        return object()
+
+    reg.register_loader("slow", slow)
+    future = reg.preload(str(tmp_path), kind="slow")
+    assert started.wait(5)
+    assert reg.evict(str(tmp_path), kind="slow")
+    release.set()
+    future.result(timeout=5)
+    assert reg.stats() == {}
+    assert not reg.is_loaded(str(tmp_path), kind="slow")
+
+
+def test_model_manager_missing_path(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ModelManager(model_path=str(tmp_path / "nao_existe")).load_model()
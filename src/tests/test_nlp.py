@@ -0,0 +1,192 @@
+import pickle
+import re
+import pytest
+
+from src.nlp import keys, nlp
+from src.nlp.incremental import IncrementalParser
+from src.nlp.keys import ACTIONS, DEVICES, ROOMS, GENERIC_DEVICES
+from src.nlp.matcher import VocabularyIndex
+
+
+def _reference_best_match(text, synonyms_dict):
+    """Implementação original (regex por sinônimo), usada como referência."""
+    candidates = []
+    for key, syns in synonyms_dict.items():
+        for s in syns:
+            sn = nlp._normalize(s)
+            if re.search(r'(?<!\w)' + re.escape(sn) + r'(?!\w)', text):
+                candidates.append((key, sn, len(sn)))
+    if not candidates:
+        return None
+    candidates.sort(key=lambda x: x[2], reverse=True)
+    return candidates[0][0], candidates[0][1]
+
+
+SAMPLES = [
+    ("Abra a porta da garagem, por favor", "abrir", "porta_garagem", 1.0),
+    ("Liga a luz da sala", "ligar", "luz_sala", 1.0),
+    ("Pode desligar o ar condicionado?", "desligar", "ar_condicionado", 0.9),
+    ("Baixa a cortina", "fechar", None, 0.5),
+    ("Nao ligar a luz da cozinha", "desligar", "luz_cozinha", 0.95),
+    ("Acende a lâmpada do escritório", "ligar", "luz_escritorio", 0.95),
+    ("Quero pizza", None, None, 0.0),
+]
+
+
+@pytest.mark.parametrize("text, acao, dispositivo, confidence", SAMPLES)
+def test_parse_command_samples(text, acao, dispositivo, confidence):
+    """Testa as frases de exemplo do parser."""
+    result = nlp.parse_command(text)
+    assert result["entities"]["acao"] == acao
+    assert result["entities"]["dispositivo"] == dispositivo
+    assert result["confidence"] == pytest.approx(confidence)
+    expected_intent = nlp.INTENT_DEFAULT if acao and dispositivo else "desconhecido"
+    assert result["intent"] == expected_intent
+
+
+def test_parse_command_value():
+    """Testa a extração de valor numérico."""
+    result = nlp.parse_command("Coloca a TV da sala no 50%")
+    assert result["entities"]["valor"] == 50.0
+    assert result["entities"]["unidade"] == "%"
+
+
+@pytest.mark.parametrize("text", [
+    "liga a luz da sala de estar",
+    "abre o portao da garagem",
+    "desliga o ar-condicionado do quarto",
+    "micro-ondas",
+    "subir som na sala, agora",
+    "luzinha do quarto de casal",
+    "arcondicionado ar condicionadox ar_",
+    "tv da sala e tv do quarto",
+    "",
+])
+def test_find_best_match_equals_regex_reference(text):
+    """O índice pré-compilado deve casar exatamente como as regex originais."""
+    norm = nlp._normalize(text)
+    for synonyms_dict in (ACTIONS, DEVICES, ROOMS, GENERIC_DEVICES):
+        assert nlp._find_best_match(norm, synonyms_dict) == _reference_best_match(norm, synonyms_dict)
+
+
+def test_find_best_match_on_custom_dict_sees_in_place_changes():
+    """Dicionários avulsos: cache limitado e pelo conteúdo, não pelo id()."""
+    custom = {"abajur": ["abajur"]}
+    assert nlp._find_best_match("liga o abajur", custom) == ("abajur", "abajur")
+    custom["abajur"].append("luminaria")
+    custom["lustre"] = ["lustre"]
+    assert nlp._find_best_match("liga a luminaria", custom) == ("abajur", "luminaria")
+    assert nlp._find_best_match("liga o lustre", custom) == ("lustre", "lustre")
+    for i in range(100):
+        nlp._find_best_match("x", {f"k{i}": [f"k{i}"]})
+    assert nlp._extra_index.cache_info().currsize <= 32
+
+
+def test_vocabulary_index_word_boundaries():
+    """Casamentos exigem fronteira de palavra nos dois lados e preferem o mais longo."""
+    index = VocabularyIndex({"x": {"a": ["luz"], "b": ["luz da sala"], "c": ["sala"]}}, nlp._normalize)
+    assert index.find("luzes", "x") is None
+    assert index.find("a luz da sala!", "x") == ("b", "luz da sala")
+    assert index.find("sala-luz", "x") == ("c", "sala")
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_parse_commands_preserves_order(workers):
+    """O lote (serial ou com pool de processos) deve equivaler a parse_command item a item."""
+    texts = [s[0] for s in SAMPLES] * 5
+    results = list(nlp.parse_commands((t for t in texts), workers=workers, chunksize=3))
+    assert results == [nlp.parse_command(t) for t in texts]
+
+
+def test_scan_state_matches_full_scan_at_every_prefix():
+    """A varredura incremental deve dar o mesmo que scan() em cada prefixo."""
+    text = nlp._normalize("desliga o ar-condicionado do quarto e a luz da sala de estar")
+    state = nlp._VOCABULARY.cursor()
+    for i, ch in enumerate(text):
+        state.feed(ch)
+        assert state.matches() == nlp._VOCABULARY.scan(text[:i + 1])
+
+
+@pytest.mark.parametrize("text", [s[0] for s in SAMPLES] + [
+    "Coloca a TV da sala no 50%",
+    "Ajusta o ar para 22 graus por favor",
+    "  Nao   desliga a Luz do quarto  ",
+])
+def test_incremental_parser_equals_parse_command(text):
+    """Crescendo letra a letra ou palavra a palavra, o resultado é o de parse_command."""
+    parser = IncrementalParser()
+    for i in range(1, len(text) + 1):
+        assert parser.update(text[:i]) == nlp.parse_command(text[:i])
+    parser.reset()
+    words = text.split(" ")
+    for k in range(1, len(words) + 1):
+        partial = " ".join(words[:k])
+        assert parser.update(partial) == nlp.parse_command(partial)
+
+
+def test_incremental_parser_rolls_back_revised_words():
+    """Se o Vosk revisa uma palavra, só o trecho a partir dela é refeito."""
+    parser = IncrementalParser()
+    parser.update("liga a luz da sala")
+    fed = parser.chars_fed
+    result = parser.update("liga a luz da cozinha")
+    assert result == nlp.parse_command("liga a luz da cozinha")
+    assert parser.rollbacks == 1
+    # recomeça na palavra revisada, não na frase inteira
+    assert parser.chars_fed - fed == len("cozinha")
+    assert parser.update("nao liga") == nlp.parse_command("nao liga")
+
+
+def test_incremental_parser_delta():
+    parser = IncrementalParser()
+    parser.update("liga a luz")
+    assert parser.delta == {"entities": {"acao": "ligar"}, "confidence": pytest.approx(0.55)}
+    parser.update("liga a luz da sala")
+    assert parser.delta["intent"] == nlp.INTENT_DEFAULT
+    assert parser.delta["entities"] == {"dispositivo": "luz_sala"}
+    assert parser.delta["confidence"] == pytest.approx(0.45)
+    parser.update("liga a luz da sala")
+    assert parser.delta == {}
+
+
+def test_parse_cache_returns_shared_immutable_result():
+    nlp._PARSE_CACHE.clear()
+    first = nlp.parse_command("liga a luz da sala")
+    assert nlp.parse_command("liga a luz da sala") is first
+    stats = nlp.cache_stats()["parse"]
+    assert stats["hits"] >= 1 and stats["size"] >= 1
+    with pytest.raises(TypeError):
+        first["intent"] = "x"
+    with pytest.raises(TypeError):
+        first["entities"]["acao"] = "desligar"
+    # cópias são dicts comuns e o pickle preserva o conteúdo
+    copy = dict(first)
+    copy["text"] = "liga a luz da sala"
+    assert pickle.loads(pickle.dumps(first)) == first
+
+
+def test_parse_cache_evicts_least_recently_used():
+    cache = nlp.ParseCache(maxsize=2)
+    cache.put("a", {"x": 1})
+    cache.put("b", {"x": 2})
+    assert cache.get("a") == {"x": 1}
+    cache.put("c", {"x": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_reload_vocabulary_invalidates_cache(tmp_path):
+    original = nlp.current_vocabulary()
+    source = open(keys.__file__, encoding="utf-8").read()
+    path = tmp_path / "keys.py"
+    path.write_text(source.replace('"luz da sala",', '"luz da sala", "abajur da sala",', 1), encoding="utf-8")
+    assert nlp.parse_command("liga o abajur da sala")["entities"]["dispositivo"] is None
+    try:
+        nlp.reload_vocabulary(str(path))
+        assert nlp.parse_command("liga o abajur da sala")["entities"]["dispositivo"] == "luz_sala"
+        # quem consulta keys.DEVICES pelo módulo enxerga o vocabulário novo
+        assert "abajur da sala" in keys.DEVICES["luz_sala"]
+    finally:
+        nlp.install_vocabulary(original)
+    assert nlp.parse_command("liga o abajur da sala")["entities"]["dispositivo"] is None
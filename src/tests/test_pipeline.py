@@ -0,0 +1,94 @@
+import numpy as np
+
+from src.core.pipeline import HotwordPipeline, KWS_LISTENING, ASR_ACTIVE
+
+SAMPLE_RATE = 8000
+FRAME = 512
+HOTWORD = 1000   # valor de amostra que o KWS falso reconhece como hotword
+ENDPOINT = 2000  # valor de amostra que faz o ASR falso fechar a frase
+
+
+def chunk(value=0, n=FRAME):
+    return np.full(n, value, dtype=np.int16).tobytes()
+
+
+class FakeKWS:
+    frame_length = FRAME
+
+    def __init__(self):
+        self.calls = 0
+
+    def process_chunk(self, data):
+        self.calls += 1
+        return 0 if np.frombuffer(data, dtype=np.int16)[0] == HOTWORD else -1
+
+
+class FakeASR:
+    def __init__(self):
+        self.received = []
+        self.resets = 0
+
+    def reset_session(self):
+        self.resets += 1
+        self.received = []
+
+    def accept_chunk(self, data):
+        self.received.append(np.frombuffer(data, dtype=np.int16)[0])
+        if self.received[-1] == ENDPOINT:
+            return "liga a luz da sala"
+        return None
+
+    def flush(self):
+        return ""
+
+
+def test_asr_only_runs_after_hotword():
+    """Antes da hotword só o KWS processa; depois o ASR recebe pré-roll + fala."""
+    kws, asr = FakeKWS(), FakeASR()
+    pipeline = HotwordPipeline(kws, asr, sample_rate=SAMPLE_RATE, preroll_ms=130, asr_timeout_s=5.0,
+                               asr_block_samples=FRAME)
+
+    for value in (1, 2, 3):
+        assert pipeline.feed(chunk(value)) is None
+    assert asr.resets == 0 and asr.received == []
+
+    assert pipeline.feed(chunk(HOTWORD)) is None
+    assert pipeline.state == ASR_ACTIVE
+    # 130 ms @ 8 kHz = 1040 amostras -> últimos 3 chunks de 512 (inclui o da hotword)
+    assert asr.received == [2, 3, HOTWORD]
+
+    assert pipeline.feed(chunk(5)) is None
+    assert pipeline.feed(chunk(ENDPOINT)) == "liga a luz da sala"
+    assert pipeline.state == KWS_LISTENING
+    assert kws.calls == 4
+
+    report = pipeline.metrics.report()
+    assert report["activations"] == 1 and report["endpoints"] == 1
+    assert 0.0 < report["duty_cycle"] < 0.5
+
+
+def test_asr_timeout_returns_to_kws():
+    """Sem endpoint, o ASR volta ao KWS após o timeout."""
+    pipeline = HotwordPipeline(FakeKWS(), FakeASR(), sample_rate=SAMPLE_RATE, preroll_ms=0, asr_timeout_s=0.2,
+                               asr_block_samples=FRAME)
+    pipeline.feed(chunk(HOTWORD))
+    results = [pipeline.feed(chunk(7)) for _ in range(4)]
+    assert results == [None] * 4
+    assert pipeline.state == KWS_LISTENING
+    assert pipeline.metrics.timeouts == 1
+
+
+def test_any_input_block_size():
+    """Pacotes de 160 amostras (ESP32) são reempacotados em frames de KWS e blocos de ASR."""
+    kws, asr = FakeKWS(), FakeASR()
+    pipeline = HotwordPipeline(kws, asr, sample_rate=SAMPLE_RATE, preroll_ms=0, asr_block_samples=1024)
+    stream = np.concatenate([
+        np.full(FRAME, 1, dtype=np.int16),
+        np.full(FRAME, HOTWORD, dtype=np.int16),
+        np.full(1024, 5, dtype=np.int16),
+        np.full(1024, ENDPOINT, dtype=np.int16),
+    ])
+    texts = [pipeline.feed(stream[i:i + 160].tobytes()) for i in range(0, stream.size, 160)]
+    assert [t for t in texts if t] == ["liga a luz da sala"]
+    assert kws.calls == 2
+    assert asr.received == [5, ENDPOINT]
@@ -0,0 +1,124 @@
+import pytest
+import numpy as np
+
+from src.audio.preprocessor import (
+    VAD,
+    AudioPreprocessor,
+    SmoothedAGC,
+    StreamingBandpass,
+    butter_bandpass_sos,
+    frame_rms,
+    hangover_mask,
+    hysteresis_mask,
+    speech_segments,
+    trim_silence,
+)
+
+SAMPLE_RATE = 16000
+BLOCKSIZE = 512
+
+
+def sosfilt(sos, x):
+    """Filtragem offline do sinal inteiro (requer scipy)."""
+    return pytest.importorskip("scipy.signal").sosfilt(sos, x)
+
+
+def make_signal(seconds=1.0, seed=0):
+    """Tom de 440 Hz + ruído, em int16."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    sig = 0.3 * np.sin(2 * np.pi * 440 * t) + 0.05 * rng.standard_normal(t.size)
+    return (sig * 32767).astype(np.int16)
+
+
+def test_streaming_bandpass_matches_offline():
+    """Filtrar em chunks com estado deve ser igual a filtrar o sinal inteiro."""
+    pytest.importorskip("scipy")
+    signal = make_signal().astype(np.float64)
+    bp = StreamingBandpass(80.0, 7000.0, SAMPLE_RATE)
+    streamed = np.concatenate([bp.process(signal[i:i + BLOCKSIZE]) for i in range(0, signal.size, BLOCKSIZE)])
+    offline = sosfilt(butter_bandpass_sos(80.0, 7000.0, SAMPLE_RATE), signal)
+    np.testing.assert_allclose(streamed, offline, rtol=0, atol=1e-6)
+
+
+def test_streaming_preprocessor_matches_offline():
+    """O AudioPreprocessor em modo streaming deve reproduzir a filtragem offline (±1 LSB)."""
+    pytest.importorskip("scipy")
+    signal = make_signal()
+    pre = AudioPreprocessor(sample_rate=SAMPLE_RATE, highcut=7000.0, do_noise_reduction=False,
+                            normalize_mode=None, agc=False, streaming=True)
+    streamed = np.concatenate([pre.process_array(signal[i:i + BLOCKSIZE]) for i in range(0, signal.size, BLOCKSIZE)])
+    offline = sosfilt(butter_bandpass_sos(80.0, 7000.0, SAMPLE_RATE), signal.astype(np.float64))
+    offline = np.clip(np.round(offline), -32768, 32767)
+    assert np.max(np.abs(streamed.astype(np.float64) - offline)) <= 1.0
+
+    pre.reset_stream()
+    again = pre.process_array(signal[:BLOCKSIZE])
+    np.testing.assert_array_equal(again, streamed[:BLOCKSIZE])
+
+
+def test_streaming_without_scipy_skips_the_filter(monkeypatch):
+    """Sem scipy o modo streaming não filtra, mas também não falha."""
+    monkeypatch.setattr("src.audio.preprocessor._HAS_SCIPY", False)
+    signal = make_signal()
+    bp = StreamingBandpass(80.0, 7000.0, SAMPLE_RATE)
+    np.testing.assert_array_equal(bp.process(signal.astype(np.float64)), signal)
+    bp.reset()
+    pre = AudioPreprocessor(sample_rate=SAMPLE_RATE, do_noise_reduction=False,
+                            normalize_mode=None, agc=False, streaming=True)
+    np.testing.assert_array_equal(pre.process_array(signal[:BLOCKSIZE]), signal[:BLOCKSIZE])
+
+
+def test_highcut_above_nyquist_designs_highpass():
+    """Com fs=8000 e highcut=8000 o projeto não falha (vira passa-altas)."""
+    pytest.importorskip("scipy")
+    sos = butter_bandpass_sos(80.0, 8000.0, 8000)
+    assert sos.shape[1] == 6
+
+
+def test_smoothed_agc_has_no_gain_jumps():
+    """O ganho do AGC suavizado varia continuamente entre chunks."""
+    agc = SmoothedAGC(SAMPLE_RATE)
+    loud = np.full(BLOCKSIZE, 0.5)
+    quiet = np.full(BLOCKSIZE, 0.01)
+    out = np.concatenate([agc.process(c) for c in [loud] * 4 + [quiet] * 4])
+    gains = out / np.concatenate([loud] * 4 + [quiet] * 4)
+    assert np.max(np.abs(np.diff(gains))) < 0.05
+    assert gains[-1] < agc.max_gain
+
+
+def test_frame_rms_matches_loop_with_partial_frames():
+    """RMS vetorizado = loop por frame, incluindo frames parciais no final."""
+    x = np.random.default_rng(1).standard_normal(1003)
+    expected = [np.sqrt(np.mean(x[i:i + 160] ** 2)) for i in range(0, x.size, 80)]
+    np.testing.assert_allclose(frame_rms(x, 160, 80), expected)
+
+
+def test_hysteresis_and_hangover():
+    values = np.array([0, 5, 8, 5, 0, 5, 5, 0, 9, 0, 0, 0], dtype=float)
+    mask = hysteresis_mask(values, high=7, low=4)
+    assert mask.tolist() == [False, True, True, True, False, False, False, False, True, False, False, False]
+    assert hangover_mask(mask, 2).tolist()[8:] == [True, True, True, False]
+
+
+def test_speech_segments_and_trim():
+    """Segmentos de fala saem direto como limites em amostras."""
+    sr = 8000
+    silence = np.zeros(sr // 2, dtype=np.int16)
+    tone = (0.3 * 32767 * np.sin(2 * np.pi * 300 * np.arange(sr // 2) / sr)).astype(np.int16)
+    audio = np.concatenate([silence, tone, silence, silence, tone, silence])
+    segments = speech_segments(audio, sr, hangover_ms=0)
+    assert segments.tolist() == [[4000, 8000], [16000, 20000]]
+    trimmed = trim_silence(audio, sr)
+    assert trimmed.size == 16000
+
+
+def test_vad_speech_mask_matches_per_frame():
+    """A máscara vetorizada do VAD coincide com is_speech frame a frame."""
+    vad = VAD(sample_rate=8000, energy_threshold=500.0)
+    vad.vad = None  # força o caminho por energia
+    arr = (np.random.default_rng(2).standard_normal(2000) * np.repeat([100, 2000, 100, 3000], 500)).astype(np.int16)
+    mask = vad.speech_mask(arr, 240)
+    padded = np.concatenate([arr, np.zeros(-arr.size % 240, dtype=np.int16)])
+    expected = [vad.is_speech(padded[i:i + 240]) for i in range(0, padded.size, 240)]
+    assert mask.tolist() == expected
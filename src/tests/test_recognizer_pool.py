@@ -0,0 +1,35 @@
+import pytest
+
+pytest.importorskip("vosk")
+from src.recognition.recognizer_pool import RecognizerPool
+
+
+class FakeRecognizer:
+    def __init__(self):
+        self.resets = 0
+
+    def Reset(self):
+        self.resets += 1
+
+
+def test_pool_reuses_and_resets():
+    """O reconhecedor devolvido volta zerado e é reaproveitado sem nova construção."""
+    pool = RecognizerPool(model=None, sample_rate=8000, size=1, factory=FakeRecognizer)
+    with pool.recognizer() as first:
+        pass
+    assert first.resets == 1
+    with pool.recognizer() as second:
+        assert second is first
+    assert pool.stats() == {"idle": 1, "created": 1, "reused": 2}
+
+
+def test_pool_grows_when_empty():
+    """Com todos em uso, acquire() constrói um novo em vez de bloquear."""
+    pool = RecognizerPool(model=None, size=1, factory=FakeRecognizer)
+    a = pool.acquire()
+    b = pool.acquire()
+    assert a is not b
+    pool.release(a)
+    pool.release(b)
+    assert pool.stats()["idle"] == 2
+    assert pool.stats()["created"] == 2
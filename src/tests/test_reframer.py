@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from src.audio.reframer import FrameAdapter
+
+
+def test_emits_exact_frames_for_each_target():
+    """Entradas de tamanhos arbitrários viram frames exatos para cada destino, em ordem."""
+    adapter = FrameAdapter(kws=512, asr=2000)
+    signal = np.arange(10000, dtype=np.int16)
+    emitted = {"kws": [], "asr": []}
+    for start in range(0, signal.size, 160):
+        for name, frame in adapter.push(signal[start:start + 160].tobytes()):
+            emitted[name].append(frame.copy())
+
+    assert all(f.size == 512 for f in emitted["kws"])
+    assert all(f.size == 2000 for f in emitted["asr"])
+    assert np.array_equal(np.concatenate(emitted["kws"]), signal[:len(emitted["kws"]) * 512])
+    assert np.array_equal(np.concatenate(emitted["asr"]), signal[:10000])
+    assert adapter.pending("kws") == 10000 % 512
+
+
+def test_frames_are_emitted_in_time_order():
+    """Quando dois destinos completam frames no mesmo ponto, ambos saem antes do próximo trecho."""
+    adapter = FrameAdapter(small=2, big=4)
+    names = [name for name, _ in adapter.push(np.arange(8, dtype=np.int16))]
+    assert names == ["small", "small", "big", "small", "small", "big"]
+
+
+def test_reset_discards_pending_samples():
+    adapter = FrameAdapter(kws=4)
+    list(adapter.push(np.arange(3, dtype=np.int16)))
+    adapter.reset("kws")
+    frames = [f.copy() for _, f in adapter.push(np.arange(10, 14, dtype=np.int16))]
+    assert np.array_equal(frames[0], np.arange(10, 14))
+    with pytest.raises(ValueError):
+        FrameAdapter(kws=0)
+
+
+def test_odd_sized_reads_keep_sample_alignment():
+    """Leituras de tamanho ímpar (timeout da serial) não desalinham as amostras."""
+    adapter = FrameAdapter(kws=512)
+    raw = np.arange(-3000, 3000, dtype=np.int16).tobytes()
+    frames = []
+    pos = 0
+    for size in [1, 7, 300, 3, 1025, 2] * 8:
+        for _, frame in adapter.push(raw[pos:pos + size]):
+            frames.append(frame.copy())
+        pos += size
+    assert pos < len(raw)
+    out = np.concatenate(frames)
+    assert np.array_equal(out, np.frombuffer(raw, dtype=np.int16)[:out.size])
+    assert out.size + adapter.pending("kws") == pos // 2
@@ -0,0 +1,72 @@
+import threading
+import pytest
+import numpy as np
+
+from src.audio.ring_buffer import RingBuffer, BLOCK
+
+
+def samples(start, n):
+    return np.arange(start, start + n, dtype=np.int16)
+
+
+def test_read_is_contiguous_across_wrap():
+    """Leituras que cruzam o fim do anel continuam contíguas (armazenamento espelhado)."""
+    ring = RingBuffer(10)
+    ring.write(samples(0, 8))
+    assert np.array_equal(np.frombuffer(ring.read(6), dtype=np.int16), samples(0, 6))
+    ring.write(samples(8, 7))  # escreve além do fim do anel
+    view = ring.read(9)
+    assert isinstance(view, memoryview)
+    assert len(view) == 9 * 2
+    assert np.array_equal(np.frombuffer(view, dtype=np.int16), samples(6, 9))
+
+
+def test_arbitrary_read_sizes():
+    """O consumidor pode ler tamanhos diferentes dos blocos escritos."""
+    ring = RingBuffer(64)
+    for i in range(0, 40, 5):
+        ring.write(samples(i, 5).tobytes())
+    out = [np.frombuffer(ring.read(n), dtype=np.int16) for n in (3, 17, 20)]
+    assert np.array_equal(np.concatenate(out), samples(0, 40))
+
+
+def test_drop_oldest_counts_overrun():
+    """Com drop_oldest, o áudio mais antigo é descartado e contabilizado."""
+    ring = RingBuffer(10)
+    ring.write(samples(0, 8))
+    ring.write(samples(8, 6))
+    assert ring.overruns == 4
+    assert ring.available == 10
+    assert np.array_equal(np.frombuffer(ring.read(10), dtype=np.int16), samples(4, 10))
+
+
+def test_block_policy_waits_for_consumer():
+    """Com block, o produtor espera espaço; sem consumidor, o bloco é descartado após o timeout."""
+    ring = RingBuffer(10, policy=BLOCK, write_timeout=0.05)
+    ring.write(samples(0, 10))
+    assert ring.write(samples(10, 5)) == 0
+    assert ring.overruns == 5
+
+    threading.Timer(0.01, ring.read, args=(5,)).start()
+    ring.write_timeout = 1.0
+    assert ring.write(samples(10, 5)) == 5
+    assert ring.overruns == 5
+
+
+def test_read_timeout_counts_underrun():
+    """Leitura sem dados suficientes expira, retorna None e conta underrun."""
+    ring = RingBuffer(10)
+    ring.write(samples(0, 3))
+    assert ring.read(5, timeout=0.01) is None
+    assert ring.underruns == 1
+    with pytest.raises(ValueError):
+        ring.read(11)
+
+
+def test_read_with_backlog_is_not_overwritten():
+    """Com dados ainda na fila, o bloco lido não pode ser alcançado pelo produtor."""
+    ring = RingBuffer(1000)
+    ring.write(np.arange(900, dtype=np.int16))
+    view = ring.read(100)
+    ring.write(np.full(200, -1, dtype=np.int16))
+    assert np.array_equal(np.frombuffer(view, dtype=np.int16), np.arange(100))
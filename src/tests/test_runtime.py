@@ -0,0 +1,184 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from src.audio.endpointer import Endpointer
+from src.audio.preprocessor import VAD
+from src.audio.ring_buffer import BLOCK
+from src.audio.sources import AudioSource
+from src.core.runtime import AsyncRuntime
+
+
+class ListSource(AudioSource):
+    """Entrega chunks pré-definidos; `delay` simula o ritmo da serial."""
+
+    def __init__(self, chunks, delay=0.0):
+        self.chunks = list(chunks)
+        self.delay = delay
+
+    def read(self, size):
+        if self.delay:
+            time.sleep(self.delay)
+        if not self.chunks:
+            return b""
+        chunk = self.chunks.pop(0)
+        # PCM16: o runtime alinha os chunks em amostras inteiras
+        return chunk + b" " if len(chunk) % 2 else chunk
+
+    @property
+    def exhausted(self):
+        return not self.chunks
+
+
+class FakeASR:
+    """Chunks b"T:<texto>" fecham uma frase com esse texto; o resto é 'silêncio'."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.grammar = None
+        self.grammars = []
+        self.resets = 0
+        self.model = None
+
+    def accept_chunk(self, chunk):
+        if self.delay:
+            time.sleep(self.delay)
+        return chunk[2:].decode().rstrip() if chunk.startswith(b"T:") else None
+
+    def flush(self):
+        return ""
+
+    def reset_session(self):
+        self.resets += 1
+
+    def set_grammar(self, grammar):
+        self.grammar = grammar
+        self.grammars.append(grammar)
+
+
+def run(runtime):
+    return asyncio.run(runtime.run())
+
+
+def test_complete_command_goes_straight_to_output():
+    results = []
+    runtime = AsyncRuntime(ListSource([b"\0\0", b"T:ligar a luz da sala"]), FakeASR(),
+                           on_command=results.append, overflow=BLOCK, verbose=False)
+    stats = run(runtime)
+    assert [r["entities"]["acao"] for r in results] == ["ligar"]
+    assert results[0]["entities"]["dispositivo"] == "luz_sala"
+    assert stats["commands"] == 1 and stats["dialogues"] == 0
+
+
+def test_dialogue_coroutine_asks_and_uses_next_utterance():
+    """Só dispositivo -> pergunta; a frase seguinte do mesmo stream completa o comando."""
+    asr = FakeASR()
+    results = []
+    source = ListSource([b"T:porta", b"\0\0", b"T:banana", b"T:sim", b"T:ligar a tv da sala"])
+    stats = run(AsyncRuntime(source, asr, on_command=results.append, overflow=BLOCK, verbose=False))
+    assert results[0]["intent"] == "controlar_dispositivo"
+    assert results[0]["entities"]["acao"] == "abrir"
+    assert results[1]["entities"]["acao"] == "ligar"
+    assert stats["dialogues"] == 1
+    # gramática mínima durante o diálogo e restaurada no fim
+    assert '"abrir"' in asr.grammars[0] and asr.grammars[-1] is None
+
+
+def test_dialogue_timeout_cancels():
+    results = []
+    source = ListSource([b"T:porta"] + [b"\0\0"] * 5, delay=0.05)
+    stats = run(AsyncRuntime(source, FakeASR(), on_command=results.append, overflow=BLOCK,
+                             dialogue_timeout_s=0.1, verbose=False))
+    assert results[0]["intent"] == "desconhecido"
+    assert stats["dialogue_timeouts"] == 1
+
+
+def test_capture_keeps_reading_and_drops_oldest_under_load():
+    """Com o ASR lento, a captura continua lendo e descarta o áudio mais antigo."""
+    source = ListSource([b"\0\0"] * 60, delay=0.001)
+    stats = run(AsyncRuntime(source, FakeASR(delay=0.01), queue_size=4, verbose=False))
+    capture = stats["queues"]["captura"]
+    assert capture["dropped"] > 0
+    assert capture["high_water"] <= 4
+
+
+def test_async_on_command_is_awaited():
+    seen = []
+
+    async def send(result):
+        await asyncio.sleep(0)
+        seen.append(result["entities"]["dispositivo"])
+
+    run(AsyncRuntime(ListSource([b"T:desligar o ventilador do quarto"]), FakeASR(),
+                     on_command=send, overflow=BLOCK, verbose=False))
+    assert seen == ["ventilador_quarto"]
+
+
+def test_odd_sized_reads_are_realigned_before_preprocess():
+    """Leitura com número ímpar de bytes (timeout da serial) não derruba o pré-processamento."""
+
+    class Source(ListSource):
+        def read(self, size):
+            return self.chunks.pop(0) if self.chunks else b""
+
+    class Identity:
+        def process_array(self, arr):
+            seen.append(arr.copy())
+            return arr
+
+    seen = []
+    raw = np.arange(1, 101, dtype=np.int16).tobytes()
+    chunks = [raw[:1], raw[1:51], raw[51:52], raw[52:]]
+    stats = run(AsyncRuntime(Source(chunks), FakeASR(), preprocessor=Identity(),
+                             overflow=BLOCK, verbose=False))
+    assert stats["commands"] == 0
+    assert np.array_equal(np.concatenate(seen), np.arange(1, 101))
+
+
+class UtteranceASR:
+    """Registra o áudio recebido; o final é o texto se recebeu fala desde o reset."""
+
+    def __init__(self):
+        self.received = 0
+        self.session = 0
+        self.resets = 0
+        self.model = None
+
+    def accept_chunk(self, chunk):
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        self.received += samples.size
+        self.session += int(np.count_nonzero(samples))
+        return None
+
+    def flush(self):
+        text = "liga a luz da sala" if self.session else ""
+        self.session = 0
+        return text
+
+    def reset_session(self):
+        self.resets += 1
+        self.session = 0
+
+
+def test_endpointer_keeps_silence_away_from_the_asr():
+    """Com endpointer o Vosk só recebe as frases; o END fecha o comando."""
+    vad = VAD(sample_rate=8000, energy_threshold=500.0)
+    vad.vad = None  # decisão por energia, determinística
+    endpointer = Endpointer(sample_rate=8000, vad=vad, preroll_ms=90, min_speech_ms=60,
+                            trailing_silence_ms=150)
+    audio = np.concatenate([np.zeros(8000, np.int16), np.full(2400, 3000, np.int16),
+                            np.zeros(8000, np.int16)])
+    chunks = [audio[i:i + 800].tobytes() for i in range(0, audio.size, 800)]
+    asr = UtteranceASR()
+    results = []
+    stats = run(AsyncRuntime(ListSource(chunks), asr, on_command=results.append, overflow=BLOCK,
+                             verbose=False, endpointer=endpointer, early_commit=False))
+    assert [r["entities"]["dispositivo"] for r in results] == ["luz_sala"]
+    # só pré-roll, fala e cauda (hangover do VAD + silêncio final) chegam ao ASR,
+    # não os 2 s de silêncio em volta
+    assert 2400 < asr.received <= 2 * 2400
+    assert stats["endpointer"]["skipped_s"] > 1.5
+    with pytest.raises(ValueError):
+        AsyncRuntime(ListSource([]), asr, kws=object(), endpointer=endpointer)
@@ -0,0 +1,112 @@
+import numpy as np
+import pytest
+
+from src.audio.serial_protocol import HEADER, PacketDecoder, crc16, encode_packet
+
+
+def pcm(seq, n=160):
+    return np.full(n, seq % 1000, dtype=np.int16).tobytes()
+
+
+def stream(seqs):
+    return b"".join(encode_packet(s, pcm(s), s * 20000) for s in seqs)
+
+
+def crc16_bitwise(data):
+    """Mesmo algoritmo do firmware (crc16_update no .ino)."""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else crc << 1
+            crc &= 0xFFFF
+    return crc
+
+
+def test_crc_matches_firmware():
+    data = bytes(range(256)) * 2
+    assert crc16(data) == crc16_bitwise(data)
+
+
+def test_decodes_in_any_block_size():
+    """O PCM sai igual independente de como os bytes chegam da serial."""
+    raw = stream(range(20))
+    expected = b"".join(pcm(s) for s in range(20))
+    for block in (1, 7, 330, 4000):
+        decoder = PacketDecoder()
+        out = b"".join(decoder.feed(raw[i:i + block]) for i in range(0, len(raw), block))
+        assert out == expected
+        assert decoder.stats()["skipped_bytes"] == 0
+
+
+def test_lost_byte_resyncs_and_zero_fills():
+    """Um byte perdido invalida só aquele pacote, que vira silêncio do mesmo tamanho."""
+    packets = [encode_packet(s, pcm(s)) for s in range(5)]
+    packets[2] = packets[2][:50] + packets[2][51:]
+    decoder = PacketDecoder()
+    out = np.frombuffer(decoder.feed(b"garbage" + b"".join(packets)), dtype=np.int16)
+    assert out.size == 5 * 160
+    assert out[320:480].tolist() == [0] * 160
+    assert out[480:].tolist() == [3] * 160 + [4] * 160
+    stats = decoder.stats()
+    assert stats["dropped_packets"] == 1
+    assert stats["zero_filled_bytes"] == 320
+    assert stats["skipped_bytes"] >= 7
+
+
+def test_late_and_duplicate_packets_are_discarded():
+    decoder = PacketDecoder()
+    out = decoder.feed(stream([0, 1, 3, 2, 3, 4]))
+    assert np.frombuffer(out, dtype=np.int16)[::160].tolist() == [0, 1, 0, 3, 4]
+    assert decoder.reordered == 2
+    assert decoder.dropped_packets == 1
+
+
+def test_sequence_wraparound_and_restart():
+    decoder = PacketDecoder(max_gap_packets=10)
+    decoder.feed(stream([65534, 65535, 0, 1]))
+    assert decoder.dropped_packets == 0
+    decoder.feed(stream([500]))
+    assert decoder.restarts == 1 and decoder.zero_filled_bytes == 0
+
+
+def test_esp32_reboot_resyncs_sequence():
+    """seq volta a 0 com o esperado < 32768: sem o resync todo pacote seria "atrasado"."""
+    decoder = PacketDecoder()
+    decoder.feed(stream(range(3000)), now=100.0)
+    # micros() recomeça junto com o seq
+    out = decoder.feed(stream(range(2000)), now=200.0)
+    assert len(out) == 2000 * 320
+    assert np.frombuffer(out, dtype=np.int16)[::160].tolist() == [s % 1000 for s in range(2000)]
+    stats = decoder.stats()
+    assert stats["resyncs"] == 1 and stats["reordered"] == 0
+    assert stats["max_latency_ms"] == pytest.approx(0.0)
+
+
+def test_reboot_without_timestamp_resyncs_after_consecutive_late_packets():
+    decoder = PacketDecoder(resync_after_late=4)
+    decoder.feed(stream(range(3000)))
+    # timestamps que não recuam: só o contador de atrasados detecta o reinício
+    raw = b"".join(encode_packet(s, pcm(s), 10 ** 9 + s) for s in range(100))
+    out = decoder.feed(raw)
+    assert len(out) == (100 - 3) * 320
+    assert decoder.resyncs == 1 and decoder.reordered == 3
+
+
+def test_corrupted_payload_and_bogus_length():
+    """CRC errado e tamanho absurdo são tratados como sync falso."""
+    good = encode_packet(1, pcm(1))
+    bad = bytearray(encode_packet(0, pcm(0)))
+    bad[HEADER.size + 3] ^= 0xFF
+    bogus = HEADER.pack(b"\xa5\x5a", 9, 60000, 0)
+    decoder = PacketDecoder()
+    out = decoder.feed(bytes(bad) + bogus + good)
+    assert out == pcm(1)
+    assert decoder.crc_errors == 1
+
+
+def test_relative_latency():
+    decoder = PacketDecoder()
+    decoder.feed(encode_packet(0, pcm(0), 0), now=10.0)
+    decoder.feed(encode_packet(1, pcm(1), 20000), now=10.05)
+    assert decoder.stats()["max_latency_ms"] == pytest.approx(30.0)
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+
+from src.audio.ring_buffer import BLOCK
+from src.audio.sources import AudioSource
+from src.core.server import MultiStreamServer
+
+
+class ListSource(AudioSource):
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.closed = False
+
+    def read(self, size):
+        return self.chunks.pop(0) if self.chunks else b""
+
+    @property
+    def exhausted(self):
+        return not self.chunks
+
+    def close(self):
+        self.closed = True
+
+
+class SharedLog:
+    """Registra a ordem em que os workers atendem cada stream."""
+
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+
+class FakeASR:
+    def __init__(self, model, log, delay=0.002):
+        self.model = model
+        self.log = log
+        self.delay = delay
+        self.grammar = None
+
+    def accept_chunk(self, chunk):
+        time.sleep(self.delay)
+        name, _, text = chunk.decode().partition(":")
+        with self.log.lock:
+            self.log.calls.append(name)
+        return text or None
+
+    def flush(self):
+        return ""
+
+    def reset_session(self):
+        pass
+
+    def set_grammar(self, grammar):
+        self.grammar = grammar
+
+
+class FakeModel:
+    def vosk_model_find_word(self, word):
+        return 1
+
+
+def make_server(log, **kwargs):
+    model = FakeModel()
+    server = MultiStreamServer(model=model, workers=1, asr_factory=lambda m: FakeASR(m, log),
+                               overflow=BLOCK, verbose=False, **kwargs)
+    return server, model
+
+
+def test_streams_share_model_and_keep_separate_state():
+    log = SharedLog()
+    results = []
+    server, model = make_server(log, on_command=lambda name, r: results.append((name, r)))
+    server.add_stream("sala", ListSource([b"sala:", b"sala:ligar a luz da sala"]))
+    server.add_stream("quarto", ListSource([b"quarto:porta", b"quarto:", b"quarto:fechar"]))
+    runtimes = list(server.streams.values())
+    stats = asyncio.run(server.run())
+    # um único modelo, um reconhecedor por stream
+    assert all(rt.asr.model is model for rt in runtimes)
+    assert runtimes[0].asr is not runtimes[1].asr
+    assert all(rt["commands"] == 1 for rt in stats["streams"].values())
+    by_stream = dict(results)
+    assert by_stream["sala"]["entities"]["dispositivo"] == "luz_sala"
+    # o diálogo do quarto não interfere na sala
+    assert by_stream["quarto"]["entities"]["acao"] == "fechar"
+    assert stats["streams"]["quarto"]["dialogues"] == 1
+
+
+def test_single_worker_serves_streams_round_robin():
+    """Com um worker e três streams ocupados, nenhum stream é atendido duas vezes seguidas."""
+    log = SharedLog()
+    server, _ = make_server(log)
+    for name in "abc":
+        server.add_stream(name, ListSource([f"{name}:".encode()] * 10))
+    asyncio.run(server.run())
+    busy = log.calls[:27]
+    assert all(busy[i] != busy[i + 1] for i in range(len(busy) - 1))
+    assert {busy.count(n) for n in "abc"} == {9}
+
+
+def test_stream_added_while_running():
+    log = SharedLog()
+    server, _ = make_server(log)
+    late = ListSource([b"late:ligar a tv da sala"])
+
+    async def scenario():
+        task = asyncio.create_task(server.run(forever=True))
+        await asyncio.sleep(0.05)
+        server.add_stream("late", late)
+        while "late" not in server.finished:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(scenario())
+    assert server.finished["late"]["commands"] == 1
+    assert late.closed
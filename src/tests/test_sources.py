@@ -0,0 +1,113 @@
+import time
+import wave
+
+import numpy as np
+import pytest
+
+from src.audio.sources import PtyBridge, WavReplaySource, read_wav_pcm16
+
+
+def write_wav(path, samples, sr=8000):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sr)
+        wf.writeframes(samples.astype(np.int16).tobytes())
+    return str(path)
+
+
+@pytest.fixture
+def ramp_wav(tmp_path):
+    # 1000 amostras: 6 pacotes completos de 160 + 40 descartadas (o firmware só envia pacotes inteiros)
+    return write_wav(tmp_path / "ramp.wav", np.arange(1000))
+
+
+def test_unpaced_replay_delivers_whole_packets_in_order(ramp_wav):
+    """Sem ritmo, todo o áudio chega em ordem, truncado a pacotes completos."""
+    source = WavReplaySource([ramp_wav], speed=0, timeout=0.5)
+    data = b""
+    while not source.exhausted:
+        data += source.read(4000)
+    assert np.frombuffer(data, dtype=np.int16).tolist() == list(range(960))
+    assert source.stats()["packets"] == 6
+
+
+def test_paced_replay_follows_device_rate(ramp_wav):
+    """Em tempo real, 6 pacotes de 20 ms levam ~120 ms para chegar."""
+    source = WavReplaySource([ramp_wav], jitter_ms=2.0, seed=1, timeout=1.0)
+    t0 = time.perf_counter()
+    first = source.read(320)
+    assert len(first) == 320
+    assert time.perf_counter() - t0 >= 0.015
+    source.read(1600)
+    assert time.perf_counter() - t0 >= 0.11
+    assert source.exhausted
+
+
+def test_backlog_measures_slow_consumer(ramp_wav):
+    """Um consumidor que lê depois do fim vê todo o áudio como backlog."""
+    source = WavReplaySource([ramp_wav], speed=0)
+    while source.stats()["packets"] < 6:
+        time.sleep(0.01)
+    source.read(320)
+    assert source.stats()["max_backlog_seconds"] == pytest.approx(960 / 8000)
+
+
+def test_read_wav_resamples_and_downmixes(tmp_path):
+    stereo = np.repeat(np.arange(1600), 2)
+    path = tmp_path / "st.wav"
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(stereo.astype(np.int16).tobytes())
+    assert read_wav_pcm16(str(path), 8000).size == 800
+
+
+def test_pty_bridge_looks_like_serial(ramp_wav):
+    """Os bytes da fonte saem pelo pty como se viessem da ESP32."""
+    serial = pytest.importorskip("serial")
+    bridge = PtyBridge(WavReplaySource([ramp_wav], speed=0))
+    try:
+        # o pyserial limpa a entrada ao abrir; a ponte só começa depois
+        with serial.Serial(bridge.port, 230400, timeout=1) as ser:
+            bridge.start()
+            data = ser.read(1920)
+    finally:
+        bridge.close()
+    assert np.frombuffer(data, dtype=np.int16).tolist() == list(range(960))
+
+
+def test_framed_replay_survives_byte_loss(tmp_path):
+    """Com perda de bytes, o protocolo mantém a linha do tempo (perdas viram silêncio)."""
+    from src.audio.sources import FramedSource
+
+    path = write_wav(tmp_path / "tone.wav", np.full(8000, 1000))
+    raw = WavReplaySource([path], speed=0, framed=True, byte_loss=0.2, seed=3)
+    source = FramedSource(raw)
+    data = b""
+    while not source.exhausted:
+        data += source.read(4000)
+    samples = np.frombuffer(data, dtype=np.int16)
+    protocol = source.stats()["protocol"]
+    assert protocol["dropped_packets"] > 0
+    assert set(np.unique(samples)) <= {0, 1000}
+    # só o(s) último(s) pacote(s) perdido(s) podem faltar no fim
+    assert samples.size >= 8000 - 160 * 3
+
+
+def test_recorder_source_reads_ring_buffer():
+    """O microfone (buffer circular) vira uma fonte com a mesma interface da serial."""
+    from types import SimpleNamespace
+
+    from src.audio.ring_buffer import RingBuffer
+    from src.audio.sources import RecorderSource
+
+    # mesmo contrato do AudioRecorder, sem abrir o sounddevice
+    ring = RingBuffer(1000)
+    recorder = SimpleNamespace(audio_input=SimpleNamespace(ring=ring, samplerate=8000),
+                               get_next_chunk=lambda frames, timeout=None: ring.read(frames, timeout=timeout))
+    ring.write(np.arange(400, dtype=np.int16))
+    source = RecorderSource(recorder, timeout=0.01)
+    assert np.frombuffer(source.read(640), dtype=np.int16).tolist() == list(range(320))
+    assert source.read(640) == b""
@@ -0,0 +1,113 @@
+import asyncio
+import time
+import urllib.request
+
+import numpy as np
+import pytest
+
+from src.audio.ring_buffer import BLOCK
+from src.audio.sources import AudioSource
+from src.core.runtime import AsyncRuntime
+from src.core.telemetry import TELEMETRY, Histogram, MetricsExporter, Telemetry
+
+
+def test_histogram_quantiles_and_snapshot():
+    hist = Histogram("x_seconds", buckets=(0.01, 0.1, 1.0))
+    for value in [0.005] * 50 + [0.05] * 40 + [0.5] * 10:
+        hist.observe(value)
+    assert hist.count == 100
+    assert hist.quantile(0.5) <= 0.01
+    assert 0.01 < hist.quantile(0.9) <= 0.1
+    assert 0.1 < hist.quantile(0.99) <= 0.5
+    snap = hist.snapshot()
+    assert snap["max_ms"] == pytest.approx(500)
+    assert snap["mean_ms"] == pytest.approx(1000 * (0.25 + 2.0 + 5.0) / 100)
+
+
+def test_prometheus_text_is_cumulative():
+    telemetry = Telemetry(enabled=True, buckets=(0.01, 0.1))
+    telemetry.observe("nlp", 0.005)
+    telemetry.observe("nlp", 0.05)
+    telemetry.observe("nlp", 5.0)
+    text = telemetry.to_prometheus()
+    assert "# TYPE assistente_nlp_seconds histogram" in text
+    assert 'assistente_nlp_seconds_bucket{le="0.01"} 1' in text
+    assert 'assistente_nlp_seconds_bucket{le="0.1"} 2' in text
+    assert 'assistente_nlp_seconds_bucket{le="+Inf"} 3' in text
+    assert "assistente_nlp_seconds_count 3" in text
+
+
+def test_disabled_telemetry_records_nothing():
+    telemetry = Telemetry(enabled=False)
+    with telemetry.span("asr"):
+        pass
+    telemetry.observe("nlp", 1.0)
+    telemetry.since("output", time.perf_counter())
+    assert telemetry.histograms == {}
+
+
+def test_exporter_writes_file_and_serves_http(tmp_path):
+    telemetry = Telemetry(enabled=True)
+    telemetry.observe("eos_to_action", 0.3)
+    path = tmp_path / "metrics.prom"
+    exporter = MetricsExporter(telemetry, path=str(path), port=0, interval_s=60).start()
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics", timeout=5) as resp:
+            body = resp.read().decode()
+    finally:
+        exporter.close()
+    assert "assistente_eos_to_action_seconds_count 1" in body
+    # close() grava a última exportação
+    assert path.read_text() == telemetry.to_prometheus()
+
+
+LOUD = (np.ones(800) * 3000).astype(np.int16).tobytes()
+SILENCE = np.zeros(800, dtype=np.int16).tobytes()
+
+
+class ListSource(AudioSource):
+    def __init__(self, chunks, delay):
+        self.chunks = list(chunks)
+        self.delay = delay
+
+    def read(self, size):
+        time.sleep(self.delay)
+        return self.chunks.pop(0) if self.chunks else b""
+
+    @property
+    def exhausted(self):
+        return not self.chunks
+
+
+class EndpointASR:
+    """Fecha a frase depois de `n` chunks, como o endpoint do Vosk após o silêncio."""
+
+    def __init__(self, n):
+        self.n = n
+        self.model = None
+
+    def accept_chunk(self, chunk):
+        self.n -= 1
+        return "ligar a luz da sala" if self.n == 0 else None
+
+    def flush(self):
+        return ""
+
+    def reset_session(self):
+        pass
+
+
+def test_runtime_measures_end_of_speech_to_action():
+    """Fala, 3 chunks de silêncio (endpoint) e o comando: eos -> ação inclui o silêncio."""
+    TELEMETRY.reset()
+    chunks = [LOUD, LOUD, SILENCE, SILENCE, SILENCE]
+    runtime = AsyncRuntime(ListSource(chunks, delay=0.05), EndpointASR(len(chunks)),
+                           overflow=BLOCK, verbose=False)
+    asyncio.run(runtime.run())
+    snap = TELEMETRY.snapshot()
+    assert runtime.commands == 1
+    for name in ("capture", "asr_chunk", "asr_final", "nlp", "final_to_action", "eos_to_action"):
+        assert snap[f"{name}_seconds"]["count"] >= 1, name
+    # três chunks de silêncio depois da fala, cada um lido a cada ~50 ms
+    assert snap["eos_to_action_seconds"]["max_ms"] >= 140
+    assert snap["final_to_action_seconds"]["max_ms"] < snap["eos_to_action_seconds"]["max_ms"]
@@ -0,0 +1,141 @@
+import json
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from src.nlp import keys, nlp
+from src.nlp.store import VocabularyStore, compile_vocabulary
+
+
+@pytest.fixture
+def vocabulary_file(tmp_path):
+    """Vocabulário de keys.py exportado em JSON; o vocabulário original volta no fim."""
+    original = nlp.current_vocabulary()
+    path = tmp_path / "vocabulario.json"
+    path.write_text(json.dumps(original.as_dict(), ensure_ascii=False), encoding="utf-8")
+    yield path
+    nlp.install_vocabulary(original)
+
+
+def add_device(path, key, synonyms):
+    data = json.loads(path.read_text(encoding="utf-8"))
+    data["devices"][key] = synonyms
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+    # garante mtime diferente mesmo em sistemas de arquivos com resolução grosseira
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condição não atingida")
+        time.sleep(0.01)
+
+
+def test_snapshot_is_reused_until_source_changes(vocabulary_file):
+    first = compile_vocabulary(str(vocabulary_file))
+    assert not first.from_snapshot
+    assert os.path.exists(f"{vocabulary_file}.snapshot")
+    second = compile_vocabulary(str(vocabulary_file))
+    assert second.from_snapshot
+    assert second.as_dict() == first.as_dict()
+    assert second.index.scan("liga a luz da sala") == first.index.scan("liga a luz da sala")
+
+    add_device(vocabulary_file, "abajur", ["abajur"])
+    assert not compile_vocabulary(str(vocabulary_file)).from_snapshot
+
+
+def test_store_reloads_changed_file_and_invalidates_cache(vocabulary_file):
+    store = VocabularyStore(str(vocabulary_file), watch_interval_s=None, verbose=False).load()
+    assert nlp.parse_command("liga o abajur")["entities"]["dispositivo"] is None
+    assert store.reload() is False  # nada mudou
+
+    add_device(vocabulary_file, "abajur", ["abajur"])
+    assert store.reload() is True
+    assert nlp.parse_command("liga o abajur")["entities"]["dispositivo"] == "abajur"
+    assert "abajur" in keys.DEVICES
+    assert store.stats()["reloads"] == 1
+
+
+def test_invalid_source_keeps_current_vocabulary(vocabulary_file):
+    store = VocabularyStore(str(vocabulary_file), watch_interval_s=None, verbose=False).load()
+    current = nlp.current_vocabulary()
+    vocabulary_file.write_text('{"actions": {}}', encoding="utf-8")
+    assert store.reload(force=True) is False
+    assert store.stats()["errors"] == 1
+    assert nlp.current_vocabulary() is current
+
+
+def test_watcher_thread_picks_up_edits(vocabulary_file):
+    store = VocabularyStore(str(vocabulary_file), watch_interval_s=0.05, verbose=False).load().start()
+    try:
+        add_device(vocabulary_file, "abajur", ["abajur"])
+        wait_for(lambda: store.reloads == 1)
+    finally:
+        store.close()
+    assert nlp.parse_command("desliga o abajur")["entities"]["dispositivo"] == "abajur"
+
+
+@pytest.mark.parametrize("field, value", [
+    ("composable", 5),
+    ("devices", {"abajur": "abajur"}),
+    ("negation_invert", ["ligar"]),
+])
+def test_watcher_survives_bad_source(vocabulary_file, field, value):
+    """JSON válido com tipos errados conta como erro e a vigia segue viva."""
+    store = VocabularyStore(str(vocabulary_file), watch_interval_s=0.05, verbose=False).load().start()
+    good = vocabulary_file.read_text(encoding="utf-8")
+    try:
+        data = json.loads(good)
+        data[field] = value
+        vocabulary_file.write_text(json.dumps(data), encoding="utf-8")
+        wait_for(lambda: store.errors == 1)
+        assert store._thread.is_alive()
+
+        vocabulary_file.write_text(good, encoding="utf-8")
+        add_device(vocabulary_file, "abajur", ["abajur"])
+        wait_for(lambda: store.reloads == 1)
+    finally:
+        store.close()
+    assert nlp.parse_command("liga o abajur")["entities"]["dispositivo"] == "abajur"
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGHUP"), reason="sem SIGHUP nesta plataforma")
+def test_sighup_triggers_reload(vocabulary_file):
+    store = VocabularyStore(str(vocabulary_file), watch_interval_s=None, verbose=False).load().start()
+    previous = signal.getsignal(signal.SIGHUP)
+    try:
+        assert store.install_signal_handler()
+        os.kill(os.getpid(), signal.SIGHUP)
+        wait_for(lambda: store.reloads == 1)
+    finally:
+        signal.signal(signal.SIGHUP, previous)
+        store.close()
+
+
+def test_parsing_continues_during_reloads(vocabulary_file):
+    """Parses concorrentes veem sempre um vocabulário completo (antigo ou novo)."""
+    store = VocabularyStore(str(vocabulary_file), watch_interval_s=None, verbose=False).load()
+    stop = threading.Event()
+    errors = []
+
+    def parse_loop():
+        while not stop.is_set():
+            result = nlp.parse_command(f"liga a luz da sala {time.perf_counter_ns()}")
+            if result["entities"]["dispositivo"] != "luz_sala":
+                errors.append(result)
+
+    thread = threading.Thread(target=parse_loop)
+    thread.start()
+    try:
+        for _ in range(5):
+            store.reload(force=True)
+    finally:
+        stop.set()
+        thread.join()
+    assert errors == []